@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Answer Store for Esoteric Vectors
+
+SQLite payload store for Q&A cache answers with:
+- Answers keyed by qa_id, outside the vector index metadata
+- Content hashes so unchanged answers are never rewritten
+- Point lookups only after a match clears the similarity threshold
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from utils.logger import logger
+
+
+def answer_hash(answer: str) -> str:
+    """Content hash of an answer payload."""
+    return hashlib.sha1(answer.encode("utf-8")).hexdigest()
+
+
+class AnswerStore:
+    """
+    Persistent qa_id -> answer store shared by every Q&A collection in a ChromaDB path.
+
+    Features:
+    - WAL-mode SQLite, safe to share across threads
+    - Batched writes that skip answers whose content hash is unchanged
+    - Shared across embedding-dimension collections (answers do not depend on vectors)
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the store.
+
+        Args:
+            db_path: SQLite file path
+        """
+        self.db_path = db_path
+        self._lock = threading.RLock()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                qa_id TEXT PRIMARY KEY,
+                answer_hash TEXT NOT NULL,
+                answer TEXT NOT NULL
+            )
+        """)
+        self._db.commit()
+        logger.debug_optimization(f"Answer store ready at {db_path}")
+
+    def put_many(self, answers: Dict[str, str]) -> int:
+        """
+        Store answers by qa_id.
+
+        Returns:
+            Number of answers written (unchanged payloads are skipped)
+        """
+        if not answers:
+            return 0
+
+        with self._lock:
+            stored = self._hashes(list(answers))
+            rows = [
+                (qa_id, digest, answer)
+                for qa_id, answer in answers.items()
+                if stored.get(qa_id) != (digest := answer_hash(answer))
+            ]
+            if rows:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO answers (qa_id, answer_hash, answer) VALUES (?, ?, ?)", rows
+                )
+                self._db.commit()
+            return len(rows)
+
+    def put(self, qa_id: str, answer: str) -> bool:
+        """Store one answer (True if it was written)."""
+        return self.put_many({qa_id: answer}) == 1
+
+    def _hashes(self, qa_ids: List[str]) -> Dict[str, str]:
+        """Stored content hashes for the given ids."""
+        hashes = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(qa_ids), 500):
+            chunk = qa_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            hashes.update(self._db.execute(
+                f"SELECT qa_id, answer_hash FROM answers WHERE qa_id IN ({placeholders})", chunk
+            ).fetchall())
+        return hashes
+
+    def get(self, qa_id: str) -> Optional[str]:
+        """Fetch one answer (None if unknown)."""
+        with self._lock:
+            row = self._db.execute("SELECT answer FROM answers WHERE qa_id = ?", (qa_id,)).fetchone()
+        return row[0] if row else None
+
+    def delete(self, qa_ids: List[str]):
+        """Remove answers by qa_id."""
+        if not qa_ids:
+            return
+        with self._lock:
+            self._db.executemany("DELETE FROM answers WHERE qa_id = ?", [(qa_id,) for qa_id in qa_ids])
+            self._db.commit()
+
+    def clear(self):
+        """Remove every answer."""
+        with self._lock:
+            self._db.execute("DELETE FROM answers")
+            self._db.commit()
+
+    def count(self) -> int:
+        """Number of stored answers."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"AnswerStore(path={self.db_path})"
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Answer Write-Back for Esoteric Vectors
+
+Opt-in path that stores generated answers in the Q&A cache with:
+- Admission policy (logical, impersonal, timeless, standalone questions only)
+- Answers built with a user's memory or chat history are never shared
+- Minimum repeat count before an answer is stored
+- Background writes so responses are never delayed
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from cache.qa_cache import QACache, normalize_question, question_hash
+from utils.logger import logger
+
+
+# Questions about the user themselves get personalized answers
+PERSONAL_PATTERN = re.compile(
+    r"\b(i|me|my|mine|myself|we|us|our)\b"
+)
+
+# Emotional content is answered by the therapist agent and never cached
+EMOTIONAL_PATTERN = re.compile(
+    r"\b(feel|feeling|felt|anxious|anxiety|sad|depressed|lonely|afraid|scared|hurt|grief|angry|stuck|lost|overwhelmed)\b"
+)
+
+# Answers depend on the current date or lunar phase
+TIME_SENSITIVE_PATTERN = re.compile(
+    r"\b(today|tonight|tomorrow|yesterday|now|current|currently|this (week|month|year))\b"
+)
+
+# Follow-ups only make sense with the conversation that preceded them
+FOLLOW_UP_PATTERN = re.compile(
+    r"^(and|but|so|also|then|what about|how about|tell me more|more|why is that|can you)\b"
+)
+
+# Answers that draw on the asker's own details or earlier turns
+ANSWER_PERSONAL_PATTERN = re.compile(
+    r"\b(you (mentioned|said|told me|shared|asked earlier)|as (we|you) discussed|earlier in our|last time|"
+    r"your (birth ?date|birthday|name|partner|husband|wife|boyfriend|girlfriend|mother|father|children|job|chart|sign))\b"
+)
+
+
+class AnswerWriteBack:
+    """
+    Admission-controlled write-back of generated answers into the Q&A cache.
+
+    Features:
+    - Only logical-agent answers without negative intent are considered
+    - Personal, emotional, time-sensitive and follow-up questions are rejected
+    - Turns answered with memory or conversation history in the prompt are rejected
+    - Answers that address the asker personally or mention the current date are rejected
+    - A question must repeat min_repeats times before its answer is stored
+    """
+
+    def __init__(self,
+                 qa_cache: QACache,
+                 min_repeats: int = 2,
+                 min_words: int = 4,
+                 max_tracked_questions: int = 10000):
+        """
+        Initialize the write-back path.
+
+        Args:
+            qa_cache: Cache receiving admitted answers
+            min_repeats: Times a question must be asked before its answer is stored
+            min_words: Shorter questions are too ambiguous to answer out of context
+            max_tracked_questions: Bound on the repeat counter (least recent dropped)
+        """
+        self.qa_cache = qa_cache
+        self.min_repeats = min_repeats
+        self.min_words = min_words
+        self.max_tracked_questions = max_tracked_questions
+
+        self._repeats: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Performance tracking
+        self.stats = {
+            'considered': 0,
+            'rejected': 0,
+            'pending_repeats': 0,
+            'written': 0
+        }
+
+    def rejection_reason(self, question: str, message_type: str, negative_intent: bool,
+                         domain: Optional[str], personal_context: bool = False) -> Optional[str]:
+        """Return why an answer may not be cached, or None if it is eligible."""
+        if message_type != "logical":
+            return "not_logical"
+        if negative_intent:
+            return "negative_intent"
+        if personal_context:
+            return "personal_context"
+        if not domain:
+            return "no_domain"
+
+        normalized = normalize_question(question)
+        if len(normalized.split()) < self.min_words:
+            return "too_short"
+        if PERSONAL_PATTERN.search(normalized):
+            return "personal"
+        if EMOTIONAL_PATTERN.search(normalized):
+            return "emotional"
+        if TIME_SENSITIVE_PATTERN.search(normalized):
+            return "time_sensitive"
+        if FOLLOW_UP_PATTERN.search(normalized):
+            return "follow_up"
+        return None
+
+    @staticmethod
+    def answer_rejection_reason(answer: str) -> Optional[str]:
+        """Return why a generated answer may not be shared, or None if it is eligible."""
+        normalized = normalize_question(answer)
+        if not normalized:
+            return "empty_answer"
+        if ANSWER_PERSONAL_PATTERN.search(normalized):
+            return "personal_answer"
+        if TIME_SENSITIVE_PATTERN.search(normalized):
+            return "time_sensitive_answer"
+        return None
+
+    def _count_repeat(self, question: str) -> int:
+        """Count another occurrence of a question (bounded LRU counter)."""
+        key = question_hash(question)
+        with self._lock:
+            count = self._repeats.pop(key, 0) + 1
+            self._repeats[key] = count
+            while len(self._repeats) > self.max_tracked_questions:
+                self._repeats.popitem(last=False)
+            return count
+
+    def consider(self, question: str, answer: str, message_type: str, domain: Optional[str],
+                 negative_intent: bool = False, personal_context: bool = False) -> bool:
+        """
+        Apply the admission policy and store the answer if admitted.
+
+        Args:
+            personal_context: The prompt carried the user's memory or earlier turns
+
+        Returns:
+            True if the answer was written to the Q&A cache
+        """
+        self.stats['considered'] += 1
+
+        reason = (self.rejection_reason(question, message_type, negative_intent, domain, personal_context)
+                  or self.answer_rejection_reason(answer))
+        if reason is not None:
+            self.stats['rejected'] += 1
+            logger.debug_optimization(f"Answer write-back rejected: {reason}")
+            return False
+
+        if self._count_repeat(question) < self.min_repeats:
+            self.stats['pending_repeats'] += 1
+            return False
+
+        if self.qa_cache.add_generated_pair(question, answer, domain) is None:
+            return False
+
+        with self._lock:
+            self._repeats.pop(question_hash(question), None)
+        self.stats['written'] += 1
+        return True
+
+    def submit(self, question: str, answer: str, message_type: str, domain: Optional[str],
+               negative_intent: bool = False, personal_context: bool = False):
+        """Consider an answer on the Q&A cache executor (off the response path)."""
+        future = self.qa_cache.executor.submit(
+            self.consider, question, answer, message_type, domain, negative_intent, personal_context
+        )
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future):
+        """Surface background write-back errors in the log."""
+        error = future.exception()
+        if error is not None:
+            logger.warning(f"Answer write-back failed: {error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get write-back statistics."""
+        with self._lock:
+            tracked = len(self._repeats)
+        return {
+            'min_repeats': self.min_repeats,
+            'tracked_questions': tracked,
+            **self.stats
+        }
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"AnswerWriteBack(min_repeats={self.min_repeats}, written={self.stats['written']})"
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Q&A Cache Miss Log for Esoteric Vectors
+
+Opt-in, append-only record of questions the Q&A cache could not answer:
+- One self-contained JSON line per miss: question, best similarity, domain
+  and the query embedding (float16, base64)
+- One file per embedding size and day; days past the retention are deleted
+- Read back as aligned (records, matrix) for offline mining
+- Spherical k-means clustering into ranked canonical-question candidates
+"""
+
+import base64
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.logger import logger
+
+
+class MissLog:
+    """
+    Compact append-only log of Q&A cache misses.
+
+    Features:
+    - ~2.7 bytes per dimension per miss (base64 float16 embeddings)
+    - Each miss written with a single O_APPEND write, so records from
+      concurrent workers never interleave and a torn line only loses itself
+    - Separate files per embedding size (dimension migrations never mix)
+    - Day files older than retention_days removed as the log is written
+    """
+
+    RECORD_START = '{"ts": '
+
+    def __init__(self, log_dir: str = "data/qa_misses", retention_days: int = 30):
+        """
+        Initialize the miss log.
+
+        Args:
+            log_dir: Directory holding misses_<dims>d_<YYYY-MM-DD>.jsonl files
+            retention_days: Days of misses kept (0 keeps everything until cleared)
+        """
+        self.log_dir = log_dir
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._pruned_day: Optional[str] = None
+        self.stats = {'recorded': 0, 'failed': 0}
+
+    def _files(self, dimensions: Optional[int] = None) -> List[Tuple[int, str, str]]:
+        """(dimensions, day, path) of every log file, oldest day first."""
+        if not os.path.isdir(self.log_dir):
+            return []
+
+        files = []
+        for name in os.listdir(self.log_dir):
+            if not (name.startswith("misses_") and name.endswith(".jsonl")):
+                continue
+            size, _, day = name[len("misses_"):-len(".jsonl")].partition("d_")
+            if size.isdigit() and day and (dimensions is None or int(size) == dimensions):
+                files.append((int(size), day, os.path.join(self.log_dir, name)))
+        return sorted(files, key=lambda file: file[1])
+
+    def _prune(self, today: str):
+        """Delete day files past the retention (checked once per day)."""
+        if self._pruned_day == today:
+            return
+        self._pruned_day = today
+        if self.retention_days <= 0:
+            return
+
+        cutoff = time.strftime("%Y-%m-%d", time.gmtime(time.time() - self.retention_days * 86400))
+        for _, day, path in self._files():
+            if day < cutoff:
+                with contextlib.suppress(FileNotFoundError):  # Another worker got there first
+                    os.remove(path)
+
+    def record(self, question: str, embedding: List[float], best_similarity: Optional[float],
+               domain: Optional[str], active_domains: Optional[List[str]] = None):
+        """
+        Append one miss.
+
+        Args:
+            question: User question that missed the cache
+            embedding: Query embedding used for the cache search
+            best_similarity: Similarity of the closest cached question (None if none matched the filter)
+            domain: Domain the question was answered from (top RAG chunk), if any
+            active_domains: Domains active for the user at the time
+        """
+        if embedding is None:
+            return
+
+        vector = np.asarray(embedding, dtype=np.float16)
+        now = time.time()
+        entry = {
+            'ts': now,
+            'question': question,
+            'best_similarity': None if best_similarity is None else round(float(best_similarity), 4),
+            'domain': domain,
+            'active_domains': active_domains or [],
+            'embedding': base64.b64encode(vector.tobytes()).decode("ascii")
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        today = time.strftime("%Y-%m-%d", time.gmtime(now))
+        path = os.path.join(self.log_dir, f"misses_{vector.shape[0]}d_{today}.jsonl")
+
+        try:
+            with self._lock:
+                os.makedirs(self.log_dir, exist_ok=True)
+                self._prune(today)
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+                self.stats['recorded'] += 1
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.debug_optimization(f"Q&A miss log write failed: {e}")
+
+    def dimensions(self) -> List[int]:
+        """Embedding sizes present in the log."""
+        return sorted({size for size, _, _ in self._files()})
+
+    def read(self, dimensions: int) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """
+        Load every miss for one embedding size.
+
+        Returns:
+            (records, float32 matrix) with row i of the matrix belonging to records[i]
+        """
+        records, rows = [], []
+        for _, _, path in self._files(dimensions):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    # A torn line (crash mid-write) has the next record appended to it
+                    line = line[line.rfind(self.RECORD_START):] if line.count(self.RECORD_START) > 1 else line
+                    try:
+                        record = json.loads(line)
+                        vector = np.frombuffer(base64.b64decode(record.pop('embedding')), dtype=np.float16)
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Torn or foreign line
+                    if vector.shape[0] == dimensions:
+                        records.append(record)
+                        rows.append(vector)
+
+        if not rows:
+            return [], np.zeros((0, dimensions), dtype=np.float32)
+        return records, np.stack(rows).astype(np.float32)
+
+    def clear(self, dimensions: Optional[int] = None):
+        """Delete the log (all sizes, or one) after it has been mined."""
+        with self._lock:
+            for _, _, path in self._files(dimensions):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"MissLog(dir={self.log_dir}, retention={self.retention_days}d, recorded={self.stats['recorded']})"
+
+
+def spherical_kmeans(matrix: np.ndarray, k: int, iterations: int = 50, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cluster unit-normalized rows by cosine similarity (k-means++ seeding).
+
+    Returns:
+        (labels per row, unit centroids)
+    """
+    rng = np.random.default_rng(seed)
+    vectors = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    k = max(1, min(k, len(vectors)))
+
+    # k-means++: spread initial centroids by cosine distance
+    centroids = [vectors[rng.integers(len(vectors))]]
+    for _ in range(1, k):
+        distances = np.clip(1 - np.max(vectors @ np.array(centroids).T, axis=1), 0, None)
+        total = distances.sum()
+        index = rng.choice(len(vectors), p=distances / total) if total > 0 else rng.integers(len(vectors))
+        centroids.append(vectors[index])
+    centroids = np.array(centroids)
+
+    labels = np.full(len(vectors), -1)
+    for _ in range(iterations):
+        similarities = vectors @ centroids.T
+        new_labels = np.argmax(similarities, axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+        for cluster in range(k):
+            members = vectors[labels == cluster]
+            if len(members):
+                centroid = members.sum(axis=0)
+            else:
+                # Re-seed an empty cluster with the worst-served row
+                centroid = vectors[np.argmin(similarities[np.arange(len(vectors)), labels])]
+            centroids[cluster] = centroid / max(np.linalg.norm(centroid), 1e-12)
+
+    return labels, centroids
+
+
+def propose_candidates(records: List[Dict[str, Any]], matrix: np.ndarray, k: Optional[int] = None,
+                       min_count: int = 3, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Cluster logged misses and propose one canonical question per frequent cluster.
+
+    Args:
+        records: Miss records from MissLog.read()
+        matrix: Their query embeddings
+        k: Number of clusters (defaults to sqrt(n / 2))
+        min_count: Smallest cluster worth curating
+
+    Returns:
+        Candidates ranked by cluster size, each with the canonical question (the
+        member closest to the centroid), its domain, variants and cohesion
+    """
+    if not records:
+        return []
+
+    k = k or max(1, int(np.sqrt(len(records) / 2)))
+    labels, centroids = spherical_kmeans(matrix, k, seed=seed)
+    vectors = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    candidates = []
+    for cluster in range(len(centroids)):
+        members = np.flatnonzero(labels == cluster)
+        if len(members) < min_count:
+            continue
+
+        similarities = vectors[members] @ centroids[cluster]
+        order = members[np.argsort(-similarities)]
+        domains = Counter(records[i].get('domain') for i in members if records[i].get('domain'))
+        best = [records[i]['best_similarity'] for i in members if records[i].get('best_similarity') is not None]
+
+        variants = []
+        for i in order:
+            if records[i]['question'] not in variants:
+                variants.append(records[i]['question'])
+
+        candidates.append({
+            'question': records[order[0]]['question'],
+            'domain': domains.most_common(1)[0][0] if domains else None,
+            'count': int(len(members)),
+            'cohesion': float(similarities.mean()),
+            'mean_best_similarity': float(np.mean(best)) if best else None,
+            'variants': variants[:5]
+        })
+
+    candidates.sort(key=lambda candidate: (-candidate['count'], -candidate['cohesion']))
+    return candidates
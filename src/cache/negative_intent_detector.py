@@ -4,9 +4,14 @@ Negative Intent Detection for Q&A Cache System
 Prevents inappropriate responses to negative queries
 """
 
+import re
 from typing import List, Set
 
 
+# Words are runs of word characters; punctuation (including apostrophes) separates them
+_WORD_PATTERN = re.compile(r'\w+')
+
+
 class NegativeIntentDetector:
     """Detects negative intent in user queries to prevent inappropriate responses"""
     
@@ -44,6 +49,15 @@ class NegativeIntentDetector:
             sensitivity: Threshold for contextual negative detection (0.0-1.0)
         """
         self.sensitivity = sensitivity
+        
+        # Compile the vocabulary once: one alternation for every phrase (longest first),
+        # one tokenizer, and frozen word sets for C-level intersections
+        phrases = sorted(self.NEGATIVE_PHRASES, key=len, reverse=True)
+        self._phrase_pattern = re.compile('|'.join(re.escape(phrase) for phrase in phrases))
+        self._phrase_finder = re.compile('(?=(' + self._phrase_pattern.pattern + '))')
+        self._critical = frozenset(self.CRITICAL_NEGATION_WORDS)
+        self._strong = frozenset(self.STRONG_NEGATIVE_WORDS)
+        self._contextual = frozenset(self.CONTEXTUAL_NEGATIVE_WORDS)
     
     def has_negative_intent(self, query: str) -> bool:
         """
@@ -60,61 +74,56 @@ class NegativeIntentDetector:
         
         query_lower = query.lower().strip()
         
-        # Step 1: Check for negative phrases first (most specific)
-        if self._contains_negative_phrases(query_lower):
-            return True
-        
-        # Step 2: Check for critical negation words (ALWAYS negative intent)
-        if self._contains_critical_negation(query_lower):
+        # Step 1: Check for negative phrases first (most specific) - one regex scan
+        if self._phrase_pattern.search(query_lower):
             return True
         
-        # Step 3: Check for strong negative words
-        if self._contains_strong_negative_words(query_lower):
-            return True
-        
-        # Step 4: Check for contextual negative words (with threshold)
-        if self._contains_contextual_negative_words(query_lower):
-            return True
+        # Steps 2-4: one tokenization pass shared by every word category
+        words_in_query = self._extract_clean_words(query_lower)
+        return (
+            self._contains_critical_negation(query_lower, words_in_query)
+            or self._contains_strong_negative_words(words_in_query)
+            or self._contains_contextual_negative_words(words_in_query)
+        )
+    
+    def has_negative_intent_many(self, queries: List[str]) -> List[bool]:
+        """
+        Check a batch of queries (replay and evaluation jobs)
         
-        return False
+        Args:
+            queries: User queries to analyze
+            
+        Returns:
+            One negative-intent flag per query, in order
+        """
+        has_negative_intent = self.has_negative_intent
+        return [has_negative_intent(query) for query in queries]
     
     def _extract_clean_words(self, query_lower: str) -> set:
         """Extract clean words from query, removing punctuation"""
-        import re
-        # Remove punctuation and split into words
-        clean_text = re.sub(r'[^\w\s]', ' ', query_lower)
-        return set(clean_text.split())
+        return set(_WORD_PATTERN.findall(query_lower))
     
     def _contains_negative_phrases(self, query_lower: str) -> bool:
         """Check for specific negative phrases"""
-        return any(phrase in query_lower for phrase in self.NEGATIVE_PHRASES)
+        return self._phrase_pattern.search(query_lower) is not None
     
-    def _contains_critical_negation(self, query_lower: str) -> bool:
+    def _contains_critical_negation(self, query_lower: str, words_in_query: set) -> bool:
         """Check for critical negation words that ALWAYS indicate negative intent"""
-        words_in_query = self._extract_clean_words(query_lower)
-        critical_matches = words_in_query.intersection(self.CRITICAL_NEGATION_WORDS)
+        critical_matches = self._critical.intersection(words_in_query)
         
         if not critical_matches:
             return False
         
-        # Special handling for "no" - only negative if it's not part of a compound word
-        if 'no' in critical_matches and len(critical_matches) == 1:
-            # Check if "no" is standalone or part of another word
-            words_list = query_lower.split()
-            for word in words_list:
-                if word == 'no':  # Standalone "no"
-                    return True
-                elif 'no' in word and len(word) > 2:  # Part of another word like "know"
-                    continue
-            return False
+        # Special handling for "no" - only negative as a standalone word (not "no?" or "know")
+        if len(critical_matches) == 1 and 'no' in critical_matches:
+            return 'no' in query_lower.split()
         
         # Any other critical negation word is always negative intent
         return True
     
-    def _contains_strong_negative_words(self, query_lower: str) -> bool:
+    def _contains_strong_negative_words(self, words_in_query: set) -> bool:
         """Check for strong negative words"""
-        words_in_query = self._extract_clean_words(query_lower)
-        strong_matches = words_in_query.intersection(self.STRONG_NEGATIVE_WORDS)
+        strong_matches = self._strong.intersection(words_in_query)
         
         if not strong_matches:
             return False
@@ -131,10 +140,9 @@ class NegativeIntentDetector:
         negative_ratio = len(strong_matches) / len(words_in_query)
         return negative_ratio >= (1.0 - self.sensitivity)
     
-    def _contains_contextual_negative_words(self, query_lower: str) -> bool:
+    def _contains_contextual_negative_words(self, words_in_query: set) -> bool:
         """Check for contextual negative words with higher threshold"""
-        words_in_query = self._extract_clean_words(query_lower)
-        contextual_matches = words_in_query.intersection(self.CONTEXTUAL_NEGATIVE_WORDS)
+        contextual_matches = self._contextual.intersection(words_in_query)
         
         if not contextual_matches:
             return False
@@ -167,26 +175,16 @@ class NegativeIntentDetector:
         query_lower = query.lower().strip()
         indicators = []
         
-        # Find negative phrases
-        for phrase in self.NEGATIVE_PHRASES:
-            if phrase in query_lower:
-                indicators.append(f"phrase: '{phrase}'")
+        # Find negative phrases (overlapping occurrences included, each reported once)
+        for phrase in dict.fromkeys(self._phrase_finder.findall(query_lower)):
+            indicators.append(f"phrase: '{phrase}'")
         
-        # Find critical negation words
+        # Find word indicators from one tokenization pass
         words_in_query = self._extract_clean_words(query_lower)
-        critical_words = words_in_query.intersection(self.CRITICAL_NEGATION_WORDS)
-        for word in critical_words:
-            indicators.append(f"critical: '{word}'")
-        
-        # Find strong negative words
-        strong_words = words_in_query.intersection(self.STRONG_NEGATIVE_WORDS)
-        for word in strong_words:
-            indicators.append(f"strong: '{word}'")
-        
-        # Find contextual negative words
-        contextual_words = words_in_query.intersection(self.CONTEXTUAL_NEGATIVE_WORDS)
-        for word in contextual_words:
-            indicators.append(f"contextual: '{word}'")
+        for category, vocabulary in (('critical', self._critical), ('strong', self._strong),
+                                     ('contextual', self._contextual)):
+            for word in vocabulary.intersection(words_in_query):
+                indicators.append(f"{category}: '{word}'")
         
         return indicators
     
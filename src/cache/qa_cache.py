@@ -3,29 +3,79 @@
 Q&A Cache for Esoteric Vectors
 
 Clean Q&A caching system with:
-- Semantic similarity search
+- O(1) exact-match tier on normalized question hashes
+- Semantic similarity search with per-domain calibrated thresholds
+- Answers in a separate payload store, fetched only for hits
+- Incrementally maintained, persisted statistics
+- Write-back of generated answers with LFU/age eviction (curated pairs pinned)
 - Domain-aware filtering
 - Resilience integration
 - Clean logging
 """
 
+import hashlib
+import json
 import os
+import re
+import threading
 import time
+import asyncio
 import chromadb
-from typing import Dict, Any, List, Optional
-from langchain_openai import OpenAIEmbeddings
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from langchain_chroma import Chroma
+from langchain_core.documents import Document
 
+from core.embedding_service import collection_name_for, get_embedding_service
+from core.domain_manager import DomainManager
+from core.domain_partitions import DomainPartitionedIndex
+from core.vector_index import InMemoryVectorIndex, NumpyVectorIndex, QuantizedVectorIndex, collection_fingerprint
 from core.resilience_manager import resilience_manager
+from cache.answer_store import AnswerStore
+from cache.qa_stats import QACacheStats
 from utils.logger import logger
 
 
+# Common contractions expanded before hashing ("what's" and "what is" match)
+CONTRACTIONS = {
+    "what's": "what is", "where's": "where is", "who's": "who is", "how's": "how is",
+    "that's": "that is", "there's": "there is", "it's": "it is", "let's": "let us",
+    "i'm": "i am", "you're": "you are", "we're": "we are", "they're": "they are",
+    "i've": "i have", "you've": "you have", "we've": "we have", "they've": "they have",
+    "i'll": "i will", "you'll": "you will", "i'd": "i would", "you'd": "you would",
+    "can't": "cannot", "won't": "will not", "don't": "do not", "doesn't": "does not",
+    "didn't": "did not", "isn't": "is not", "aren't": "are not", "wasn't": "was not",
+    "shouldn't": "should not", "wouldn't": "would not", "couldn't": "could not",
+}
+_CONTRACTION_PATTERN = re.compile(r"\b(" + "|".join(re.escape(c) for c in CONTRACTIONS) + r")\b")
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+
+
+# Source tag for answers written back from LLM responses (never pinned)
+GENERATED_SOURCE = "generated"
+
+
+def normalize_question(text: str) -> str:
+    """Normalize a question for exact matching (case, whitespace, punctuation, contractions)."""
+    text = text.casefold().replace("\u2019", "'")
+    text = _CONTRACTION_PATTERN.sub(lambda match: CONTRACTIONS[match.group(1)], text)
+    return " ".join(_PUNCTUATION_PATTERN.sub(" ", text).split())
+
+
+def question_hash(text: str) -> str:
+    """Stable hash of a normalized question."""
+    return hashlib.sha1(normalize_question(text).encode("utf-8")).hexdigest()
+
+
 class QACache:
     """
     Clean Q&A cache system for fast response retrieval.
     
     Features:
+    - Exact-match tier for known questions (no embedding call)
     - Semantic similarity search for Q&A pairs
+    - Bounded pool of generated answers; curated pairs are never evicted
     - Domain-aware filtering
     - Circuit breaker protection
     - Performance tracking
@@ -35,28 +85,92 @@ class QACache:
     def __init__(self, 
                  chroma_path: str = "data/chroma_db/qa_cache",
                  collection_name: str = "qa_cache_collection",
-                 similarity_threshold: float = 0.75):
-        """Initialize Q&A cache."""
+                 similarity_threshold: float = 0.75,
+                 max_workers: int = 8,
+                 domain_partitions: Optional[bool] = None,
+                 index_backend: Optional[str] = None,
+                 index_path: str = "data/vector_index",
+                 max_generated_entries: int = 500,
+                 generated_max_age_days: float = 30.0,
+                 answer_store_path: Optional[str] = None,
+                 stats_path: Optional[str] = None,
+                 index_refresh_interval: float = 30.0):
+        """
+        Initialize Q&A cache.
+        
+        Args:
+            collection_name: Base collection name; reduced embedding dimensions
+                (ESOTERIC_EMBEDDING_DIMENSIONS) select the "<name>_<dims>d" collection
+            similarity_threshold: Default threshold; calibrated per-domain thresholds
+                stored in the collection metadata take precedence
+            index_backend: "memory" (default) keeps all question vectors in one
+                in-memory matrix with ChromaDB as the durable store; "numpy", "int8"
+                or "binary" use a snapshot index; "chroma" queries ChromaDB directly.
+                Defaults to the ESOTERIC_QA_BACKEND environment variable.
+            index_path: Directory for the in-process index snapshots
+            max_generated_entries: Cap on written-back (generated) pairs
+            generated_max_age_days: Generated pairs unused for this long are evicted
+            answer_store_path: SQLite answer store (defaults to answers.sqlite in chroma_path)
+            stats_path: SQLite statistics file (defaults to qa_stats.sqlite in chroma_path)
+            index_refresh_interval: Seconds between collection staleness checks; pairs
+                added, updated or removed by other processes reach the lookup tiers
+                within this interval
+        """
         self.chroma_path = chroma_path
-        self.collection_name = collection_name
+        self.collection_name = collection_name_for(collection_name)
         self.similarity_threshold = similarity_threshold
+        self.domain_thresholds: Dict[str, float] = {}
+        if domain_partitions is None:
+            domain_partitions = os.getenv('ESOTERIC_DOMAIN_PARTITIONS', 'false').lower() in ('true', '1', 'yes')
+        self.use_domain_partitions = domain_partitions
+        self.index_backend = (index_backend or os.getenv('ESOTERIC_QA_BACKEND', 'memory')).lower()
+        self.index_path = os.path.join(index_path, self.collection_name)
+        self.max_generated_entries = max_generated_entries
+        self.generated_max_age = generated_max_age_days * 86400
+        self.answer_store_path = answer_store_path or os.path.join(chroma_path, "answers.sqlite")
+        self.index_refresh_interval = index_refresh_interval
         
-        # Performance tracking
-        self.stats = {
-            'total_queries': 0,
-            'cache_hits': 0,
-            'total_response_time': 0.0
-        }
+        # Bounded executor for ChromaDB work in async lookups
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="qa_cache_")
+        
+        # Performance tracking (thread-safe counters and per-domain pair counts, persisted)
+        self.stats = QACacheStats(stats_path or os.path.join(chroma_path, "qa_stats.sqlite"), self.collection_name)
+        self.pair_domains: Dict[str, str] = {}
+        
+        # Usage of generated pairs (qa_id -> hit_count / last_hit), flushed to metadata
+        self.generated_usage: Dict[str, Dict[str, float]] = {}
+        self._dirty_usage: set = set()
+        # Guards write-back and the usage tables (re-entrant: write-back evicts, eviction flushes)
+        self._write_lock = threading.RLock()
+        
+        # Exact-match tier: question hash -> Q&A entries (one per domain)
+        self.exact_index: Dict[str, List[Dict[str, Any]]] = {}
+        
+        # Collection fingerprint the lookup tiers were last built from
+        self.fingerprint: Optional[str] = None
+        self._index_lock = threading.Lock()
+        self._index_checked_at = 0.0
         
         # Initialize components
         self.embeddings = None
         self.chroma_client = None
         self.vectorstore = None
+        self.domain_partitions = None
+        self.vector_index = None
+        self.answer_store = None
         
         # Setup system
         self._setup_embeddings()
         self._setup_chroma_client()
         self._setup_vectorstore()
+        self._load_domain_thresholds()
+        self._setup_answer_store()
+        fingerprint = self._collection_fingerprint()
+        self._setup_domain_partitions()
+        self._setup_vector_index()
+        self._build_exact_index()
+        self.fingerprint = fingerprint
+        self._index_checked_at = time.time()
         
         # Log initialization
         if self.vectorstore:
@@ -66,19 +180,14 @@ class QACache:
             logger.warning("Q&A Cache: Failed to initialize")
     
     def _setup_embeddings(self):
-        """Initialize OpenAI embeddings with resilience."""
+        """Initialize shared cached embeddings with resilience."""
         try:
-            self.embeddings = OpenAIEmbeddings(
-                model="text-embedding-3-small",
-                show_progress_bar=False,
-                max_retries=3,
-                timeout=30.0
-            )
+            self.embeddings = get_embedding_service()
             
-            # Register with resilience manager
-            resilience_manager.register_openai_health_check(self.embeddings)
+            # Register with resilience manager (health check bypasses the cache)
+            resilience_manager.register_openai_health_check(self.embeddings.client)
             
-            logger.debug_openai("Q&A Cache: OpenAI embeddings initialized")
+            logger.debug_openai("Q&A Cache: Shared embedding service attached")
             
         except Exception as e:
             logger.error(f"Q&A Cache: Failed to initialize embeddings: {e}")
@@ -111,7 +220,15 @@ class QACache:
             if self.collection_name not in existing_collections:
                 # Create new collection
                 self._create_qa_collection()
-            
+            else:
+                collection = self.chroma_client.get_collection(name=self.collection_name)
+                stored_dimensions = (collection.metadata or {}).get("embedding_dimensions")
+                if stored_dimensions and int(stored_dimensions) != self.embeddings.dimensions:
+                    logger.warning(
+                        f"Q&A Cache: Collection holds {stored_dimensions}-dim vectors but embeddings are "
+                        f"{self.embeddings.dimensions}-dim - run the document manager 'migrate' command"
+                    )
+
             # Wrap with LangChain
             self.vectorstore = Chroma(
                 client=self.chroma_client,
@@ -125,6 +242,365 @@ class QACache:
             logger.error(f"Q&A Cache: Failed to setup vectorstore: {e}")
             self.vectorstore = None
     
+    def _load_domain_thresholds(self):
+        """Read calibrated per-domain thresholds from the collection metadata (tools/calibrate_thresholds.py)."""
+        if not self.vectorstore:
+            return
+        
+        try:
+            stored = (self.vectorstore._collection.metadata or {}).get("domain_thresholds")
+            self.domain_thresholds = {domain: float(value) for domain, value in json.loads(stored).items()} if stored else {}
+            if self.domain_thresholds:
+                logger.debug_optimization(f"Q&A Cache: Per-domain thresholds: {self.domain_thresholds}")
+        except Exception as e:
+            logger.warning(f"Q&A Cache: Ignoring invalid per-domain thresholds: {e}")
+            self.domain_thresholds = {}
+    
+    def threshold_for(self, domain: Optional[str]) -> float:
+        """Similarity threshold for a domain (calibrated if available, else the default)."""
+        return self.domain_thresholds.get(domain, self.similarity_threshold)
+    
+    def set_domain_thresholds(self, thresholds: Dict[str, float]) -> bool:
+        """Store calibrated per-domain thresholds in the collection metadata and apply them."""
+        if not self.update_collection_metadata({"domain_thresholds": json.dumps(thresholds, sort_keys=True)}):
+            return False
+        self.domain_thresholds = dict(thresholds)
+        return True
+    
+    def _setup_answer_store(self):
+        """Open the answer payload store and move any answers still held in metadata into it."""
+        try:
+            self.answer_store = AnswerStore(self.answer_store_path)
+        except Exception as e:
+            logger.warning(f"Q&A Cache: Answer store unavailable, keeping answers in metadata: {e}")
+            self.answer_store = None
+            return
+        
+        if not self.vectorstore:
+            return
+        
+        try:
+            collection = self.vectorstore._collection
+            results = collection.get(include=["metadatas"])
+            legacy = {
+                qa_id: metadata['answer']
+                for qa_id, metadata in zip(results.get("ids") or [], results.get("metadatas") or [])
+                if metadata and metadata.get('answer') is not None
+            }
+            if legacy:
+                self.answer_store.put_many(legacy)
+                collection.update(ids=list(legacy), metadatas=[{'answer': None}] * len(legacy))
+                logger.debug_optimization(f"Q&A Cache: Moved {len(legacy)} answers from metadata to the answer store")
+        except Exception as e:
+            logger.warning(f"Q&A Cache: Could not move answers to the answer store: {e}")
+    
+    def _store_answers(self, answers: Dict[str, str], metadatas: List[Dict[str, Any]]):
+        """Write answers to the payload store (or inline into metadata when it is unavailable)."""
+        if self.answer_store is not None:
+            self.answer_store.put_many(answers)
+            return
+        for metadata in metadatas:
+            metadata['answer'] = answers[metadata['qa_id']]
+    
+    def _fetch_answer(self, qa_id: str, metadata: Dict[str, Any]) -> Optional[str]:
+        """
+        Look up a hit's answer (metadata holds it only when the store is unavailable).
+        
+        Returns None when no non-empty answer is stored (e.g. the pair was
+        deleted after the lookup tiers were built); callers treat that as a miss.
+        """
+        answer = self.answer_store.get(qa_id) if self.answer_store is not None else None
+        if answer is None:
+            answer = metadata.get('answer')
+        if not answer or not answer.strip():
+            logger.warning(f"Q&A Cache: No answer stored for {qa_id} - treating the match as a miss")
+            return None
+        return answer
+    
+    def _setup_domain_partitions(self):
+        """Initialize per-domain Q&A partitions synced from the shared collection."""
+        if not self.use_domain_partitions or not self.vectorstore:
+            return
+        
+        try:
+            collection = self.vectorstore._collection
+            space = (collection.configuration or {}).get("hnsw", {}).get("space", "l2")
+            self.domain_partitions = DomainPartitionedIndex(
+                self.chroma_client, self.collection_name, DomainManager.AVAILABLE_DOMAINS, space=space
+            )
+            self.domain_partitions.build_from_collection(collection)
+            logger.debug_optimization(f"Q&A Cache: Domain partitions ready: {self.domain_partitions.domains}")
+        except Exception as e:
+            logger.warning(f"Q&A Cache: Domain partitions unavailable, using domain filter: {e}")
+            self.domain_partitions = None
+    
+    def _setup_vector_index(self):
+        """Initialize the in-process index (in-memory, exact or quantized) over the Q&A collection."""
+        if self.index_backend not in ("memory", "numpy", "int8", "binary") or not self.vectorstore:
+            return
+        
+        try:
+            # Keep the collection's distance space so similarity thresholds are unchanged
+            space = (self.vectorstore._collection.configuration or {}).get("hnsw", {}).get("space", "l2")
+            if self.index_backend == "memory":
+                self.vector_index = InMemoryVectorIndex(space=space)
+            elif self.index_backend == "numpy":
+                self.vector_index = NumpyVectorIndex(self.index_path, space=space)
+            else:
+                self.vector_index = QuantizedVectorIndex(
+                    os.path.join(self.index_path, self.index_backend), space=space, mode=self.index_backend
+                )
+            self.vector_index.load()
+            self._refresh_vector_index()
+            logger.debug_optimization(f"Q&A Cache: {self.vector_index} ready")
+        except Exception as e:
+            logger.warning(f"Q&A Cache: In-process index unavailable, using ChromaDB: {e}")
+            self.vector_index = None
+    
+    def _refresh_vector_index(self):
+        """Rebuild the in-process index if the Q&A collection has changed."""
+        if self.vector_index is None:
+            return
+        
+        fingerprint = self._collection_fingerprint()
+        if fingerprint != self.vector_index.fingerprint:
+            self.vector_index.build_from_collection(self.vectorstore._collection, fingerprint)
+    
+    def _fresh_collection(self):
+        """Re-fetch the collection so metadata written by other processes is visible."""
+        if self.chroma_client:
+            return self.chroma_client.get_collection(name=self.collection_name)
+        return self.vectorstore._collection
+    
+    def _collection_fingerprint(self) -> Optional[str]:
+        """Fingerprint of the Q&A collection's ids and corpus version (None without a vectorstore)."""
+        if not self.vectorstore:
+            return None
+        try:
+            version = int((self._fresh_collection().metadata or {}).get("corpus_version", 0))
+        except Exception as e:
+            logger.debug_optimization(f"Q&A Cache: Corpus version check failed, fingerprinting ids only: {e}")
+            version = None
+        return collection_fingerprint(self.vectorstore._collection, version)
+    
+    def _bump_corpus_version(self):
+        """Record a write in the collection metadata, so in-place updates reach other processes too."""
+        try:
+            collection = self._fresh_collection()
+            metadata = dict(collection.metadata or {})
+            metadata["corpus_version"] = int(metadata.get("corpus_version", 0)) + 1
+            collection.modify(metadata=metadata)
+        except Exception as e:
+            logger.debug_optimization(f"Q&A Cache: Corpus version bump failed: {e}")
+    
+    def _refresh_indexes(self, force: bool = False):
+        """
+        Rebuild every lookup tier if the collection changed since the last build.
+        
+        Catches pairs written by other processes (tools/load_qa.py, eviction in
+        another worker); checked at most every index_refresh_interval seconds.
+        """
+        if not self.vectorstore:
+            return
+        
+        # One refresh at a time, so concurrent lookups never rebuild the same tiers
+        with self._index_lock:
+            now = time.time()
+            if not force and now - self._index_checked_at < self.index_refresh_interval:
+                return
+            self._index_checked_at = now
+            
+            try:
+                fingerprint = self._collection_fingerprint()
+                if fingerprint == self.fingerprint:
+                    return
+                
+                logger.debug_optimization("Q&A Cache: Collection changed - rebuilding lookup tiers")
+                self.flush_usage()  # Usage is reloaded from metadata below
+                collection = self.vectorstore._collection
+                if self.domain_partitions is not None:
+                    self.domain_partitions.build_from_collection(collection, fingerprint)
+                if self.vector_index is not None:
+                    self.vector_index.build_from_collection(collection, fingerprint)
+                self._build_exact_index()
+                self.fingerprint = fingerprint
+            except Exception as e:
+                logger.warning(f"Q&A Cache: Lookup tier refresh failed: {e}")
+    
+    def _build_exact_index(self):
+        """Load every known question into the exact-match tier (and generated-pair usage)."""
+        if not self.vectorstore:
+            self.exact_index = {}
+            with self._write_lock:
+                self.generated_usage = {}
+            return
+        
+        try:
+            results = self.vectorstore._collection.get(include=["documents", "metadatas"])
+            exact_index: Dict[str, List[Dict[str, Any]]] = {}
+            with self._write_lock:
+                # The scan doubles as a recount, so persisted domain counts never drift
+                self.generated_usage = {}
+                self.pair_domains = {}
+                self.stats.reset_domains()
+                for question, metadata in zip(results.get("documents") or [], results.get("metadatas") or []):
+                    self._index_exact(question, metadata or {}, exact_index)
+                    self._track_generated(metadata or {})
+                # Published whole: lookups see the previous tier or the new one, never a partial one
+                self.exact_index = exact_index
+            self.stats.flush()
+            logger.debug_optimization(f"Q&A Cache: Exact-match tier ready: {len(self.exact_index)} questions")
+        except Exception as e:
+            logger.warning(f"Q&A Cache: Exact-match tier unavailable: {e}")
+            self.exact_index = {}
+    
+    def _index_exact(self, question: str, metadata: Dict[str, Any],
+                     exact_index: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        """Add (or replace) one Q&A pair in the exact-match tier (or in a tier being built)."""
+        entry = {
+            'question': question,
+            'domain': metadata.get('domain', 'unknown'),
+            'source': metadata.get('source', 'unknown'),
+            'qa_id': metadata.get('qa_id', 'unknown')
+        }
+        if 'answer' in metadata:
+            entry['answer'] = metadata['answer']
+        if exact_index is None:
+            exact_index = self.exact_index
+        entries = exact_index.setdefault(question_hash(question), [])
+        entries[:] = [existing for existing in entries if existing['qa_id'] != entry['qa_id']]
+        entries.append(entry)
+        self._track_domain(entry['qa_id'], entry['domain'])
+    
+    def _track_domain(self, qa_id: str, domain: str):
+        """Keep per-domain pair counts current (upserts of a known pair do not double count)."""
+        previous = self.pair_domains.get(qa_id)
+        if previous == domain:
+            return
+        if previous is not None:
+            self.stats.adjust_domain(previous, -1)
+        self.pair_domains[qa_id] = domain
+        self.stats.adjust_domain(domain, 1)
+    
+    def _track_generated(self, metadata: Dict[str, Any]):
+        """Start tracking usage of a generated (evictable) pair."""
+        if metadata.get('source') != GENERATED_SOURCE or metadata.get('pinned'):
+            return
+        
+        with self._write_lock:
+            self.generated_usage[metadata.get('qa_id')] = {
+                'hit_count': int(metadata.get('hit_count', 0)),
+                'last_hit': float(metadata.get('last_hit') or metadata.get('created_ts') or time.time())
+            }
+    
+    def _record_entry_hit(self, qa_id: str):
+        """Count a hit on a generated pair (persisted on the next flush)."""
+        with self._write_lock:
+            usage = self.generated_usage.get(qa_id)
+            if usage is not None:
+                usage['hit_count'] += 1
+                usage['last_hit'] = time.time()
+                self._dirty_usage.add(qa_id)
+    
+    def flush_usage(self):
+        """Persist cache statistics and the hit counters and last-hit timestamps of generated pairs."""
+        self.stats.flush()
+        # Snapshot and clear under the lock; hits landing after the snapshot are flushed next time
+        with self._write_lock:
+            dirty = {
+                qa_id: {
+                    'hit_count': self.generated_usage[qa_id]['hit_count'],
+                    'last_hit': self.generated_usage[qa_id]['last_hit']
+                }
+                for qa_id in self._dirty_usage if qa_id in self.generated_usage
+            }
+            self._dirty_usage.clear()
+        if not dirty or not self.vectorstore:
+            return
+        
+        self.vectorstore._collection.update(ids=list(dirty), metadatas=list(dirty.values()))
+    
+    def _exact_hit(self, query: str, active_domains: Optional[List[str]], start_time: float,
+                   record: bool = True) -> Optional[Dict[str, Any]]:
+        """Hit for the first known question matching the normalized query that still has an answer."""
+        for entry in self.exact_index.get(question_hash(query), ()):
+            if not active_domains or entry['domain'] in active_domains:
+                hit = self._build_exact_hit(entry, start_time, record)
+                if hit is not None:
+                    return hit
+        return None
+    
+    def _build_exact_hit(self, entry: Dict[str, Any], start_time: float,
+                         record: bool = True) -> Optional[Dict[str, Any]]:
+        """Shape an exact-match hit like a semantic hit (and record it unless deferred); None without an answer."""
+        answer = self._fetch_answer(entry['qa_id'], entry)
+        if answer is None:
+            return None
+        
+        hit = {
+            **entry,
+            'answer': answer,
+            'similarity': 1.0,
+            'match': 'exact',
+            'response_time': time.time() - start_time
+        }
+        if record:
+            self.record_lookup(hit)
+        
+        logger.debug_optimization("Q&A Cache: Exact-match hit")
+        return hit
+    
+    def record_lookup(self, hit: Optional[Dict[str, Any]]):
+        """
+        Count one lookup in the stats and, for hits, in the pair's usage (LFU eviction).
+        
+        Called by search_qa() / lookup_exact() themselves, or later by the
+        caller for lookups made with record=False (speculative lookups whose
+        result may be discarded). Deferred exact-tier misses count with the
+        semantic search that follows them, as in search_qa().
+        """
+        self.stats.increment('total_queries')
+        if hit is None:
+            return
+        
+        self.stats.increment('cache_hits')
+        if hit.get('match') == 'exact':
+            self.stats.increment('exact_hits')
+        self.stats.increment('total_response_time', hit.get('response_time', 0.0))
+        self._record_entry_hit(hit.get('qa_id'))
+    
+    def lookup_exact(self, query: str, active_domains: List[str] = None,
+                     record: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Answer a known question from the exact-match tier only.
+        
+        Args:
+            record: Count the hit now; False leaves it to record_lookup()
+        
+        Returns:
+            search_qa()-shaped hit with similarity 1.0, or None (nothing recorded on a miss)
+        """
+        self._refresh_indexes()
+        return self._exact_hit(query, active_domains, time.time(), record)
+    
+    def _index_added_pairs(self, ids: List[str], refresh: bool = True):
+        """
+        Route freshly added pairs to partitions and in-process indexes (reusing stored embeddings).
+        
+        The in-memory matrix is updated in place; snapshot indexes are rebuilt
+        when refresh is set (batch loads refresh once at the end).
+        """
+        in_memory = isinstance(self.vector_index, InMemoryVectorIndex)
+        if ids and (self.domain_partitions is not None or in_memory):
+            rows = self.vectorstore._collection.get(ids=ids, include=["embeddings", "documents", "metadatas"])
+            if self.domain_partitions is not None:
+                self.domain_partitions.add(rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"])
+            if in_memory:
+                self.vector_index.add(rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"])
+        
+        if refresh and not in_memory:
+            self._refresh_vector_index()
+    
     def _create_qa_collection(self):
         """Create new Q&A collection with metadata."""
         from datetime import datetime
@@ -132,7 +608,8 @@ class QACache:
         collection_metadata = {
             "version": "1.3.0",
             "created": datetime.now().isoformat(),
-            "embedding_model": "text-embedding-3-small",
+            "embedding_model": self.embeddings.model,
+            "embedding_dimensions": self.embeddings.dimensions,
             "description": "Q&A cache for esoteric knowledge with question-to-question semantic matching",
             "type": "qa_cache",
             "strategy": "question_embedding_question_matching",
@@ -160,7 +637,10 @@ class QACache:
         except Exception:
             return 0
     
-    def search_qa(self, query: str, active_domains: List[str] = None, k: int = 3) -> Optional[Dict[str, Any]]:
+    def search_qa(self, query: str, active_domains: List[str] = None, k: int = 3,
+                  query_embedding: Optional[List[float]] = None,
+                  on_miss: Optional[Callable[[Optional[float]], None]] = None,
+                  record: bool = True) -> Optional[Dict[str, Any]]:
         """
         Search for similar Q&A pairs with domain filtering.
         
@@ -168,12 +648,21 @@ class QACache:
             query: User's question
             active_domains: List of active domains for filtering
             k: Number of results to retrieve
+            query_embedding: Precomputed query vector (skips the embedding call)
+            on_miss: Called with the best similarity (None if nothing matched the filter) on a semantic miss
+            record: Count the lookup in stats and pair usage now; False leaves it to record_lookup()
             
         Returns:
             Best matching Q&A pair if similarity above threshold, None otherwise
         """
+        # Tier 1: exact match on the normalized question (no embedding, no vector search)
+        exact_hit = self.lookup_exact(query, active_domains, record)
+        if exact_hit is not None:
+            return exact_hit
+        
         start_time = time.time()
-        self.stats['total_queries'] += 1
+        if record:
+            self.stats.increment('total_queries')
         
         try:
             if not self.vectorstore:
@@ -187,52 +676,188 @@ class QACache:
                 logger.debug_optimization(f"Q&A Cache: Applying domain filter: {domain_filter}")
             
             # Search for similar questions (now questions are embedded, not answers)
-            if domain_filter:
-                docs = self.vectorstore.similarity_search_with_score(query, k=k, filter=domain_filter)
-            else:
-                docs = self.vectorstore.similarity_search_with_score(query, k=k)
+            if query_embedding is None:
+                query_embedding = resilience_manager.execute_with_openai_resilience(
+                    self.embeddings.embed_query, query
+                )
             
-            if not docs:
+            best = self._best_matches([query_embedding], k, domain_filter)[0]
+            if best is None:
                 logger.debug("Q&A Cache: No similar questions found")
+                if on_miss is not None:
+                    on_miss(None)
                 return None
             
-            # Get best match
-            best_doc, similarity_score = docs[0]
+            qa_id, distance, best_doc = best
+            hit = self._build_hit(qa_id, distance, start_time, best_doc, record)
+            if hit is None and on_miss is not None:
+                on_miss(1 - distance)
+            return hit
             
-            # Convert distance to similarity (ChromaDB returns distance, we want similarity)
-            similarity = 1 - similarity_score
+        except Exception as e:
+            logger.error(f"Q&A Cache search error: {e}")
+            return None
+    
+    def _best_matches(self, query_embeddings: List[List[float]], k: int,
+                      domain_filter: Optional[Dict[str, Any]]) -> List[Optional[Tuple[str, float, Optional[Document]]]]:
+        """
+        Find the closest stored question per query vector.
+        
+        Returns:
+            One (qa_id, distance, Document or None) tuple per query, or None when nothing matched.
+            ChromaDB is asked for ids and distances only, so no payload is loaded for misses.
+        """
+        if self.vector_index is not None:
+            scored_rows = [self.vector_index.search(embedding, k, where=domain_filter)
+                           for embedding in query_embeddings]
+        elif self.domain_partitions is not None and domain_filter:
+            scored_rows = self.domain_partitions.query(query_embeddings, k, where=domain_filter)
+        else:
+            results = self.vectorstore._collection.query(
+                query_embeddings=query_embeddings,
+                n_results=k,
+                where=domain_filter,
+                include=["distances"]
+            )
+            return [
+                (ids[0], float(distances[0]), None) if ids else None
+                for ids, distances in zip(results['ids'], results['distances'])
+            ]
+        
+        return [(docs[0][0].id, docs[0][1], docs[0][0]) if docs else None for docs in scored_rows]
+    
+    def _build_hit(self, qa_id: str, distance: float, start_time: float,
+                   best_doc: Optional[Document] = None, record: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Turn the best match into a cache hit if it clears the similarity threshold
+        and still has a stored answer.
+        
+        The question row (when not already in hand) and the answer are only
+        loaded for hits, so misses never touch the payload.
+        """
+        # Convert distance to similarity (ChromaDB returns distance, we want similarity)
+        similarity = 1 - distance
+        
+        # Check if similarity meets the matched pair's domain threshold (domain known without a fetch)
+        domain = best_doc.metadata.get('domain') if best_doc is not None else self.pair_domains.get(qa_id)
+        threshold = self.threshold_for(domain)
+        if similarity < threshold:
+            logger.debug(f"Q&A Cache: Best similarity {similarity:.3f} below threshold {threshold} ({domain})")
+            return None
+        
+        if best_doc is None:
+            row = self.vectorstore._collection.get(ids=[qa_id], include=["documents", "metadatas"])
+            best_doc = Document(id=qa_id, page_content=row['documents'][0], metadata=row['metadatas'][0] or {})
+        
+        # Extract Q&A data from metadata
+        metadata = best_doc.metadata
+        answer = self._fetch_answer(qa_id, metadata)
+        if answer is None:
+            return None
+        response_time = time.time() - start_time
+        result = {
+            'question': best_doc.page_content,
+            'answer': answer,
+            'domain': metadata.get('domain', 'unknown'),
+            'source': metadata.get('source', 'unknown'),
+            'similarity': similarity,
+            'qa_id': metadata.get('qa_id', 'unknown'),
+            'match': 'semantic',
+            'response_time': response_time
+        }
+        
+        # Record cache hit (hit counts only; the query was counted by the caller)
+        if record:
+            self.stats.increment('cache_hits')
+            self.stats.increment('total_response_time', response_time)
+            self._record_entry_hit(metadata.get('qa_id'))
+        
+        logger.debug_optimization(f"Q&A Cache: Hit with similarity {similarity:.3f}")
+        return result
+    
+    def search_many(self, queries: List[str], active_domains: List[str] = None,
+                    k: int = 3) -> List[Optional[Dict[str, Any]]]:
+        """
+        Search the Q&A cache for many queries at once.
+        
+        Exact matches are answered first; the remaining queries are embedded
+        in one batched request and searched with a single multi-vector
+        collection query.
+        
+        Returns:
+            One search_qa()-shaped result (or None) per query
+        """
+        start_time = time.time()
+        if not queries:
+            return []
+        
+        self._refresh_indexes()
+        hits: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        pending = []
+        for i, query in enumerate(queries):
+            hits[i] = self._exact_hit(query, active_domains, start_time)  # Counts its own query
+            if hits[i] is None:
+                pending.append(i)
+        if not pending:
+            return hits
+        
+        self.stats.increment('total_queries', len(pending))
+        
+        try:
+            if not self.vectorstore:
+                logger.debug("Q&A Cache: Vectorstore not available")
+                return hits
             
-            # Check if similarity meets threshold
-            if similarity < self.similarity_threshold:
-                logger.debug(f"Q&A Cache: Best similarity {similarity:.3f} below threshold {self.similarity_threshold}")
-                return None
+            domain_filter = {"domain": {"$in": active_domains}} if active_domains else None
+            pending_queries = [queries[i] for i in pending]
             
-            # Record cache hit
-            self.stats['cache_hits'] += 1
-            response_time = time.time() - start_time
-            self.stats['total_response_time'] += response_time
-            
-            # Extract Q&A data from metadata
-            metadata = best_doc.metadata
-            result = {
-                'question': best_doc.page_content,
-                'answer': metadata.get('answer', ''),
-                'domain': metadata.get('domain', 'unknown'),
-                'source': metadata.get('source', 'unknown'),
-                'similarity': similarity,
-                'qa_id': metadata.get('qa_id', 'unknown'),
-                'response_time': response_time
-            }
+            embed = getattr(self.embeddings, 'embed_queries', self.embeddings.embed_documents)
+            query_embeddings = resilience_manager.execute_with_openai_resilience(embed, pending_queries)
+            if query_embeddings and not isinstance(query_embeddings[0], (list, tuple)):
+                query_embeddings = [query_embeddings] * len(pending_queries)
+            
+            for i, best in zip(pending, self._best_matches(query_embeddings, k, domain_filter)):
+                if best is not None:
+                    qa_id, distance, best_doc = best
+                    hits[i] = self._build_hit(qa_id, distance, start_time, best_doc)
             
-            logger.debug_optimization(f"Q&A Cache: Hit with similarity {similarity:.3f}")
-            return result
+            logger.debug_optimization(
+                f"Q&A Cache: Batched search for {len(queries)} queries ({len(pending)} semantic)"
+            )
+            return hits
             
         except Exception as e:
-            logger.error(f"Q&A Cache search error: {e}")
-            return None
+            logger.error(f"Q&A Cache batch search error: {e}")
+            return hits
+    
+    async def asearch_qa(self, query: str, active_domains: List[str] = None, k: int = 3,
+                         query_embedding: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Async counterpart of search_qa().
+        
+        The embedding call is awaited natively; the exact-match tier (index
+        refresh, answer fetch) and the ChromaDB lookup run on the bounded
+        executor, so the event loop is never blocked. Exact matches are
+        answered without embedding.
+        """
+        loop = asyncio.get_running_loop()
+        exact_hit = await loop.run_in_executor(self.executor, self.lookup_exact, query, active_domains)
+        if exact_hit is not None:
+            return exact_hit
+        
+        if query_embedding is None and self.embeddings:
+            try:
+                query_embedding = await self.embeddings.aembed_query(query)
+            except Exception as e:
+                # Leave the vector unset so the sync path embeds with resilience
+                logger.debug_resilience(f"Q&A Cache: Async embedding failed: {e}")
+        
+        return await loop.run_in_executor(
+            self.executor, partial(self.search_qa, query, active_domains, k, query_embedding)
+        )
     
     def add_qa_pair(self, question: str, answer: str, domain: str, source: str = "manual", qa_id: str = None) -> bool:
-        """Add a new Q&A pair to the cache."""
+        """Add a new Q&A pair to the cache (curated sources are pinned; generated ones are evictable)."""
         try:
             if not self.vectorstore:
                 logger.error("Q&A Cache: Cannot add pair - vectorstore not available")
@@ -246,20 +871,29 @@ class QACache:
                 qa_id = str(uuid.uuid4())
             
             # Create document with QUESTION as content and ANSWER in metadata
+            now = time.time()
             metadata = {
-                'answer': answer,
                 'domain': domain,
                 'source': source,
                 'qa_id': qa_id,
-                'created': datetime.now().isoformat()
+                'created': datetime.now().isoformat(),
+                'created_ts': now,
+                'pinned': source != GENERATED_SOURCE,
+                'hit_count': 0,
+                'last_hit': now
             }
             
-            # Add to vectorstore (question is the content, answer is in metadata)
+            # Answer goes to the payload store first so a visible question always has its answer
+            self._store_answers({qa_id: answer}, [metadata])
             self.vectorstore.add_texts(
                 texts=[question],
                 metadatas=[metadata],
                 ids=[qa_id]
             )
+            self._bump_corpus_version()
+            self._index_added_pairs([qa_id])
+            self._index_exact(question, metadata)
+            self._track_generated(metadata)
             
             logger.debug(f"Q&A Cache: Added pair for domain '{domain}'")
             return True
@@ -273,7 +907,8 @@ class QACache:
         Add multiple Q&A pairs in batches for optimal performance.
         
         Args:
-            qa_pairs: List of dicts with keys: question, answer, domain, source, qa_id (optional)
+            qa_pairs: List of dicts with keys: question, answer, domain, source, qa_id (optional);
+                any other keys are stored as extra metadata
             batch_size: Number of pairs to add per batch
             
         Returns:
@@ -297,32 +932,43 @@ class QACache:
                 texts = []
                 metadatas = []
                 ids = []
+                answers = {}
                 
                 for pair in batch:
                     # Generate ID if not provided
                     qa_id = pair.get('qa_id') or str(uuid.uuid4())
                     
                     metadata = {
-                        'answer': pair['answer'],
                         'domain': pair['domain'],
                         'source': pair.get('source', 'batch'),
                         'qa_id': qa_id,
-                        'created': datetime.now().isoformat()
+                        'created': datetime.now().isoformat(),
+                        'pinned': True
                     }
+                    metadata.update({key: value for key, value in pair.items()
+                                     if key not in metadata and key not in ('question', 'answer')})
                     
                     texts.append(pair['question'])
                     metadatas.append(metadata)
                     ids.append(qa_id)
+                    answers[qa_id] = pair['answer']
                 
                 # Add batch to vectorstore
+                self._store_answers(answers, metadatas)
                 self.vectorstore.add_texts(
                     texts=texts,
                     metadatas=metadatas,
                     ids=ids
                 )
+                self._index_added_pairs(ids, refresh=False)
+                for question, metadata in zip(texts, metadatas):
+                    self._index_exact(question, metadata)
                 
                 logger.debug(f"Q&A Cache: Added batch {i//batch_size + 1}/{(total_pairs + batch_size - 1)//batch_size}")
             
+            self._bump_corpus_version()
+            if not isinstance(self.vector_index, InMemoryVectorIndex):
+                self._refresh_vector_index()
             logger.command_executed(f"Q&A Cache: Added {total_pairs} pairs successfully")
             return True
             
@@ -330,27 +976,150 @@ class QACache:
             logger.error(f"Q&A Cache: Error in batch addition: {e}")
             return False
     
+    def update_pair_metadata(self, qa_ids: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Merge metadata (e.g. a revised answer) into stored pairs without re-embedding.
+        
+        Answers go to the payload store; every lookup tier is updated from the
+        stored rows, so hits return the new values.
+        """
+        if not qa_ids or not self.vectorstore:
+            return
+        
+        metadatas = [dict(metadata) for metadata in metadatas]
+        if self.answer_store is not None:
+            self.answer_store.put_many({
+                qa_id: metadata.pop('answer') for qa_id, metadata in zip(qa_ids, metadatas) if 'answer' in metadata
+            })
+        
+        collection = self.vectorstore._collection
+        changed = [(qa_id, metadata) for qa_id, metadata in zip(qa_ids, metadatas) if metadata]
+        if changed:
+            collection.update(ids=[qa_id for qa_id, _ in changed], metadatas=[metadata for _, metadata in changed])
+        self._bump_corpus_version()
+        self._index_added_pairs(qa_ids, refresh=False)
+        rows = collection.get(ids=qa_ids, include=["documents", "metadatas"])
+        for question, metadata in zip(rows["documents"], rows["metadatas"]):
+            self._index_exact(question, metadata or {})
+        
+        # Force the rebuild for the new metadata even if the version bump failed
+        if self.vector_index is not None and not isinstance(self.vector_index, InMemoryVectorIndex):
+            self.vector_index.fingerprint = None
+            self._refresh_vector_index()
+    
+    def add_generated_pair(self, question: str, answer: str, domain: str) -> Optional[str]:
+        """
+        Write back an LLM-generated answer as an evictable pair.
+        
+        The id is derived from the normalized question and domain, so a repeated
+        write-back replaces the earlier answer instead of duplicating it.
+        
+        Returns:
+            The pair's qa_id, or None if it could not be stored
+        """
+        qa_id = f"gen-{domain}-{question_hash(question)[:16]}"
+        with self._write_lock:
+            if not self.add_qa_pair(question, answer, domain, source=GENERATED_SOURCE, qa_id=qa_id):
+                return None
+            self.stats.increment('generated_added')
+            self.evict_generated()
+        
+        logger.debug_optimization(f"Q&A Cache: Wrote back generated answer for domain '{domain}'")
+        return qa_id
+    
+    def evict_generated(self) -> int:
+        """
+        Keep generated pairs within the size cap.
+        
+        Pairs unused for longer than the max age go first, then the least
+        frequently used (oldest last hit breaking ties). Curated pairs are pinned.
+        
+        Returns:
+            Number of evicted pairs
+        """
+        self.flush_usage()
+        
+        cutoff = time.time() - self.generated_max_age
+        with self._write_lock:
+            ranked = sorted(
+                ((qa_id, dict(usage)) for qa_id, usage in self.generated_usage.items()),
+                key=lambda item: (item[1]['hit_count'], item[1]['last_hit'])
+            )
+        expired = [qa_id for qa_id, usage in ranked if usage['last_hit'] < cutoff]
+        remaining = [qa_id for qa_id, usage in ranked if usage['last_hit'] >= cutoff]
+        overflow = remaining[:max(len(remaining) - self.max_generated_entries, 0)]
+        
+        evicted = expired + overflow
+        if evicted:
+            self.delete_pairs(evicted)
+            self.stats.increment('generated_evicted', len(evicted))
+            logger.debug_optimization(
+                f"Q&A Cache: Evicted {len(evicted)} generated pairs ({len(expired)} expired)"
+            )
+        return len(evicted)
+    
+    def delete_pairs(self, qa_ids: List[str]):
+        """Remove pairs from the collection and every lookup tier."""
+        if not qa_ids or not self.vectorstore:
+            return
+        
+        self.vectorstore._collection.delete(ids=qa_ids)
+        self._bump_corpus_version()
+        if self.answer_store is not None:
+            self.answer_store.delete(qa_ids)
+        if self.domain_partitions is not None:
+            self.domain_partitions.delete(qa_ids)
+        if isinstance(self.vector_index, InMemoryVectorIndex):
+            self.vector_index.delete(qa_ids)
+        else:
+            self._refresh_vector_index()
+        
+        removed = set(qa_ids)
+        for key in list(self.exact_index):
+            entries = [entry for entry in self.exact_index[key] if entry['qa_id'] not in removed]
+            if entries:
+                self.exact_index[key] = entries
+            else:
+                del self.exact_index[key]
+        for qa_id in qa_ids:
+            with self._write_lock:
+                self.generated_usage.pop(qa_id, None)
+            domain = self.pair_domains.pop(qa_id, None)
+            if domain is not None:
+                self.stats.adjust_domain(domain, -1)
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get Q&A cache statistics."""
         total_qa_pairs = self._get_qa_count()
-        hit_rate = (self.stats['cache_hits'] / self.stats['total_queries'] * 100) if self.stats['total_queries'] > 0 else 0
-        avg_response_time = (self.stats['total_response_time'] / self.stats['total_queries']) if self.stats['total_queries'] > 0 else 0
+        counters = self.stats.counters()
+        hit_rate = (counters['cache_hits'] / counters['total_queries'] * 100) if counters['total_queries'] > 0 else 0
+        avg_response_time = (counters['total_response_time'] / counters['total_queries']) if counters['total_queries'] > 0 else 0
         
         return {
             'total_qa_pairs': total_qa_pairs,
-            'total_queries': self.stats['total_queries'],
-            'cache_hits': self.stats['cache_hits'],
+            'total_queries': counters['total_queries'],
+            'cache_hits': counters['cache_hits'],
+            'cache_misses': counters['total_queries'] - counters['cache_hits'],
+            'exact_hits': counters['exact_hits'],
+            'exact_questions': len(self.exact_index),
+            'generated_entries': len(self.generated_usage),
+            'generated_added': counters['generated_added'],
+            'generated_evicted': counters['generated_evicted'],
             'hit_rate': hit_rate,
             'avg_response_time': avg_response_time,
-            'similarity_threshold': self.similarity_threshold
+            'similarity_threshold': self.similarity_threshold,
+            'domain_thresholds': dict(self.domain_thresholds),
+            'index_backend': self.index_backend if self.vector_index is not None else 'chroma'
         }
     
     def clear_cache(self):
         """Clear the Q&A cache."""
         try:
             if self.chroma_client and self.collection_name:
-                # Delete and recreate collection
+                # Delete and recreate collection (answers are shared across collections, so drop only ours)
                 try:
+                    if self.answer_store is not None and self.vectorstore:
+                        self.answer_store.delete(self.vectorstore._collection.get(include=[])['ids'])
                     self.chroma_client.delete_collection(name=self.collection_name)
                 except Exception:
                     pass  # Collection might not exist
@@ -359,13 +1128,17 @@ class QACache:
                 
                 # Reinitialize vectorstore
                 self._setup_vectorstore()
+                if self.domain_partitions is not None:
+                    self.domain_partitions.clear()
+                self._refresh_vector_index()
+                self.exact_index = {}
+                with self._write_lock:
+                    self.generated_usage = {}
+                    self._dirty_usage.clear()
+                self.pair_domains = {}
                 
                 # Reset stats
-                self.stats = {
-                    'total_queries': 0,
-                    'cache_hits': 0,
-                    'total_response_time': 0.0
-                }
+                self.stats.reset()
                 
                 logger.command_executed("Q&A cache cleared")
                 return True
@@ -378,26 +1151,8 @@ class QACache:
             return False
     
     def get_domain_stats(self) -> Dict[str, int]:
-        """Get Q&A pairs count by domain."""
-        try:
-            if not self.vectorstore or not hasattr(self.vectorstore, '_collection'):
-                return {}
-            
-            # Get all documents with metadata
-            collection = self.vectorstore._collection
-            results = collection.get(include=["metadatas"])
-            
-            domain_counts = {}
-            if results and results.get('metadatas'):
-                for metadata in results['metadatas']:
-                    domain = metadata.get('domain', 'unknown')
-                    domain_counts[domain] = domain_counts.get(domain, 0) + 1
-            
-            return domain_counts
-            
-        except Exception as e:
-            logger.debug(f"Q&A Cache: Failed to get domain stats: {e}")
-            return {}
+        """Get Q&A pairs count by domain (maintained on add and delete, no collection scan)."""
+        return self.stats.domain_counts()
     
     def update_collection_metadata(self, updates: Dict[str, Any]) -> bool:
         """Update collection metadata with automatic timestamp."""
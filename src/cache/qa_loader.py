@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Markdown Q&A Loader for Esoteric Vectors
+
+Streams curated `data/qa/*.md` files into the Q&A cache with:
+- Line-by-line parsing of `## N. Question` sections
+- Content hashes so unchanged pairs are skipped (no embedding calls)
+- Large embedding batches for new or re-worded questions only
+- Metadata-only updates for revised answers
+- Removal of pairs that disappeared from the corpus
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from cache.qa_cache import QACache, question_hash
+from utils.logger import logger
+
+
+# Source tag of pairs owned by the markdown corpus (deleted when removed from it)
+MARKDOWN_SOURCE = "qa_markdown"
+
+# Source tag of reviewed candidates mined from cache misses (tools/mine_misses.py)
+CANDIDATE_SOURCE = "qa_candidates"
+
+# "## 12. What is a birth chart?" -> "What is a birth chart?"
+QUESTION_HEADING = re.compile(r"^##\s+(?:\d+\.\s*)?(?P<question>.+?)\s*$")
+
+
+def pair_hash(question: str, answer: str) -> str:
+    """Content hash of a Q&A pair (changes when either side is edited)."""
+    return hashlib.sha1(f"{question}\n\0\n{answer}".encode("utf-8")).hexdigest()
+
+
+def parse_qa_markdown(path, domain: Optional[str] = None,
+                      source: str = MARKDOWN_SOURCE) -> Iterator[Dict[str, str]]:
+    """
+    Stream Q&A pairs from a markdown file, one section at a time.
+
+    Sections without an answer are skipped.
+
+    Args:
+        path: Markdown file of `## N. Question` headings followed by answers
+        domain: Domain of the pairs (defaults to the file name, e.g. lunar_qa.md -> lunar)
+        source: Source tag stored with the pairs
+
+    Yields:
+        Pair dicts ready for QACache._add_documents_batch
+    """
+    path = Path(path)
+    domain = domain or path.stem.removesuffix("_qa")
+    question = None
+    lines: List[str] = []
+
+    def build_pair():
+        answer = "\n".join(lines).strip()
+        # Sections are separated by horizontal rules
+        while answer.endswith("---"):
+            answer = answer[:-3].rstrip()
+        if question and answer:
+            return {
+                'question': question,
+                'answer': answer,
+                'domain': domain,
+                'source': source,
+                'qa_id': f"md-{domain}-{question_hash(question)[:16]}",
+                'content_hash': pair_hash(question, answer),
+                'source_file': path.name
+            }
+        return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            match = QUESTION_HEADING.match(line)
+            if match:
+                pair = build_pair()
+                if pair:
+                    yield pair
+                question, lines = match.group("question"), []
+            elif question is not None:
+                lines.append(line.rstrip("\n"))
+
+    pair = build_pair()
+    if pair:
+        yield pair
+
+
+class QAMarkdownLoader:
+    """
+    Incremental loader from the markdown Q&A corpus into the Q&A cache.
+
+    Features:
+    - Stable ids from the normalized question, so re-numbering is free
+    - Unchanged pairs cost nothing; revised answers are metadata updates
+    - New or re-worded questions are embedded in batches of batch_size
+    - Pairs missing from the corpus are deleted (other sources are untouched)
+    """
+
+    def __init__(self, qa_cache: QACache, batch_size: int = 256, source: str = MARKDOWN_SOURCE):
+        """
+        Initialize the loader.
+
+        Args:
+            qa_cache: Cache receiving the pairs
+            batch_size: Questions embedded per request
+            source: Source tag owned by this loader (only these pairs are compared or deleted)
+        """
+        self.qa_cache = qa_cache
+        self.batch_size = batch_size
+        self.source = source
+
+    def _stored_pairs(self) -> Dict[str, Dict[str, Any]]:
+        """Content hashes and questions of the pairs previously loaded from this source."""
+        results = self.qa_cache.vectorstore._collection.get(
+            where={"source": self.source}, include=["documents", "metadatas"]
+        )
+        return {
+            qa_id: {'question': question, 'content_hash': (metadata or {}).get('content_hash')}
+            for qa_id, question, metadata in zip(
+                results.get("ids") or [], results.get("documents") or [], results.get("metadatas") or []
+            )
+        }
+
+    def sync(self, paths: List[str], delete_missing: bool = True) -> Dict[str, int]:
+        """
+        Bring the cache in line with the given markdown files.
+
+        Args:
+            paths: Markdown files to load
+            delete_missing: Remove markdown pairs not found in these files
+                (pass False when loading a subset of the corpus)
+
+        Returns:
+            Counts of added, updated, unchanged, deleted and embedded pairs
+        """
+        counts = {'added': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'embedded': 0}
+        if not self.qa_cache.vectorstore:
+            logger.error("Q&A Loader: Cannot sync - vectorstore not available")
+            return counts
+
+        stored = self._stored_pairs()
+        seen = set()
+        pending: List[Dict[str, str]] = []
+
+        def flush():
+            if pending and self.qa_cache._add_documents_batch(pending, batch_size=self.batch_size):
+                counts['embedded'] += len(pending)
+            pending.clear()
+
+        for path in paths:
+            for pair in parse_qa_markdown(path, source=self.source):
+                qa_id = pair['qa_id']
+                if qa_id in seen:
+                    logger.warning(f"Q&A Loader: Duplicate question in {path}: {pair['question']}")
+                    continue
+                seen.add(qa_id)
+
+                previous = stored.get(qa_id)
+                if previous is None:
+                    counts['added'] += 1
+                elif previous['content_hash'] == pair['content_hash']:
+                    counts['unchanged'] += 1
+                    continue
+                else:
+                    counts['updated'] += 1
+                    if previous['question'] == pair['question']:
+                        # Only the answer changed: the stored question embedding is still valid
+                        self.qa_cache.update_pair_metadata([qa_id], [{
+                            'answer': pair['answer'],
+                            'content_hash': pair['content_hash'],
+                            'source_file': pair['source_file']
+                        }])
+                        continue
+
+                pending.append(pair)
+                if len(pending) >= self.batch_size:
+                    flush()
+        flush()
+
+        if delete_missing:
+            removed = [qa_id for qa_id in stored if qa_id not in seen]
+            self.qa_cache.delete_pairs(removed)
+            counts['deleted'] = len(removed)
+
+        logger.command_executed(
+            f"Q&A Loader: {counts['added']} added, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['deleted']} deleted ({counts['embedded']} embedded)"
+        )
+        return counts
+
+    def sync_directory(self, directory: str = "data/qa", pattern: str = "*.md") -> Dict[str, int]:
+        """Sync every markdown file in a directory (the whole corpus)."""
+        return self.sync(sorted(str(path) for path in Path(directory).glob(pattern)))
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"QAMarkdownLoader(source={self.source}, batch_size={self.batch_size})"
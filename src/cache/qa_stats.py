@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Q&A Cache Statistics for Esoteric Vectors
+
+Incrementally maintained cache statistics with:
+- Thread-safe query, hit and write-back counters
+- Per-domain pair counts adjusted on add and delete (no collection scans)
+- Periodic persistence to SQLite next to the collection as additive deltas,
+  so several workers sharing the file never overwrite each other's counts
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from utils.logger import logger
+
+
+# Counters kept per collection (response time is a running total in seconds)
+COUNTERS = (
+    'total_queries',
+    'cache_hits',
+    'exact_hits',
+    'total_response_time',
+    'generated_added',
+    'generated_evicted'
+)
+
+# Row name prefix for per-domain pair counts
+DOMAIN_PREFIX = "domain:"
+
+
+class QACacheStats:
+    """
+    Counters and per-domain pair counts for one Q&A collection.
+
+    Features:
+    - All updates under one lock, safe from concurrent request threads
+    - O(1) reads for stats and health endpoints
+    - Persisted every flush_interval seconds and on flush(); memory-only if SQLite is unavailable
+    - Each flush adds this process's changes since the last flush to the stored
+      values and reloads the merged totals written by every worker
+    """
+
+    def __init__(self, db_path: str, collection_name: str, flush_interval: float = 30.0):
+        """
+        Open (or create) the statistics table and load persisted counters.
+
+        Args:
+            db_path: SQLite file path
+            collection_name: Collection the counters belong to
+            flush_interval: Seconds between automatic writes
+        """
+        self.db_path = db_path
+        self.collection_name = collection_name
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = dict.fromkeys(COUNTERS, 0)
+        self._domains: Dict[str, int] = {}
+        self._deltas: Dict[str, float] = {}  # Row name -> change not yet persisted
+        self._replace_domains = False  # Domain rows are replaced by a recount on the next write
+        self._replace_all = False  # Every row is cleared on the next write
+        self._dirty = False
+        self._last_flush = time.time()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self._setup_db()
+
+    def _setup_db(self):
+        """Create the table and load this collection's persisted values."""
+        try:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS qa_stats (
+                    collection TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    value REAL NOT NULL,
+                    PRIMARY KEY (collection, name)
+                )
+            """)
+            self._db.commit()
+            self._load()
+        except Exception as e:
+            logger.warning(f"Q&A Cache: Stats persistence unavailable, keeping counters in memory: {e}")
+            self._db = None
+
+    def _load(self):
+        """Replace the in-memory values with this collection's persisted rows."""
+        rows = self._db.execute(
+            "SELECT name, value FROM qa_stats WHERE collection = ?", (self.collection_name,)
+        ).fetchall()
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._domains = {}
+        for name, value in rows:
+            if name.startswith(DOMAIN_PREFIX):
+                if value > 0:
+                    self._domains[name[len(DOMAIN_PREFIX):]] = int(value)
+            elif name in self._counters:
+                self._counters[name] = value if name == 'total_response_time' else int(value)
+
+    def increment(self, name: str, amount: float = 1):
+        """Add to a counter."""
+        with self._lock:
+            self._counters[name] += amount
+            self._deltas[name] = self._deltas.get(name, 0) + amount
+            self._mark_dirty()
+
+    def adjust_domain(self, domain: str, delta: int):
+        """Add to (or subtract from) a domain's pair count."""
+        with self._lock:
+            count = self._domains.get(domain, 0) + delta
+            if count > 0:
+                self._domains[domain] = count
+            else:
+                self._domains.pop(domain, None)
+            name = DOMAIN_PREFIX + domain
+            self._deltas[name] = self._deltas.get(name, 0) + delta
+            self._mark_dirty()
+
+    def reset_domains(self):
+        """Forget all domain counts (before a full recount that replaces the persisted ones)."""
+        with self._lock:
+            self._domains = {}
+            self._deltas = {name: value for name, value in self._deltas.items() if not name.startswith(DOMAIN_PREFIX)}
+            self._replace_domains = True
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        """Schedule a write, flushing if the interval has passed (lock held)."""
+        self._dirty = True
+        if time.time() - self._last_flush >= self.flush_interval:
+            self._write()
+
+    def counters(self) -> Dict[str, float]:
+        """Consistent copy of all counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def domain_counts(self) -> Dict[str, int]:
+        """Copy of the per-domain pair counts."""
+        with self._lock:
+            return dict(self._domains)
+
+    def __getitem__(self, name: str) -> float:
+        """Read one counter."""
+        with self._lock:
+            return self._counters[name]
+
+    def reset(self):
+        """Zero every counter and domain count."""
+        with self._lock:
+            self._counters = dict.fromkeys(COUNTERS, 0)
+            self._domains = {}
+            self._deltas = {}
+            self._replace_all = True
+            self._dirty = True
+            self._write()
+
+    def flush(self):
+        """Persist pending changes now."""
+        with self._lock:
+            if self._dirty:
+                self._write()
+
+    def _write(self):
+        """Add pending deltas to this collection's persisted rows and reload the totals (lock held)."""
+        self._last_flush = time.time()
+        if self._db is None:
+            self._deltas = {}
+            self._replace_domains = self._replace_all = False
+            self._dirty = False
+            return
+
+        try:
+            deltas = dict(self._deltas)
+            if self._replace_all:
+                self._db.execute("DELETE FROM qa_stats WHERE collection = ?", (self.collection_name,))
+            elif self._replace_domains:
+                # A recount is absolute: drop the stored domain rows and write the recounted values
+                self._db.execute(
+                    "DELETE FROM qa_stats WHERE collection = ? AND name LIKE ?", (self.collection_name, DOMAIN_PREFIX + "%")
+                )
+                deltas = {name: value for name, value in deltas.items() if not name.startswith(DOMAIN_PREFIX)}
+                deltas.update((DOMAIN_PREFIX + domain, count) for domain, count in self._domains.items())
+
+            self._db.executemany(
+                "INSERT INTO qa_stats (collection, name, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (collection, name) DO UPDATE SET value = value + excluded.value",
+                [(self.collection_name, name, value) for name, value in deltas.items() if value]
+            )
+            self._db.execute(
+                "DELETE FROM qa_stats WHERE collection = ? AND name LIKE ? AND value <= 0",
+                (self.collection_name, DOMAIN_PREFIX + "%")
+            )
+            self._db.commit()
+
+            self._deltas = {}
+            self._replace_domains = self._replace_all = False
+            self._dirty = False
+            self._load()
+        except Exception as e:
+            self._db.rollback()
+            logger.debug_optimization(f"Q&A Cache: Stats write failed: {e}")
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"QACacheStats(collection={self.collection_name}, domains={len(self._domains)})"
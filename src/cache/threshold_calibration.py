@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Similarity Threshold Calibration for Esoteric Vectors
+
+Per-domain Q&A cache thresholds from labeled query pairs:
+- Similarities computed exactly as the cache scores them (per distance space)
+- Lowest threshold per domain that still reaches a target precision
+- Expected hit rate at the calibrated versus the global threshold
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def pair_similarities(query_embeddings, question_embeddings, space: str = "l2") -> np.ndarray:
+    """
+    Score (query, cached question) pairs the way QACache does: 1 - distance.
+
+    ChromaDB's l2 distance is squared, so on unit vectors l2 similarity is
+    2*cos - 1; cosine and ip spaces give the cosine itself.
+    """
+    queries = np.asarray(query_embeddings, dtype=np.float32)
+    questions = np.asarray(question_embeddings, dtype=np.float32)
+    queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    questions = questions / np.maximum(np.linalg.norm(questions, axis=1, keepdims=True), 1e-12)
+
+    cosine = np.sum(queries * questions, axis=1)
+    if space == "l2":
+        return 2 * cosine - 1
+    return cosine
+
+
+def precision_recall(similarities: np.ndarray, labels: np.ndarray, threshold: float) -> Dict[str, float]:
+    """Precision and recall (hit rate on true matches) of accepting pairs at or above a threshold."""
+    accepted = similarities >= threshold
+    true_hits = int(np.sum(accepted & labels))
+    positives = int(np.sum(labels))
+    return {
+        'precision': true_hits / accepted.sum() if accepted.any() else 1.0,
+        'recall': true_hits / positives if positives else 0.0
+    }
+
+
+def calibrate_threshold(similarities, labels, target_precision: float = 0.95,
+                        min_pairs: int = 10) -> Optional[float]:
+    """
+    Lowest threshold whose accepted pairs reach the target precision.
+
+    Returns:
+        The threshold, or None if there are too few labeled pairs (or no positives)
+    """
+    similarities = np.asarray(similarities, dtype=np.float64)
+    labels = np.asarray(labels, dtype=bool)
+    if len(similarities) < min_pairs or not labels.any():
+        return None
+
+    # Accepting everything at or above each candidate, in descending order
+    order = np.argsort(-similarities, kind="stable")
+    ranked = similarities[order]
+    true_hits = np.cumsum(labels[order])
+    precision = true_hits / np.arange(1, len(order) + 1)
+
+    # Evaluate tied scores as one group; only groups with a true match can raise recall
+    best = None
+    group_hits = 0
+    for i in range(len(order)):
+        if i + 1 < len(order) and ranked[i + 1] == ranked[i]:
+            continue
+        if true_hits[i] > group_hits and precision[i] >= target_precision:
+            best = float(ranked[i])
+        group_hits = true_hits[i]
+    return best
+
+
+def calibrate_domains(pairs: List[Dict[str, Any]], similarities, global_threshold: float,
+                      target_precision: float = 0.95, min_pairs: int = 10) -> Dict[str, Dict[str, Any]]:
+    """
+    Calibrate every domain in a labeled pair set.
+
+    Args:
+        pairs: Dicts with 'domain' and boolean 'match'
+        similarities: Score per pair (pair_similarities)
+        global_threshold: Current threshold, for the before/after comparison
+
+    Returns:
+        domain -> threshold (None if uncalibrated), pair counts and
+        precision/recall at the global and calibrated thresholds
+    """
+    similarities = np.asarray(similarities, dtype=np.float64)
+    labels = np.array([bool(pair['match']) for pair in pairs])
+    domains = np.array([pair.get('domain') or 'unknown' for pair in pairs])
+
+    report = {}
+    for domain in sorted(set(domains)):
+        mask = domains == domain
+        threshold = calibrate_threshold(similarities[mask], labels[mask], target_precision, min_pairs)
+        report[domain] = {
+            'threshold': threshold,
+            'pairs': int(mask.sum()),
+            'positives': int(labels[mask].sum()),
+            'before': precision_recall(similarities[mask], labels[mask], global_threshold),
+            'after': precision_recall(similarities[mask], labels[mask],
+                                      global_threshold if threshold is None else threshold)
+        }
+    return report
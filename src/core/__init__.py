@@ -5,6 +5,7 @@ Central location for all core system functionality.
 """
 
 from .contextual_rag import OptimizedContextualRAGSystem
+from .embedding_service import EmbeddingService, get_embedding_service
 from .domain_manager import DomainManager
 from .resilience_manager import ResilienceManager
 from .stats_collector import StatsCollector
@@ -25,6 +26,8 @@ from .auth0_management import auth0_management
 
 __all__ = [
     'OptimizedContextualRAGSystem',
+    'EmbeddingService',
+    'get_embedding_service',
     'DomainManager', 
     'ResilienceManager',
     'StatsCollector',
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Context Packer for Esoteric Vectors
+
+Token-budgeted prompt context with:
+- Near-duplicate chunk removal using stored chunk embeddings
+- Budget filled by retrieval relevance instead of fixed truncation
+- Bounded share for conversation memory (unused share goes to knowledge)
+- Per-section token accounting
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .embedding_service import normalize_text
+from src.utils.logger import logger
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a character heuristic
+    tiktoken = None
+
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Load the tokenizer once; None if tiktoken or its encoding file is unavailable."""
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            if tiktoken is not None:
+                try:
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    logger.debug_optimization(f"Tokenizer unavailable, estimating tokens from length: {e}")
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count (or estimate, ~4 characters per token) the tokens in a text."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Trim a text to at most max_tokens, preferring a sentence or word boundary."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        trimmed = encoding.decode(encoding.encode(text)[:max_tokens - 1])
+    else:
+        trimmed = text[:(max_tokens - 1) * 4]
+
+    boundary = max(trimmed.rfind(". "), trimmed.rfind("\n"))
+    if boundary > len(trimmed) // 2:
+        trimmed = trimmed[:boundary + 1]
+    else:
+        trimmed = trimmed.rsplit(" ", 1)[0]
+    return trimmed.rstrip() + "…"
+
+
+class ContextPacker:
+    """
+    Packs retrieved chunks and memory into a fixed token budget.
+
+    Features:
+    - Greedy near-duplicate filtering by cosine similarity of chunk embeddings
+    - Chunks added whole in relevance order; only the last one may be trimmed
+    - Memory capped at a share of the budget
+    """
+
+    def __init__(self,
+                 token_budget: int = 3000,
+                 memory_share: float = 0.35,
+                 dedupe_threshold: float = 0.95,
+                 min_chunk_tokens: int = 60):
+        """
+        Initialize the packer.
+
+        Args:
+            token_budget: Total tokens for knowledge and memory sections
+            memory_share: Max share of the budget for conversation memory
+            dedupe_threshold: Cosine similarity above which a chunk counts as a duplicate
+            min_chunk_tokens: Smallest remainder worth filling with a trimmed chunk
+        """
+        self.token_budget = token_budget
+        self.memory_share = memory_share
+        self.dedupe_threshold = dedupe_threshold
+        self.min_chunk_tokens = min_chunk_tokens
+
+    def dedupe_chunks(self, chunks: List[Dict[str, Any]],
+                      embeddings: Optional[Dict[str, List[float]]] = None) -> List[Dict[str, Any]]:
+        """
+        Drop near-duplicate chunks, keeping the most relevant of each group.
+
+        Chunks without a stored embedding are compared by normalized text.
+        """
+        embeddings = embeddings or {}
+        kept: List[Dict[str, Any]] = []
+        kept_vectors: List[np.ndarray] = []
+        kept_texts = set()
+
+        for chunk in chunks:
+            text_key = normalize_text(chunk.get("content", ""))
+            if text_key in kept_texts:
+                continue
+
+            vector = embeddings.get(chunk.get("id"))
+            if vector is not None:
+                vector = np.asarray(vector, dtype=np.float32)
+                vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+                if kept_vectors and float(np.max(np.stack(kept_vectors) @ vector)) >= self.dedupe_threshold:
+                    continue
+                kept_vectors.append(vector)
+
+            kept_texts.add(text_key)
+            kept.append(chunk)
+
+        return kept
+
+    def pack(self, chunks: List[Dict[str, Any]], memory_context: str = "",
+             embeddings: Optional[Dict[str, List[float]]] = None) -> Dict[str, Any]:
+        """
+        Pack memory and knowledge chunks into the token budget.
+
+        Args:
+            chunks: Retrieved chunk dicts (content, id, distance), best first
+            memory_context: Conversation memory text
+            embeddings: Stored chunk embeddings keyed by chunk id
+
+        Returns:
+            Dictionary with packed "knowledge" and "memory" text, per-section
+            "tokens", and chunk counts
+        """
+        memory = trim_to_tokens(memory_context, int(self.token_budget * self.memory_share)) if memory_context else ""
+        memory_tokens = count_tokens(memory)
+        remaining = self.token_budget - memory_tokens
+
+        ranked = sorted(chunks, key=lambda chunk: chunk.get("distance", 0.0))
+        unique = self.dedupe_chunks(ranked, embeddings)
+
+        parts = []
+        knowledge_tokens = 0
+        for chunk in unique:
+            text = f"[Chunk {len(parts) + 1}]: {chunk.get('content', '')}"
+            tokens = count_tokens(text)
+            if tokens > remaining:
+                if remaining < self.min_chunk_tokens:
+                    break
+                text = trim_to_tokens(text, remaining)
+                tokens = count_tokens(text)
+            parts.append(text)
+            knowledge_tokens += tokens
+            remaining -= tokens
+            if remaining <= 0:
+                break
+
+        packed = {
+            "knowledge": "\n\n".join(parts),
+            "memory": memory,
+            "tokens": {
+                "knowledge": knowledge_tokens,
+                "memory": memory_tokens,
+                "total": knowledge_tokens + memory_tokens,
+                "budget": self.token_budget
+            },
+            "chunks_used": len(parts),
+            "duplicates_dropped": len(ranked) - len(unique)
+        }
+
+        logger.debug_optimization(
+            f"Context packed: {packed['tokens']['total']}/{self.token_budget} tokens "
+            f"(knowledge {knowledge_tokens}, memory {memory_tokens}), "
+            f"{len(parts)} chunks, {packed['duplicates_dropped']} duplicates dropped"
+        )
+        return packed
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"ContextPacker(budget={self.token_budget}, memory_share={self.memory_share})"
@@ -11,14 +11,23 @@ Clean, production-ready RAG system with:
 
 import os
 import time
+import asyncio
+import threading
 import chromadb
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any, List, Optional
-from langchain_openai import OpenAIEmbeddings
+from typing import Dict, Any, List, Optional, Tuple
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
 
 from .stats_collector import StatsCollector
+from .embedding_service import collection_name_for, get_embedding_service
+from .vector_index import NumpyVectorIndex, QuantizedVectorIndex, collection_fingerprint
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+from .domain_partitions import DomainPartitionedIndex, scored_documents
+from .domain_manager import DomainManager
+from .result_cache import RetrievalResultCache
 from .resilience_manager import resilience_manager
 from src.utils.logger import logger
 
@@ -38,22 +47,84 @@ class OptimizedContextualRAGSystem:
     def __init__(self, 
                  chroma_path: str = "data/chroma_db",
                  collection_name: str = "contextual_rag_collection",
-                 domain_manager = None):
-        """Initialize the RAG system."""
+                 domain_manager = None,
+                 retrieval_backend: Optional[str] = None,
+                 index_path: str = "data/vector_index",
+                 index_refresh_interval: float = 60.0,
+                 hybrid_search: Optional[bool] = None,
+                 lexical_fast_path: Optional[bool] = None,
+                 max_workers: int = 8,
+                 domain_partitions: Optional[bool] = None,
+                 result_cache_size: int = 1024,
+                 result_cache_ttl: float = 600.0):
+        """
+        Initialize the RAG system.
+        
+        Args:
+            retrieval_backend: "chroma" (default), "numpy" for the exact in-process
+                index, or "int8" / "binary" for the compact quantized index with
+                float16 rescoring. Defaults to the ESOTERIC_RAG_BACKEND environment variable.
+            index_path: Directory for the in-process index snapshots
+            index_refresh_interval: Seconds between collection staleness checks
+            hybrid_search: Fuse BM25 and vector rankings with RRF. Defaults to the
+                ESOTERIC_HYBRID_SEARCH environment variable (enabled unless "false").
+            lexical_fast_path: Answer confident exact keyword matches from BM25 alone,
+                without embedding the query. Only applies to query()/aquery() calls
+                without a precomputed embedding (the chat path always embeds once per
+                turn for the Q&A cache). Defaults to the ESOTERIC_LEXICAL_FAST_PATH
+                environment variable (disabled unless "true").
+            collection_name: Base collection name; reduced embedding dimensions
+                (ESOTERIC_EMBEDDING_DIMENSIONS) select the "<name>_<dims>d" collection
+            max_workers: Size of the bounded executor used by aquery for ChromaDB work
+            domain_partitions: Search one collection per domain instead of filtering the
+                shared collection. Defaults to the ESOTERIC_DOMAIN_PARTITIONS environment
+                variable (disabled unless "true").
+            result_cache_size: Max cached retrieval results (0 disables the cache)
+            result_cache_ttl: Seconds a cached retrieval result stays valid
+        """
         self.chroma_path = chroma_path
-        self.collection_name = collection_name
+        self.collection_name = collection_name_for(collection_name)
         self.domain_manager = domain_manager
+        self.retrieval_backend = (retrieval_backend or os.getenv('ESOTERIC_RAG_BACKEND', 'chroma')).lower()
+        self.index_path = os.path.join(index_path, self.collection_name)
+        self.index_refresh_interval = index_refresh_interval
+        if hybrid_search is None:
+            hybrid_search = os.getenv('ESOTERIC_HYBRID_SEARCH', 'true').lower() in ('true', '1', 'yes')
+        self.hybrid_search = hybrid_search
+        if lexical_fast_path is None:
+            lexical_fast_path = os.getenv('ESOTERIC_LEXICAL_FAST_PATH', 'false').lower() in ('true', '1', 'yes')
+        self.lexical_fast_path = lexical_fast_path
+        if domain_partitions is None:
+            domain_partitions = os.getenv('ESOTERIC_DOMAIN_PARTITIONS', 'false').lower() in ('true', '1', 'yes')
+        self.use_domain_partitions = domain_partitions
         
         # Initialize components
         self.stats_collector = StatsCollector()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag_")
         self.embeddings = None
         self.chroma_client = None
         self.vectorstore = None
+        self.vector_index = None
+        self.lexical_index = None
+        self.domain_partitions = None
+        self.result_cache = RetrievalResultCache(result_cache_size, result_cache_ttl) if result_cache_size > 0 else None
+        self._index_checked_at = 0.0
+        self._index_lock = threading.Lock()
+        self._version_checked_at = 0.0
+        self._retrieval = threading.local()  # Per-thread degraded reason and deferred stats of the running query
+        self._stats_lock = threading.Lock()
+        self.retrieval_stats = {
+            'hybrid_queries': 0,
+            'lexical_fast_path': 0
+        }
         
         # Setup system
         self._setup_embeddings()
         self._setup_chroma_client()
         self._setup_vectorstore()
+        self._setup_vector_index()
+        self._setup_lexical_index()
+        self._setup_domain_partitions()
         
         # Log system ready status
         if self.domain_manager:
@@ -63,19 +134,14 @@ class OptimizedContextualRAGSystem:
             logger.system_ready("RAG System ready - no domain filtering")
     
     def _setup_embeddings(self):
-        """Initialize OpenAI embeddings with resilience."""
+        """Initialize shared cached embeddings with resilience."""
         try:
-            self.embeddings = OpenAIEmbeddings(
-                model="text-embedding-3-small",
-                show_progress_bar=False,
-                max_retries=3,
-                timeout=30.0
-            )
+            self.embeddings = get_embedding_service()
             
-            # Register with resilience manager
-            resilience_manager.register_openai_health_check(self.embeddings)
+            # Register with resilience manager (health check bypasses the cache)
+            resilience_manager.register_openai_health_check(self.embeddings.client)
             
-            logger.debug_openai("OpenAI embeddings initialized with resilience")
+            logger.debug_openai("Shared embedding service attached with resilience")
             
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI embeddings: {e}")
@@ -110,6 +176,13 @@ class OptimizedContextualRAGSystem:
                 collection = self.chroma_client.get_collection(name=self.collection_name)
                 count = collection.count()
                 logger.debug_chromadb(f"Loaded existing collection: {count} documents")
+                
+                stored_dimensions = (collection.metadata or {}).get("embedding_dimensions")
+                if stored_dimensions and int(stored_dimensions) != self.embeddings.dimensions:
+                    logger.warning(
+                        f"Collection holds {stored_dimensions}-dim vectors but embeddings are "
+                        f"{self.embeddings.dimensions}-dim - run the document manager 'migrate' command"
+                    )
             else:
                 # Create new collection with metadata and HNSW optimization
                 collection = self._create_optimized_collection()
@@ -132,7 +205,8 @@ class OptimizedContextualRAGSystem:
         collection_metadata = {
             "version": "2.1.0",
             "created": datetime.now().isoformat(),
-            "embedding_model": "text-embedding-3-small",
+            "embedding_model": self.embeddings.model,
+            "embedding_dimensions": self.embeddings.dimensions,
             "description": "Esoteric AI knowledge base with domain-aware RAG",
             "domains": "lunar,ifs,astrology,crystals,numerology,tarot",
             "hnsw_config": "optimized",
@@ -157,6 +231,155 @@ class OptimizedContextualRAGSystem:
         logger.debug_chromadb(f"Created new collection with HNSW optimization v{collection_metadata['version']}")
         return collection
     
+    def _setup_vector_index(self):
+        """Initialize the in-process index (exact or quantized) when selected as retrieval backend."""
+        if self.retrieval_backend not in ("numpy", "int8", "binary"):
+            return
+        
+        if not self.vectorstore:
+            logger.warning("Cannot initialize in-process vector index - vectorstore not available")
+            return
+        
+        try:
+            collection = self.vectorstore._collection
+            space = (collection.configuration or {}).get("hnsw", {}).get("space", "cosine")
+            if self.retrieval_backend == "numpy":
+                self.vector_index = NumpyVectorIndex(self.index_path, space=space)
+            else:
+                self.vector_index = QuantizedVectorIndex(
+                    os.path.join(self.index_path, self.retrieval_backend), space=space, mode=self.retrieval_backend
+                )
+            self.vector_index.load()
+            self._refresh_indexes(force=True)
+            logger.debug_optimization(f"{self.vector_index} ready")
+        except Exception as e:
+            logger.warning(f"In-process vector index unavailable, using ChromaDB: {e}")
+            self.vector_index = None
+    
+    def _setup_lexical_index(self):
+        """Initialize the in-memory BM25 index for hybrid retrieval."""
+        if not self.hybrid_search or not self.vectorstore:
+            return
+        
+        try:
+            self.lexical_index = BM25Index()
+            self._refresh_indexes(force=True)
+            logger.debug_optimization(f"BM25 index ready: {self.lexical_index.size} chunks")
+        except Exception as e:
+            logger.warning(f"BM25 index unavailable, using vector search only: {e}")
+            self.lexical_index = None
+    
+    def _setup_domain_partitions(self):
+        """Initialize per-domain partition collections synced from the shared collection."""
+        if not self.use_domain_partitions or not self.vectorstore or not self.chroma_client:
+            return
+        
+        try:
+            collection = self.vectorstore._collection
+            space = (collection.configuration or {}).get("hnsw", {}).get("space", "cosine")
+            self.domain_partitions = DomainPartitionedIndex(
+                self.chroma_client, self.collection_name, DomainManager.AVAILABLE_DOMAINS, space=space
+            )
+            self._refresh_indexes(force=True)
+            logger.debug_optimization(f"Domain partitions ready: {self.domain_partitions.domains}")
+        except Exception as e:
+            logger.warning(f"Domain partitions unavailable, using domain filter: {e}")
+            self.domain_partitions = None
+    
+    def _refresh_indexes(self, force: bool = False):
+        """Rebuild in-process indexes if the collection has changed."""
+        indexes = [
+            index for index in (self.vector_index, self.lexical_index, self.domain_partitions)
+            if index is not None
+        ]
+        if not indexes:
+            return
+        
+        # One refresh at a time, so concurrent queries never rebuild into the same snapshot
+        with self._index_lock:
+            now = time.time()
+            if not force and now - self._index_checked_at < self.index_refresh_interval:
+                return
+            self._index_checked_at = now
+            
+            collection = self.vectorstore._collection
+            try:
+                version = self.get_corpus_version()
+            except Exception as e:
+                logger.debug_optimization(f"Corpus version check failed, fingerprinting ids only: {e}")
+                version = None
+            fingerprint = collection_fingerprint(collection, version)
+            for index in indexes:
+                if fingerprint != index.fingerprint:
+                    logger.debug_optimization(f"Collection changed - rebuilding {index.__class__.__name__}")
+                    index.build_from_collection(collection, fingerprint)
+    
+    def invalidate_indexes(self):
+        """Force an index staleness check on the next query (call after ingestion changes)."""
+        self._index_checked_at = 0.0
+        self._version_checked_at = 0.0
+    
+    def _fresh_collection(self):
+        """Re-fetch the collection so metadata written by other processes is visible."""
+        if self.chroma_client:
+            return self.chroma_client.get_collection(name=self.collection_name)
+        return self.vectorstore._collection
+    
+    def get_corpus_version(self) -> int:
+        """Read the corpus version counter from the collection metadata."""
+        return int((self._fresh_collection().metadata or {}).get("corpus_version", 0))
+    
+    def bump_corpus_version(self) -> int:
+        """
+        Increment the corpus version after documents are added, updated or removed.
+        
+        Invalidates cached retrieval results here and, on their next version
+        check, in every other process sharing the collection.
+        """
+        collection = self._fresh_collection()
+        metadata = dict(collection.metadata or {})
+        version = int(metadata.get("corpus_version", 0)) + 1
+        metadata["corpus_version"] = version
+        collection.modify(metadata=metadata)
+        
+        if self.result_cache is not None:
+            self.result_cache.sync_version(version)
+        self.invalidate_indexes()
+        
+        logger.debug_optimization(f"Corpus version bumped to {version}")
+        return version
+    
+    def _sync_result_cache(self):
+        """Bind the result cache to the current corpus version (checked at most every refresh interval)."""
+        now = time.time()
+        if now - self._version_checked_at < self.index_refresh_interval:
+            return
+        self._version_checked_at = now
+        
+        try:
+            self.result_cache.sync_version(self.get_corpus_version())
+        except Exception as e:
+            logger.debug_optimization(f"Corpus version check failed, clearing result cache: {e}")
+            self.result_cache.clear()
+    
+    def _get_cached_result(self, query_text: str, active_domains: List[str], k: int,
+                           start_time: float) -> Optional[Dict[str, Any]]:
+        """Serve a retrieval result from the result cache."""
+        if self.result_cache is None:
+            return None
+        
+        self._sync_result_cache()
+        result = self.result_cache.get(self.result_cache.make_key(query_text, active_domains, k))
+        if result is None:
+            return None
+        
+        response_time = time.time() - start_time
+        result["metadata"]["response_time"] = response_time
+        result["metadata"]["cached"] = True
+        self._record_query_time('rag_cached', response_time)
+        logger.debug_optimization("Retrieval result cache hit")
+        return result
+    
     def _setup_fallback_vectorstore(self):
         """Setup fallback vectorstore if main setup fails."""
         if os.path.exists(self.chroma_path):
@@ -174,17 +397,80 @@ class OptimizedContextualRAGSystem:
         else:
             logger.warning("No vectorstore found")
     
-    def query(self, query_text: str, k: int = 4) -> Dict[str, Any]:
+    def embed_query(self, query_text: str) -> Optional[List[float]]:
+        """Embed a query once with resilience, for reuse across a whole turn."""
+        if not self.embeddings:
+            return None
+        vector = resilience_manager.execute_with_openai_resilience(self.embeddings.embed_query, query_text)
+        if not vector or not any(vector):
+            self._mark_degraded("fallback_embedding")
+        return vector
+    
+    def _mark_degraded(self, reason: str):
+        """Record that the retrieval running on this thread fell back to a degraded path."""
+        self._retrieval.degraded = reason
+        logger.debug_resilience(f"Retrieval degraded: {reason}")
+    
+    def _count_retrieval(self, path: str):
+        """Count a retrieval path now, or hold it for record_query() on speculative retrievals."""
+        pending = getattr(self._retrieval, 'pending', None)
+        if pending is not None:
+            pending["paths"].append(path)
+        else:
+            with self._stats_lock:
+                self.retrieval_stats[path] += 1
+    
+    def _record_query_time(self, query_type: str, response_time: float):
+        """Record query performance now, or hold it for record_query() on speculative retrievals."""
+        pending = getattr(self._retrieval, 'pending', None)
+        if pending is not None:
+            pending["timings"].append([query_type, response_time])
+        elif self.stats_collector:
+            self.stats_collector.record_query(query_type, response_time)
+    
+    def _cache_result(self, query_text: str, active_domains: List[str], k: int, result: Dict[str, Any]):
+        """Store a retrieval result in the result cache (if enabled)."""
+        if self.result_cache is None:
+            return
+        self.result_cache.put(self.result_cache.make_key(query_text, active_domains, k), result)
+    
+    def query(self, query_text: str, k: int = 4, query_embedding: Optional[List[float]] = None,
+              record: bool = True) -> Dict[str, Any]:
         """
         Query the RAG system with domain filtering and resilience.
         
         Args:
             query_text: The user's query
             k: Number of chunks to retrieve
+            query_embedding: Precomputed query vector (skips the embedding call)
+            record: Count stats and cache the result now; False defers both to record_query()
+                (speculative retrievals that may be discarded)
             
         Returns:
-            Dictionary containing response, chunks, and metadata
+            Dictionary containing response, chunks, and metadata (plus a
+            "pending_record" for record_query() when record is False)
+        """
+        return self._query(query_text, k, query_embedding, check_cache=True, record=record)
+    
+    def record_query(self, pending: Optional[Dict[str, Any]]):
         """
+        Apply the stats and result-cache write held back by query(..., record=False).
+        
+        Called once a speculative result is actually used, so discarded
+        retrievals never count.
+        """
+        if not pending:
+            return
+        for path in pending["paths"]:
+            self._count_retrieval(path)
+        for query_type, response_time in pending["timings"]:
+            self._record_query_time(query_type, response_time)
+        if pending.get("result") is not None:
+            self._cache_result(pending["query"], pending["active_domains"], pending["k"], pending["result"])
+    
+    def _query(self, query_text: str, k: int, query_embedding: Optional[List[float]],
+               check_cache: bool, record: bool = True) -> Dict[str, Any]:
+        """Run a query, consulting the result cache first unless already checked."""
         start_time = time.time()
         
         # Check system availability
@@ -194,19 +480,47 @@ class OptimizedContextualRAGSystem:
                 start_time, "error"
             )
         
+        self._retrieval.degraded = None
+        self._retrieval.pending = None if record else {"paths": [], "timings": []}
         try:
             # Get domain filtering
             active_domains, domain_filter = self._get_domain_filter()
             
-            # Retrieve documents
-            docs = self._retrieve_documents(query_text, k, domain_filter)
+            # Serve repeated questions from the result cache
+            cached = None
+            if check_cache:
+                cached = self._get_cached_result(query_text, active_domains, k, start_time)
+            
+            if cached is not None:
+                result = cached
+            else:
+                # Retrieve scored documents (single embedding, single search)
+                if query_embedding is not None and not any(query_embedding):
+                    self._mark_degraded("fallback_embedding")
+                scored_docs = self._retrieve_documents(query_text, k, domain_filter, query_embedding)
+                
+                # Handle no results
+                if not scored_docs:
+                    result = self._handle_no_results(active_domains, domain_filter, start_time)
+                else:
+                    # Process successful results
+                    result = self._process_results(scored_docs, active_domains, start_time)
+            
+            # Results of degraded retrievals would outlive the outage, so they are never cached
+            degraded = self._retrieval.degraded
+            if degraded is not None:
+                logger.debug_optimization(f"Degraded retrieval ({degraded}) not cached")
+            cacheable = cached is None and degraded is None
             
-            # Handle no results
-            if not docs:
-                return self._handle_no_results(active_domains, domain_filter, start_time)
+            if record:
+                if cacheable:
+                    self._cache_result(query_text, active_domains, k, result)
+                return result
             
-            # Process successful results
-            return self._process_results(docs, active_domains, start_time)
+            pending = self._retrieval.pending
+            pending.update(query=query_text, active_domains=active_domains, k=k,
+                           result=result if cacheable else None)
+            return {**result, "pending_record": pending}
             
         except Exception as e:
             logger.error(f"RAG query error: {str(e)}")
@@ -214,6 +528,154 @@ class OptimizedContextualRAGSystem:
                 "I encountered an error while searching for information.",
                 start_time, "error", str(e)
             )
+        finally:
+            self._retrieval.pending = None
+    
+    def embed_queries(self, queries: List[str]) -> Optional[List[List[float]]]:
+        """Embed many queries in one batched request with resilience."""
+        if not self.embeddings:
+            return None
+        
+        embed = getattr(self.embeddings, 'embed_queries', self.embeddings.embed_documents)
+        vectors = resilience_manager.execute_with_openai_resilience(embed, queries)
+        
+        # The degraded fallback returns a single vector for the whole batch
+        if vectors and not isinstance(vectors[0], (list, tuple)):
+            vectors = [vectors] * len(queries)
+        return vectors
+    
+    def query_many(self, queries: List[str], k: int = 4) -> List[Dict[str, Any]]:
+        """
+        Query the RAG system for many queries at once.
+        
+        Embeds all queries in one batched request and searches with a single
+        multi-vector collection query, for evaluation, warm-up and replay jobs.
+        Like query(), repeated questions are served from (and fresh results
+        stored in) the result cache, and only cache misses are embedded.
+        
+        Args:
+            queries: Query texts
+            k: Number of chunks to retrieve per query
+            
+        Returns:
+            One dictionary per query, in the same shape as query()
+        """
+        start_time = time.time()
+        if not queries:
+            return []
+        
+        if not self.vectorstore:
+            return [
+                self._create_error_response(
+                    "Vector search is not available. Please check embeddings configuration.",
+                    start_time, "error"
+                )
+                for _ in queries
+            ]
+        
+        try:
+            active_domains, domain_filter = self._get_domain_filter()
+            
+            # Serve repeated questions from the result cache; only misses are embedded and searched
+            results: List[Optional[Dict[str, Any]]] = [
+                self._get_cached_result(query_text, active_domains, k, start_time) for query_text in queries
+            ]
+            misses = [i for i, result in enumerate(results) if result is None]
+            if not misses:
+                return results
+            
+            miss_queries = [queries[i] for i in misses]
+            self._retrieval.degraded = None
+            query_embeddings = self.embed_queries(miss_queries)
+            
+            candidates = k * 2 if self.lexical_index is not None else k
+            vector_results = self._vector_search_many(miss_queries, candidates, domain_filter, query_embeddings)
+            batch_degraded = self._retrieval.degraded
+            
+            for row, (i, scored_docs) in enumerate(zip(misses, vector_results)):
+                query_text = queries[i]
+                if self.lexical_index is not None:
+                    self._count_retrieval('hybrid_queries')
+                    lexical_results = self.lexical_index.search(query_text, k=candidates, where=domain_filter)
+                    scored_docs = reciprocal_rank_fusion([scored_docs, lexical_results], k)
+                
+                if scored_docs:
+                    results[i] = self._process_results(scored_docs, active_domains, start_time)
+                else:
+                    results[i] = self._handle_no_results(active_domains, domain_filter, start_time)
+                
+                # Degraded results (fallback vectors or search) would outlive the outage
+                fallback_vector = query_embeddings is not None and not any(query_embeddings[row])
+                if batch_degraded is None and not fallback_vector:
+                    self._cache_result(query_text, active_domains, k, results[i])
+            
+            logger.debug_optimization(f"Batched retrieval for {len(misses)} of {len(queries)} queries")
+            return results
+            
+        except Exception as e:
+            logger.error(f"RAG batch query error: {str(e)}")
+            return [
+                self._create_error_response(
+                    "I encountered an error while searching for information.",
+                    start_time, "error", str(e)
+                )
+                for _ in queries
+            ]
+    
+    async def aembed_query(self, query_text: str) -> Optional[List[float]]:
+        """Async query embedding; falls back to the resilient sync path on failure."""
+        if not self.embeddings:
+            return None
+        
+        try:
+            return await self.embeddings.aembed_query(query_text)
+        except Exception as e:
+            logger.debug_resilience(f"Async embedding failed, using resilient sync path: {e}")
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self.embed_query, query_text)
+    
+    async def aquery(self, query_text: str, k: int = 4, query_embedding: Optional[List[float]] = None) -> Dict[str, Any]:
+        """
+        Async counterpart of query().
+        
+        The embedding call is awaited natively; the ChromaDB work, the BM25
+        fast-path check and the embedding cache's SQLite tier run on worker
+        threads, so the event loop is never blocked.
+        
+        Returns:
+            Dictionary in the same shape as query()
+        """
+        loop = asyncio.get_running_loop()
+        
+        # Cache hits skip the embedding entirely
+        if self.vectorstore and self.result_cache is not None:
+            active_domains, _ = self._get_domain_filter()
+            cached = await loop.run_in_executor(
+                self.executor, self._get_cached_result, query_text, active_domains, k, time.time()
+            )
+            if cached is not None:
+                return cached
+        
+        if query_embedding is None and self.vectorstore:
+            # The fast-path check scores BM25, so it runs on the executor as well
+            needs_embedding = not self.lexical_fast_path or await loop.run_in_executor(
+                self.executor, self._needs_embedding, query_text, k
+            )
+            if needs_embedding:
+                query_embedding = await self.aembed_query(query_text)
+        
+        return await loop.run_in_executor(
+            self.executor, partial(self._query, query_text, k, query_embedding, check_cache=False)
+        )
+    
+    def _needs_embedding(self, query_text: str, k: int) -> bool:
+        """Check whether retrieval will need a query vector (False on the lexical fast path)."""
+        if self.lexical_index is None or not self.lexical_fast_path:
+            return True
+        
+        _, domain_filter = self._get_domain_filter()
+        lexical_results = self.lexical_index.search(query_text, k=k * 2, where=domain_filter)
+        return not self.lexical_index.is_exact_match(query_text, lexical_results, k)
     
     def _get_domain_filter(self):
         """Get active domains and create filter."""
@@ -230,33 +692,142 @@ class OptimizedContextualRAGSystem:
         
         return active_domains, domain_filter
     
-    def _retrieve_documents(self, query_text: str, k: int, domain_filter: Optional[Dict]):
-        """Retrieve documents with optimization and resilience."""
-        # Standard retrieval
-        if domain_filter:
-            docs = self.vectorstore.similarity_search(query_text, k=k, filter=domain_filter)
-        else:
-            docs = self.vectorstore.similarity_search(query_text, k=k)
+    def _retrieve_documents(self, query_text: str, k: int, domain_filter: Optional[Dict],
+                            query_embedding: Optional[List[float]] = None) -> List[Tuple[Document, float]]:
+        """
+        Retrieve scored documents, fusing BM25 and vector rankings when hybrid search is on.
+        
+        With the lexical fast path enabled, confident keyword matches (see
+        BM25Index.is_exact_match) are answered lexically without any embedding
+        call when no precomputed embedding was passed in.
+        
+        Returns:
+            List of (Document, distance) tuples ordered by ascending distance
+            (rank-derived distances for fused results)
+        """
+        if self.lexical_index is None:
+            return self._vector_search(query_text, k, domain_filter, query_embedding)
+        
+        self._refresh_indexes()
+        candidates = k * 2
+        lexical_results = self.lexical_index.search(query_text, k=candidates, where=domain_filter)
+        
+        # Lexical fast path: confident exact term matches skip the embedding entirely
+        if (self.lexical_fast_path and query_embedding is None and
+                self.lexical_index.is_exact_match(query_text, lexical_results, k)):
+            self._count_retrieval('lexical_fast_path')
+            logger.debug_optimization("Lexical fast path - exact term match, embedding skipped")
+            return reciprocal_rank_fusion([lexical_results], k)
+        
+        self._count_retrieval('hybrid_queries')
+        vector_results = self._vector_search(query_text, candidates, domain_filter, query_embedding)
+        return reciprocal_rank_fusion([vector_results, lexical_results], k)
+    
+    def _vector_search(self, query_text: str, k: int, domain_filter: Optional[Dict],
+                       query_embedding: Optional[List[float]] = None) -> List[Tuple[Document, float]]:
+        """
+        Vector search with a single embedding and a single search.
+        
+        The exact index or direct collection query is the primary path; the
+        LangChain similarity search is only used when those fail.
+        """
+        if self.vector_index is not None and self.embeddings:
+            try:
+                return self._vector_index_query(query_text, k, domain_filter, query_embedding)
+            except Exception as e:
+                logger.debug_optimization(f"Exact vector index failed, using ChromaDB: {e}")
+        
+        if self.domain_partitions is not None and domain_filter and self.embeddings:
+            try:
+                return self._partitioned_query(query_text, k, domain_filter, query_embedding)
+            except Exception as e:
+                logger.debug_optimization(f"Domain partition search failed, using shared collection: {e}")
         
-        # Try optimized ChromaDB query if available
         if (hasattr(self.vectorstore, '_collection') and 
             self.vectorstore._collection and 
             self.embeddings):
             
             try:
-                docs = self._optimized_chromadb_query(query_text, k, domain_filter)
+                return self._optimized_chromadb_query(query_text, k, domain_filter, query_embedding)
             except Exception as e:
                 logger.debug_optimization(f"ChromaDB optimization failed, using fallback: {e}")
         
-        return docs
+        # Fallback: LangChain similarity search (embeds and searches internally)
+        self._mark_degraded("langchain_fallback")
+        if query_embedding is not None:
+            return self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+                query_embedding, k=k, filter=domain_filter
+            )
+        if domain_filter:
+            return self.vectorstore.similarity_search_with_score(query_text, k=k, filter=domain_filter)
+        return self.vectorstore.similarity_search_with_score(query_text, k=k)
     
-    def _optimized_chromadb_query(self, query_text: str, k: int, domain_filter: Optional[Dict]):
-        """Execute optimized ChromaDB query with resilience."""
-        # Generate embedding with resilience
-        def generate_embedding():
-            return self.embeddings.embed_query(query_text)
+    def _vector_search_many(self, queries: List[str], k: int, domain_filter: Optional[Dict],
+                            query_embeddings: Optional[List[List[float]]]) -> List[List[Tuple[Document, float]]]:
+        """Vector search for many precomputed query vectors (one collection query)."""
+        if query_embeddings is not None:
+            if self.vector_index is not None:
+                try:
+                    self._refresh_indexes()
+                    return [self.vector_index.search(embedding, k, where=domain_filter) for embedding in query_embeddings]
+                except Exception as e:
+                    logger.debug_optimization(f"Exact vector index failed, using ChromaDB: {e}")
+            
+            if self.domain_partitions is not None and domain_filter:
+                try:
+                    self._refresh_indexes()
+                    return self.domain_partitions.query(query_embeddings, k, where=domain_filter)
+                except Exception as e:
+                    logger.debug_optimization(f"Domain partition search failed, using shared collection: {e}")
+            
+            if hasattr(self.vectorstore, '_collection') and self.vectorstore._collection:
+                try:
+                    chroma_results = self.vectorstore._collection.query(
+                        query_embeddings=query_embeddings,
+                        n_results=k,
+                        where=domain_filter,
+                        include=["documents", "metadatas", "distances"]
+                    )
+                    return [self._to_scored_docs(chroma_results, row) for row in range(len(queries))]
+                except Exception as e:
+                    logger.debug_optimization(f"Batched ChromaDB query failed, using per-query search: {e}")
+        
+        # Fallback: one search per query
+        return [
+            self._vector_search(query_text, k, domain_filter, query_embeddings[i] if query_embeddings else None)
+            for i, query_text in enumerate(queries)
+        ]
+    
+    def _vector_index_query(self, query_text: str, k: int, domain_filter: Optional[Dict],
+                            query_embedding: Optional[List[float]] = None) -> List[Tuple[Document, float]]:
+        """Execute exact in-process search against the NumPy index."""
+        self._refresh_indexes()
         
-        query_embedding = resilience_manager.execute_with_openai_resilience(generate_embedding)
+        if query_embedding is None:
+            query_embedding = self.embed_query(query_text)
+        
+        scored_docs = self.vector_index.search(query_embedding, k, where=domain_filter)
+        logger.debug_optimization(f"Used in-process vector index ({self.vector_index})")
+        return scored_docs
+    
+    def _partitioned_query(self, query_text: str, k: int, domain_filter: Dict,
+                           query_embedding: Optional[List[float]] = None) -> List[Tuple[Document, float]]:
+        """Fan out over the active domain partitions and merge top-k."""
+        self._refresh_indexes()
+        
+        if query_embedding is None:
+            query_embedding = self.embed_query(query_text)
+        
+        scored_docs = self.domain_partitions.query([query_embedding], k, where=domain_filter)[0]
+        logger.debug_optimization("Used per-domain partitioned search")
+        return scored_docs
+    
+    def _optimized_chromadb_query(self, query_text: str, k: int, domain_filter: Optional[Dict],
+                                  query_embedding: Optional[List[float]] = None) -> List[Tuple[Document, float]]:
+        """Execute optimized ChromaDB query with resilience."""
+        # Generate embedding with resilience unless the turn already has one
+        if query_embedding is None:
+            query_embedding = self.embed_query(query_text)
         
         # Use ChromaDB's optimized query
         chroma_results = self.vectorstore._collection.query(
@@ -266,16 +837,15 @@ class OptimizedContextualRAGSystem:
             include=["documents", "metadatas", "distances"]
         )
         
-        # Convert to LangChain Document format
-        docs = []
-        if chroma_results and chroma_results.get('documents'):
-            for i, doc_text in enumerate(chroma_results['documents'][0]):
-                metadata = chroma_results.get('metadatas', [[]])[0][i] if chroma_results.get('metadatas') else {}
-                docs.append(Document(page_content=doc_text, metadata=metadata))
-            
+        scored_docs = self._to_scored_docs(chroma_results, 0)
+        if scored_docs:
             logger.debug_optimization("Used optimized ChromaDB query with include parameters")
         
-        return docs
+        return scored_docs
+    
+    def _to_scored_docs(self, chroma_results: Optional[Dict[str, Any]], row: int) -> List[Tuple[Document, float]]:
+        """Convert one row of a ChromaDB query result to scored LangChain Documents."""
+        return scored_documents(chroma_results, row)
     
     def _handle_no_results(self, active_domains: List[str], domain_filter: Optional[Dict], start_time: float):
         """Handle case when no documents are found."""
@@ -303,9 +873,10 @@ class OptimizedContextualRAGSystem:
                 }
             }
     
-    def _process_results(self, docs: List[Document], active_domains: List[str], start_time: float):
+    def _process_results(self, scored_docs: List[Tuple[Document, float]], active_domains: List[str], start_time: float):
         """Process successful retrieval results."""
         response_time = time.time() - start_time
+        docs = [doc for doc, _ in scored_docs]
         
         # Count domains in retrieved docs
         doc_domains = set()
@@ -318,16 +889,17 @@ class OptimizedContextualRAGSystem:
         logger.rag_retrieval(len(docs), list(doc_domains))
         
         # Record performance stats
-        if self.stats_collector:
-            self.stats_collector.record_query('rag', response_time)
+        self._record_query_time('rag', response_time)
         
-        # Prepare chunks info
+        # Prepare chunks info (full content; the context packer fits it to the prompt budget)
         chunks_info = []
-        for i, doc in enumerate(docs):
+        for i, (doc, distance) in enumerate(scored_docs):
             chunks_info.append({
-                "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
+                "content": doc.page_content,
                 "metadata": doc.metadata,
-                "chunk_id": i + 1
+                "chunk_id": i + 1,
+                "id": doc.id,
+                "distance": float(distance)
             })
         
         return {
@@ -371,16 +943,41 @@ class OptimizedContextualRAGSystem:
             
             for i in range(0, total_docs, batch_size):
                 batch = documents[i:i + batch_size]
-                self.vectorstore.add_documents(batch)
+                ids = self.vectorstore.add_documents(batch)
+                self._route_to_partitions(ids)
                 logger.debug(f"Added batch {i//batch_size + 1}/{(total_docs + batch_size - 1)//batch_size}")
             
             logger.command_executed(f"Added {total_docs} documents successfully")
+            
+            # Force a staleness check on the next query
+            self.invalidate_indexes()
             return True
             
         except Exception as e:
             logger.error(f"Error in batch addition: {e}")
             return False
     
+    def get_chunk_embeddings(self, ids: List[Optional[str]]) -> Dict[str, List[float]]:
+        """Fetch stored embeddings for retrieved chunks (local read, no embedding call)."""
+        ids = [chunk_id for chunk_id in ids if chunk_id]
+        if not ids or not self.vectorstore:
+            return {}
+        
+        try:
+            rows = self.vectorstore._collection.get(ids=ids, include=["embeddings"])
+            return {chunk_id: embedding for chunk_id, embedding in zip(rows["ids"], rows["embeddings"])}
+        except Exception as e:
+            logger.debug_optimization(f"Could not load chunk embeddings: {e}")
+            return {}
+    
+    def _route_to_partitions(self, ids: List[str]):
+        """Route freshly added chunks to their domain partitions (reusing stored embeddings)."""
+        if self.domain_partitions is None or not ids:
+            return
+        
+        rows = self.vectorstore._collection.get(ids=ids, include=["embeddings", "documents", "metadatas"])
+        self.domain_partitions.add(rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"])
+    
     # System management
     def get_stats(self) -> Dict[str, Any]:
         """Get comprehensive system statistics."""
@@ -391,6 +988,24 @@ class OptimizedContextualRAGSystem:
         # Add vectorstore stats
         stats.update(self.stats_collector.get_vectorstore_stats(self.vectorstore))
         
+        # Add retrieval path stats
+        with self._stats_lock:
+            retrieval_counts = dict(self.retrieval_stats)
+        stats['retrieval'] = {
+            'backend': self.retrieval_backend if self.vector_index is not None else 'chroma',
+            'hybrid_search': self.lexical_index is not None,
+            'domain_partitions': self.domain_partitions.domains if self.domain_partitions is not None else [],
+            **retrieval_counts
+        }
+        
+        # Add retrieval result cache stats
+        if self.result_cache is not None:
+            stats['result_cache'] = self.result_cache.get_stats()
+        
+        # Add embedding cache stats
+        if hasattr(self.embeddings, 'get_stats'):
+            stats['embedding_cache'] = self.embeddings.get_stats()
+        
         # Add resilience stats
         resilience_stats = resilience_manager.get_health_summary()
         stats.update(resilience_stats)
@@ -443,6 +1058,8 @@ class OptimizedContextualRAGSystem:
     def clear_caches(self):
         """Clear all caches."""
         self.stats_collector.reset_query_stats()
+        if self.result_cache is not None:
+            self.result_cache.clear()
         logger.command_executed("Caches cleared")
     
     def __str__(self) -> str:
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Domain Partitions for Esoteric Vectors
+
+Per-domain ChromaDB collections with:
+- One collection per available domain (no metadata pre-filtering)
+- Parallel fan-out across active domains with a merged top-k
+- Ingestion routing by chunk domain metadata
+- Incremental sync from the shared collection (embeddings are copied, never recomputed)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from .vector_index import collection_fingerprint
+from src.utils.logger import logger
+
+
+def scored_documents(chroma_results: Optional[Dict[str, Any]], row: int) -> List[Tuple[Document, float]]:
+    """Convert one row of a ChromaDB query result to (Document, distance) tuples."""
+    scored_docs = []
+    if chroma_results and chroma_results.get('documents'):
+        documents = chroma_results['documents'][row]
+        metadatas = chroma_results['metadatas'][row] if chroma_results.get('metadatas') else [{}] * len(documents)
+        distances = chroma_results['distances'][row] if chroma_results.get('distances') else [0.0] * len(documents)
+        ids = chroma_results['ids'][row] if chroma_results.get('ids') else [None] * len(documents)
+
+        for doc_id, doc_text, metadata, distance in zip(ids, documents, metadatas, distances):
+            scored_docs.append((Document(id=doc_id, page_content=doc_text, metadata=metadata or {}), float(distance)))
+
+    return scored_docs
+
+
+class DomainPartitionedIndex:
+    """
+    One ChromaDB collection per domain, derived from a shared collection.
+
+    Features:
+    - Search cost proportional to the active domains, not the whole corpus
+    - Parallel per-domain queries merged by distance
+    - Fingerprint-based staleness detection like the in-process indexes
+    """
+
+    def __init__(self, client, base_name: str, domains: Iterable[str], space: str = "cosine"):
+        """Open (or create) one partition collection per domain."""
+        self.client = client
+        self.base_name = base_name
+        self.domains = sorted(domains)
+        self.space = space
+        self.fingerprint: Optional[str] = None
+
+        self.collections = self._open_collections()
+        self.executor = ThreadPoolExecutor(max_workers=max(len(self.domains), 1), thread_name_prefix="partition_")
+
+    def partition_name(self, domain: str) -> str:
+        """Collection name for a domain partition."""
+        return f"{self.base_name}__{domain}"
+
+    def _open_collections(self) -> Dict[str, Any]:
+        """Get or create the partition collection for each domain."""
+        return {
+            domain: self.client.get_or_create_collection(
+                name=self.partition_name(domain),
+                metadata={
+                    "type": "domain_partition",
+                    "domain": domain,
+                    "source_collection": self.base_name
+                },
+                configuration={"hnsw": {"space": self.space}}
+            )
+            for domain in self.domains
+        }
+
+    @property
+    def size(self) -> int:
+        """Number of chunks across all partitions."""
+        return sum(collection.count() for collection in self.collections.values())
+
+    def add(self, ids: List[str], embeddings: List[List[float]], documents: List[str],
+            metadatas: List[Dict[str, Any]]) -> int:
+        """
+        Route rows to their domain partitions.
+
+        Returns:
+            Number of rows routed (rows without a known domain stay in the shared collection only)
+        """
+        routed: Dict[str, Dict[str, list]] = {}
+        for row_id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas):
+            domain = (metadata or {}).get("domain")
+            if domain not in self.collections:
+                continue
+            rows = routed.setdefault(domain, {"ids": [], "embeddings": [], "documents": [], "metadatas": []})
+            rows["ids"].append(row_id)
+            rows["embeddings"].append(embedding)
+            rows["documents"].append(document)
+            rows["metadatas"].append(metadata)
+
+        for domain, rows in routed.items():
+            self.collections[domain].upsert(**rows)
+
+        total = sum(len(rows["ids"]) for rows in routed.values())
+        skipped = len(ids) - total
+        if skipped:
+            logger.debug_optimization(f"Domain partitions: {skipped} chunks without a known domain not routed")
+        return total
+
+    def delete(self, ids: List[str]):
+        """Remove rows from every partition."""
+        if not ids:
+            return
+        for collection in self.collections.values():
+            collection.delete(ids=ids)
+
+    def build_from_collection(self, collection, fingerprint: Optional[str] = None):
+        """Incrementally sync the partitions with a shared collection."""
+        source = collection.get(include=["metadatas"])
+        wanted: Dict[str, set] = {domain: set() for domain in self.domains}
+        for row_id, metadata in zip(source.get("ids") or [], source.get("metadatas") or []):
+            domain = (metadata or {}).get("domain")
+            if domain in wanted:
+                wanted[domain].add(row_id)
+
+        missing: List[str] = []
+        removed = 0
+        for domain, partition in self.collections.items():
+            existing = set(partition.get(include=[]).get("ids") or [])
+            stale = list(existing - wanted[domain])
+            if stale:
+                partition.delete(ids=stale)
+                removed += len(stale)
+            missing.extend(wanted[domain] - existing)
+
+        if missing:
+            rows = collection.get(ids=missing, include=["embeddings", "documents", "metadatas"])
+            self.add(rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"])
+
+        self.fingerprint = fingerprint or collection_fingerprint(collection)
+        logger.debug_optimization(f"Domain partitions synced: +{len(missing)} / -{removed} chunks")
+
+    def _domains_for(self, where: Optional[Dict[str, Any]]) -> List[str]:
+        """Translate a Chroma-style domain filter into the partitions to search."""
+        if not where:
+            return self.domains
+
+        condition = where.get("domain")
+        if isinstance(condition, dict):
+            domains = condition.get("$in", [])
+        else:
+            domains = [condition]
+        return [domain for domain in domains if domain in self.collections]
+
+    def query(self, query_embeddings: List[List[float]], k: int = 4,
+              where: Optional[Dict[str, Any]] = None) -> List[List[Tuple[Document, float]]]:
+        """
+        Search the partitions selected by the filter and merge top-k per query.
+
+        Returns:
+            One list of (Document, distance) tuples per query vector, ordered by ascending distance
+        """
+        domains = self._domains_for(where)
+        if not domains:
+            return [[] for _ in query_embeddings]
+
+        def search(domain: str):
+            return self.collections[domain].query(
+                query_embeddings=query_embeddings,
+                n_results=k,
+                include=["documents", "metadatas", "distances"]
+            )
+
+        if len(domains) == 1:
+            domain_results = [search(domains[0])]
+        else:
+            domain_results = list(self.executor.map(search, domains))
+
+        merged = []
+        for row in range(len(query_embeddings)):
+            candidates = []
+            for results in domain_results:
+                candidates.extend(scored_documents(results, row))
+            candidates.sort(key=lambda item: item[1])
+            merged.append(candidates[:k])
+        return merged
+
+    def clear(self):
+        """Drop and recreate every partition collection."""
+        for domain in self.domains:
+            try:
+                self.client.delete_collection(name=self.partition_name(domain))
+            except Exception:
+                pass  # Partition might not exist
+        self.collections = self._open_collections()
+        self.fingerprint = None
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"DomainPartitionedIndex({self.base_name}, domains={self.domains})"
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Embedding Service for Esoteric Vectors
+
+Process-wide query embedding service with:
+- In-memory LRU cache keyed on normalized text and model
+- Persistent SQLite store with size-bounded eviction
+- LangChain Embeddings interface (drop-in for vectorstores)
+- Configurable output dimensions (text-embedding-3 models)
+- Clean logging
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from src.utils.logger import logger
+
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+DEFAULT_EMBEDDING_DIMENSIONS = 1536
+
+
+def get_embedding_dimensions() -> int:
+    """Configured embedding dimensions (ESOTERIC_EMBEDDING_DIMENSIONS, default 1536)."""
+    return int(os.getenv('ESOTERIC_EMBEDDING_DIMENSIONS', DEFAULT_EMBEDDING_DIMENSIONS))
+
+
+def collection_name_for(base_name: str, dimensions: Optional[int] = None) -> str:
+    """
+    Name of the collection holding vectors of the given dimensions.
+
+    The default dimensions keep the base name, so existing collections are
+    used unchanged; reduced-dimension collections get a suffix, e.g.
+    "contextual_rag_collection_512d".
+    """
+    dimensions = dimensions or get_embedding_dimensions()
+    if dimensions == DEFAULT_EMBEDDING_DIMENSIONS:
+        return base_name
+    return f"{base_name}_{dimensions}d"
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys (case and whitespace insensitive)."""
+    return " ".join(text.split()).casefold()
+
+
+class EmbeddingService(Embeddings):
+    """
+    Shared embedding service with a two-tier query embedding cache.
+
+    Features:
+    - LRU memory tier for hot queries
+    - SQLite disk tier that survives restarts
+    - Bounded disk size with least-recently-used eviction
+    - Single-flight misses: concurrent requests for one query share a single call
+    - Document embeddings pass straight through (ingestion is one-off)
+    """
+
+    def __init__(self,
+                 model: str = DEFAULT_EMBEDDING_MODEL,
+                 dimensions: Optional[int] = None,
+                 cache_path: str = "data/embedding_cache/query_embeddings.sqlite",
+                 memory_cache_size: int = 2048,
+                 max_disk_entries: int = 50000,
+                 client: Optional[Embeddings] = None):
+        """
+        Initialize the embedding service.
+
+        Args:
+            dimensions: Output vector size. Defaults to the ESOTERIC_EMBEDDING_DIMENSIONS
+                environment variable (1536, the native size of text-embedding-3-small).
+        """
+        self.model = model
+        self.dimensions = dimensions or get_embedding_dimensions()
+        self.cache_path = cache_path
+        self.memory_cache_size = memory_cache_size
+        self.max_disk_entries = max_disk_entries
+
+        # Underlying embedding client
+        self.client = client or OpenAIEmbeddings(
+            model=model,
+            dimensions=self.dimensions,
+            show_progress_bar=False,
+            max_retries=3,
+            timeout=30.0
+        )
+
+        # Cache state
+        self._memory_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.RLock()  # Memory tier, stats and in-flight misses
+        self._db_lock = threading.Lock()  # Disk tier, separate so memory hits never wait on SQLite
+        self._db = None
+        self._writes_since_prune = 0
+        self._in_flight: Dict[str, Future] = {}
+
+        # Performance tracking
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'coalesced': 0
+        }
+
+        self._setup_disk_cache()
+        logger.debug_openai(f"Embedding service initialized for {model} ({self.dimensions} dims)")
+
+    def _setup_disk_cache(self):
+        """Initialize the persistent SQLite cache."""
+        if not self.cache_path:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_query_embeddings_access ON query_embeddings(last_access)"
+            )
+            self._db.commit()
+            logger.debug_optimization(f"Embedding disk cache ready at {self.cache_path}")
+        except Exception as e:
+            logger.warning(f"Embedding disk cache unavailable, using memory only: {e}")
+            self._db = None
+
+    @property
+    def model_tag(self) -> str:
+        """Model name qualified with non-default dimensions (vectors of different sizes never mix)."""
+        if self.dimensions == DEFAULT_EMBEDDING_DIMENSIONS:
+            return self.model
+        return f"{self.model}@{self.dimensions}"
+
+    def _cache_key(self, text: str) -> str:
+        """Build cache key from normalized text and model tag."""
+        return hashlib.sha256(f"{self.model_tag}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _get_cached(self, key: str) -> Optional[List[float]]:
+        """Look up a vector in the memory tier, then the disk tier."""
+        vector = self._get_memory(key)
+        if vector is not None:
+            return vector
+        return self._get_disk(key)
+
+    def _get_memory(self, key: str) -> Optional[List[float]]:
+        """Look up a vector in the memory tier (no I/O, safe on the event loop)."""
+        with self._lock:
+            vector = self._memory_cache.get(key)
+            if vector is not None:
+                self._memory_cache.move_to_end(key)
+                self.stats['memory_hits'] += 1
+            return vector
+
+    def _get_disk(self, key: str) -> Optional[List[float]]:
+        """Look up a vector in the disk tier and promote it to the memory tier."""
+        if self._db is None:
+            return None
+
+        with self._db_lock:
+            try:
+                row = self._db.execute(
+                    "SELECT vector FROM query_embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                self._db.execute(
+                    "UPDATE query_embeddings SET last_access = ? WHERE key = ?", (time.time(), key)
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.debug_optimization(f"Embedding disk cache read failed: {e}")
+                return None
+
+        vector = np.frombuffer(row[0], dtype=np.float32).tolist()
+        with self._lock:
+            self._remember(key, vector)
+            self.stats['disk_hits'] += 1
+        return vector
+
+    def _remember(self, key: str, vector: List[float]):
+        """Insert into the memory tier with LRU eviction."""
+        self._memory_cache[key] = vector
+        self._memory_cache.move_to_end(key)
+        while len(self._memory_cache) > self.memory_cache_size:
+            self._memory_cache.popitem(last=False)
+
+    def _store(self, key: str, vector: List[float]):
+        """Store a freshly computed vector in both tiers."""
+        # Never cache degraded (all-zero) fallback vectors
+        if not any(vector):
+            return
+
+        with self._lock:
+            self._remember(key, vector)
+
+        if self._db is None:
+            return
+
+        with self._db_lock:
+            try:
+                now = time.time()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, model, vector, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, self.model_tag, np.asarray(vector, dtype=np.float32).tobytes(), now, now)
+                )
+                self._db.commit()
+
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 100:
+                    self._prune_disk_cache()
+            except Exception as e:
+                logger.debug_optimization(f"Embedding disk cache write failed: {e}")
+
+    def _prune_disk_cache(self):
+        """Evict least recently used disk entries beyond the size bound."""
+        self._writes_since_prune = 0
+        count = self._db.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+        excess = count - self.max_disk_entries
+        if excess <= 0:
+            return
+
+        self._db.execute(
+            "DELETE FROM query_embeddings WHERE key IN "
+            "(SELECT key FROM query_embeddings ORDER BY last_access ASC LIMIT ?)",
+            (excess,)
+        )
+        self._db.commit()
+        logger.debug_optimization(f"Evicted {excess} embeddings from disk cache")
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, serving repeated questions from cache."""
+        key = self._cache_key(text)
+        vector = self._get_cached(key)
+        if vector is not None:
+            return vector
+
+        future, owner = self._claim(key)
+        if not owner:
+            return future.result()
+        return self._resolve(key, future, lambda: self.client.embed_query(text))
+
+    def _claim(self, key: str):
+        """Join the in-flight request for a key, or register a new one. Returns (future, owner)."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+                return future, False
+
+            future = Future()
+            vector = self._memory_cache.get(key)  # Stored by a request that finished since the lookup
+            if vector is not None:
+                future.set_result(vector)
+                return future, False
+
+            self._in_flight[key] = future
+            self.stats['misses'] += 1
+            return future, True
+
+    def _resolve(self, key: str, future: Future, compute):
+        """Compute a claimed miss, cache it and hand the result to every waiter."""
+        try:
+            vector = compute()
+            self._store(key, vector)
+            future.set_result(vector)
+            return vector
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many queries, serving cached ones and batching the rest into one request."""
+        vectors: List[Optional[List[float]]] = []
+        missing: Dict[str, List[int]] = {}
+
+        for i, text in enumerate(texts):
+            key = self._cache_key(text)
+            vector = self._get_cached(key)
+            vectors.append(vector)
+            if vector is None:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            with self._lock:
+                self.stats['misses'] += len(missing)
+
+            keys = list(missing)
+            computed = self.client.embed_documents([texts[missing[key][0]] for key in keys])
+            for key, vector in zip(keys, computed):
+                self._store(key, vector)
+                for i in missing[key]:
+                    vectors[i] = vector
+
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents for ingestion (not cached)."""
+        return self.client.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Async query embedding: memory hits are served on the event loop, the
+        SQLite tier is read and written in a worker thread, misses use the
+        async client.
+        """
+        key = self._cache_key(text)
+        vector = self._get_memory(key)
+        if vector is not None:
+            return vector
+
+        vector = await asyncio.to_thread(self._get_disk, key)
+        if vector is not None:
+            return vector
+
+        with self._lock:
+            self.stats['misses'] += 1
+
+        vector = await self.client.aembed_query(text)
+        await asyncio.to_thread(self._store, key, vector)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async document embedding for ingestion (not cached)."""
+        return await self.client.aembed_documents(texts)
+
+    def clear_cache(self):
+        """Clear both cache tiers."""
+        with self._lock:
+            self._memory_cache.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM query_embeddings")
+                self._db.commit()
+        logger.command_executed("Embedding cache cleared")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get embedding cache statistics."""
+        disk_entries = 0
+        if self._db is not None:
+            with self._db_lock:
+                try:
+                    disk_entries = self._db.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+                except Exception:
+                    pass
+
+        with self._lock:
+            lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+            hits = self.stats['memory_hits'] + self.stats['disk_hits']
+
+            return {
+                'model': self.model,
+                'dimensions': self.dimensions,
+                'memory_entries': len(self._memory_cache),
+                'disk_entries': disk_entries,
+                'memory_hits': self.stats['memory_hits'],
+                'disk_hits': self.stats['disk_hits'],
+                'misses': self.stats['misses'],
+                'coalesced': self.stats['coalesced'],
+                'hit_rate': (hits / lookups * 100) if lookups > 0 else 0
+            }
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"EmbeddingService(model={self.model_tag}, memory={len(self._memory_cache)}/{self.memory_cache_size})"
+
+
+# Process-wide embedding service (created on first use)
+_embedding_service: Optional[EmbeddingService] = None
+_embedding_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Get the shared embedding service, creating it on first use."""
+    global _embedding_service
+    with _embedding_service_lock:
+        if _embedding_service is None:
+            _embedding_service = EmbeddingService()
+        return _embedding_service
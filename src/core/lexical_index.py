@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Lexical Index for Esoteric Vectors
+
+In-memory keyword retrieval with:
+- Inverted index with BM25 scoring
+- Domain filtering compatible with Chroma-style filters
+- Reciprocal-rank fusion with vector rankings
+- Exact term-match detection for the embedding-free fast path
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+from src.utils.logger import logger
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS: Set[str] = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from',
+    'how', 'i', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'so', 'that', 'the',
+    'this', 'to', 'what', 'when', 'which', 'who', 'why', 'with', 'you', 'your'
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics and drop stopwords."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[Document, float]]], k: int,
+                           rrf_k: int = 60) -> List[Tuple[Document, float]]:
+    """
+    Fuse several ranked result lists with reciprocal-rank fusion.
+
+    Documents are matched across rankings by content. The returned score is a
+    rank-derived distance (0.0 for the best fused document), so fused results
+    keep the ascending-distance convention of the vector search.
+    """
+    fused_scores: Dict[str, float] = defaultdict(float)
+    documents: Dict[str, Document] = {}
+
+    for ranking in rankings:
+        for rank, (doc, _) in enumerate(ranking):
+            key = doc.page_content
+            fused_scores[key] += 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(key, doc)
+
+    if not fused_scores:
+        return []
+
+    ordered = sorted(fused_scores.items(), key=lambda item: item[1], reverse=True)[:k]
+    best_score = ordered[0][1]
+    return [(documents[key], 1.0 - score / best_score) for key, score in ordered]
+
+
+class LexicalSnapshot(NamedTuple):
+    """Immutable index contents, published with a single reference assignment."""
+    ids: List[Optional[str]] = []
+    documents: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+    doc_terms: List[Set[str]] = []
+    doc_lengths: List[int] = []
+    avg_doc_length: float = 0.0
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    idf: Dict[str, float] = {}
+    fingerprint: Optional[str] = None
+
+
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 scoring.
+
+    Features:
+    - Postings lists of (row, term frequency) per token
+    - Domain filtering through row-level domain labels
+    - Exact term-match checks for high-confidence keyword queries
+    - Contents swapped as one immutable snapshot, so searches never mix old and new postings
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Initialize an empty index."""
+        self.k1 = k1
+        self.b = b
+        self._snapshot = LexicalSnapshot()
+
+    @property
+    def size(self) -> int:
+        """Number of indexed documents."""
+        return len(self._snapshot.documents)
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """Fingerprint of the collection the index was built from."""
+        return self._snapshot.fingerprint
+
+    @property
+    def ids(self) -> List[Optional[str]]:
+        """Row ids."""
+        return self._snapshot.ids
+
+    @property
+    def documents(self) -> List[str]:
+        """Row documents."""
+        return self._snapshot.documents
+
+    @property
+    def metadatas(self) -> List[Dict[str, Any]]:
+        """Row metadata."""
+        return self._snapshot.metadatas
+
+    @property
+    def postings(self) -> Dict[str, List[Tuple[int, int]]]:
+        """(row, term frequency) postings per term."""
+        return self._snapshot.postings
+
+    @property
+    def idf(self) -> Dict[str, float]:
+        """Inverse document frequency per term."""
+        return self._snapshot.idf
+
+    def build(self, documents: List[str], metadatas: List[Dict[str, Any]], fingerprint: Optional[str] = None,
+              ids: Optional[List[str]] = None):
+        """Build the inverted index from chunk texts, their metadata and (optionally) their ids."""
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        doc_terms = []
+        doc_lengths = []
+
+        for row, text in enumerate(documents):
+            tokens = tokenize(text)
+            counts = Counter(tokens)
+            for term, tf in counts.items():
+                postings[term].append((row, tf))
+            doc_terms.append(set(counts))
+            doc_lengths.append(len(tokens))
+
+        total = len(documents)
+        postings = dict(postings)
+        idf = {
+            term: math.log(1 + (total - len(rows) + 0.5) / (len(rows) + 0.5))
+            for term, rows in postings.items()
+        }
+        self._snapshot = LexicalSnapshot(
+            ids=list(ids) if ids else [None] * total,
+            documents=list(documents),
+            metadatas=[metadata or {} for metadata in metadatas],
+            doc_terms=doc_terms,
+            doc_lengths=doc_lengths,
+            avg_doc_length=(sum(doc_lengths) / total) if total else 0.0,
+            postings=postings,
+            idf=idf,
+            fingerprint=fingerprint
+        )
+
+        logger.debug_optimization(f"BM25 index built: {total} documents, {len(postings)} terms")
+
+    def build_from_collection(self, collection, fingerprint: Optional[str] = None):
+        """Build the index from the chunks stored in a ChromaDB collection."""
+        results = collection.get(include=["documents", "metadatas"])
+        self.build(results.get("documents") or [], results.get("metadatas") or [], fingerprint, results.get("ids"))
+
+    def _allowed_domains(self, where: Optional[Dict[str, Any]]) -> Optional[Set[str]]:
+        """Translate a Chroma-style domain filter into a domain set."""
+        if not where:
+            return None
+        condition = where.get("domain")
+        if isinstance(condition, dict):
+            return set(condition.get("$in", []))
+        return {condition}
+
+    def search(self, query: str, k: int = 4, where: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """
+        BM25 search.
+
+        Returns:
+            List of (Document, BM25 score) tuples ordered by descending score
+        """
+        snapshot = self._snapshot  # One consistent view for the whole search
+        terms = set(tokenize(query))
+        if not terms or not snapshot.documents:
+            return []
+
+        allowed_domains = self._allowed_domains(where)
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term in terms:
+            idf = snapshot.idf.get(term)
+            if idf is None:
+                continue
+            for row, tf in snapshot.postings[term]:
+                if allowed_domains is not None and snapshot.metadatas[row].get("domain") not in allowed_domains:
+                    continue
+                length_norm = 1 - self.b + self.b * snapshot.doc_lengths[row] / (snapshot.avg_doc_length or 1.0)
+                scores[row] += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [
+            (Document(id=snapshot.ids[row], page_content=snapshot.documents[row],
+                      metadata=dict(snapshot.metadatas[row])), score)
+            for row, score in ranked
+        ]
+
+    def is_exact_match(self, query: str, results: List[Tuple[Document, float]], k: int,
+                       max_terms: int = 3, min_idf: float = 1.0, min_margin: float = 0.5) -> bool:
+        """
+        Check whether keyword results are confident enough to skip embeddings.
+
+        True when the query is a short keyword query, its terms are
+        discriminative (summed IDF of at least ``min_idf``), each of the top-k
+        results contains every query term, and the k-th BM25 score beats the
+        best score outside the top-k by at least ``min_margin`` (relative).
+        Term overlap alone is not enough: common terms or near-tied runners-up
+        leave the ranking to the vector search.
+        """
+        terms = set(tokenize(query))
+        if not terms or len(terms) > max_terms or len(results) < k:
+            return False
+
+        idf = self._snapshot.idf
+        if sum(idf.get(term, 0.0) for term in terms) < min_idf:
+            return False
+
+        for doc, _ in results[:k]:
+            doc_terms = set(tokenize(doc.page_content))
+            if not terms.issubset(doc_terms):
+                return False
+
+        if len(results) > k and results[k - 1][1] < (1 + min_margin) * results[k][1]:
+            return False
+        return True
+
+    def __str__(self) -> str:
+        """String representation."""
+        snapshot = self._snapshot
+        return f"BM25Index({len(snapshot.documents)} documents, {len(snapshot.postings)} terms)"
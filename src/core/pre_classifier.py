@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Local Pre-Classifier for Esoteric Vectors
+
+Zero-LLM message classification ahead of the combined classifier call:
+- Rules for greetings, current lunar phase/date questions and command-like input
+- Nearest-centroid classification over embeddings of labelled examples
+- Confident decisions skip the LLM call; everything else defers to it
+- Share of skipped LLM calls tracked for stats
+- Agreement with the LLM classifier measured offline (tools/evaluate_pre_classifier.py)
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from src.utils.logger import logger
+
+
+class PreClassification(NamedTuple):
+    """Local decision in CombinedDecision terms, plus the stage that made it."""
+    message_type: str
+    should_use_rag: bool
+    source: str
+
+
+# Labelled examples: (message, message_type, should_use_rag). Emotional messages always use RAG.
+LABELLED_EXAMPLES: List[Tuple[str, str, bool]] = [
+    ("I feel so anxious and I don't know why", "emotional", True),
+    ("I've been really sad since my breakup", "emotional", True),
+    ("I feel disconnected from everyone lately", "emotional", True),
+    ("I'm overwhelmed and can't stop crying", "emotional", True),
+    ("My mother and I keep fighting and it hurts", "emotional", True),
+    ("I feel restless tonight and can't sleep", "emotional", True),
+    ("I'm scared I will never find my purpose", "emotional", True),
+    ("Part of me wants to change but another part is afraid", "emotional", True),
+    ("What does the Tower card mean in tarot?", "logical", True),
+    ("What are the healing properties of amethyst?", "logical", True),
+    ("How do I calculate my life path number?", "logical", True),
+    ("What is Internal Family Systems therapy?", "logical", True),
+    ("Which rituals suit the waning moon?", "logical", True),
+    ("Explain shadow work and how to practice it", "logical", True),
+    ("What does Saturn return mean in astrology?", "logical", True),
+    ("How do I set intentions on the new moon?", "logical", True),
+    ("What's the capital of France?", "logical", False),
+    ("How long should I boil an egg?", "logical", False),
+    ("What's the weather like in spring?", "logical", False),
+    ("Can you recommend a good pasta recipe?", "logical", False),
+    ("How many days are in a leap year?", "logical", False),
+    ("Translate good night into Spanish", "logical", False),
+    ("What year did the first moon landing happen?", "logical", False),
+    ("How do I convert miles to kilometers?", "logical", False),
+]
+
+
+class PreClassifier:
+    """
+    Local classifier that answers confident cases without an LLM call.
+
+    Features:
+    - Anchored rules, so longer messages never match by accident
+    - Centroids from cached example embeddings (one batch at startup)
+    - Query embedding shared with the Q&A cache and RAG via the embedding cache
+    - Thread-safe counters for rule, centroid and deferred decisions
+    """
+
+    # Complete short utterances only: a greeting plus optional filler, then punctuation and the end
+    GREETING_PATTERN = re.compile(
+        r"^(hi|hello|hey|hiya|howdy|good (morning|afternoon|evening|night)|thanks|thank you|thx|ty|"
+        r"ok|okay|cool|great|nice|bye|goodbye|see you)"
+        r"( there| again| so much| a lot| everyone| all)?[\s!.,]*$"
+    )
+
+    LUNAR_DATE_PATTERNS = [
+        re.compile(r"^(what|which)('s|\s+is)\s+(the\s+)?(current\s+|today's\s+)?(moon|lunar)\s+phase"
+                   r"(\s+(today|tonight|now|right now))?[\W_]*$"),
+        re.compile(r"^what\s+phase\s+is\s+the\s+moon(\s+in)?(\s+(today|tonight|now|right now))?[\W_]*$"),
+        re.compile(r"^(when|what date)('s|\s+is)\s+the\s+next\s+(full|new)\s+moon[\W_]*$"),
+        re.compile(r"^(how\s+(full|bright|illuminated)\s+is\s+the\s+moon|what('s|\s+is)\s+the\s+moon('s)?\s+"
+                   r"illumination)(\s+(today|tonight|now|right now))?[\W_]*$"),
+        re.compile(r"^is\s+(it|the\s+moon)\s+(a\s+)?(full|new|waxing|waning)(\s+moon)?\s+(today|tonight|now)[\W_]*$"),
+    ]
+
+    # Exact command forms; bare topic words such as "moon" are content questions here
+    COMMAND_PATTERN = re.compile(
+        r"^(/\w+|help|exit|quit|clear|reset|stats|memory( status| clear)?|(qa )?cache( stats)? clear|domains|"
+        r"debug (on|off)|session (list|info)|(domains|memory) (enable|disable) \w+|session (change|delete) \S+)$"
+    )
+
+    def __init__(self, embeddings=None, examples: Optional[List[Tuple[str, str, bool]]] = None,
+                 min_margin: float = 0.06, min_similarity: float = 0.3):
+        """
+        Initialize the pre-classifier.
+
+        Args:
+            embeddings: Embedding service (embed_query / embed_queries); None keeps rules only
+            examples: Labelled (message, message_type, should_use_rag) examples
+            min_margin: Required similarity lead of the nearest centroid, per decision
+            min_similarity: Required similarity to the nearest centroid
+        """
+        self.embeddings = embeddings
+        self.min_margin = min_margin
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self.stats = {'rule': 0, 'centroid': 0, 'deferred': 0}
+
+        # Two heads: message type and RAG use, each a pair of unit centroids
+        self.type_labels: List[str] = []
+        self.type_centroids: Optional[np.ndarray] = None
+        self.rag_centroids: Optional[np.ndarray] = None
+        if embeddings is not None:
+            self._build_centroids(examples or LABELLED_EXAMPLES)
+
+    def _build_centroids(self, examples: List[Tuple[str, str, bool]]):
+        """Embed the labelled examples (cached after the first run) and average them per label."""
+        try:
+            vectors = np.asarray(self.embeddings.embed_queries([text for text, _, _ in examples]), dtype=np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            types = np.array([message_type for _, message_type, _ in examples])
+            rag = np.array([should_use_rag for _, _, should_use_rag in examples])
+
+            def centroid(mask):
+                mean = vectors[mask].mean(axis=0)
+                return mean / max(np.linalg.norm(mean), 1e-12)
+
+            self.type_labels = sorted(set(types))
+            self.type_centroids = np.stack([centroid(types == label) for label in self.type_labels])
+            self.rag_centroids = np.stack([centroid(~rag), centroid(rag)])
+            logger.debug_optimization(f"Pre-classifier: {len(examples)} labelled examples embedded")
+        except Exception as e:
+            logger.warning(f"Pre-classifier: Centroid stage disabled ({e})")
+            self.type_centroids = self.rag_centroids = None
+
+    def rule_decision(self, message: str) -> Optional[PreClassification]:
+        """Rule stage only, without counting (greetings, current lunar phase/date questions, commands)."""
+        text = " ".join(message.lower().split())
+        if (self.GREETING_PATTERN.match(text) or self.COMMAND_PATTERN.match(text)
+                or any(pattern.match(text) for pattern in self.LUNAR_DATE_PATTERNS)):
+            return PreClassification("logical", False, "rule")
+        return None
+
+    def _nearest(self, centroids: np.ndarray, vector: np.ndarray) -> Optional[int]:
+        """Index of the nearest centroid if it clears the similarity and margin bars."""
+        similarities = centroids @ vector
+        order = np.argsort(-similarities)
+        best, runner_up = similarities[order[0]], similarities[order[1]]
+        if best < self.min_similarity or best - runner_up < self.min_margin:
+            return None
+        return int(order[0])
+
+    def _apply_centroids(self, message: str) -> Optional[PreClassification]:
+        """Nearest-centroid decision when both heads are confident."""
+        if self.type_centroids is None or self.rag_centroids is None:
+            return None
+
+        vector = np.asarray(self.embeddings.embed_query(message), dtype=np.float32)
+        vector /= max(np.linalg.norm(vector), 1e-12)
+
+        type_index = self._nearest(self.type_centroids, vector)
+        rag_index = self._nearest(self.rag_centroids, vector)
+        if type_index is None or rag_index is None:
+            return None
+
+        message_type, should_use_rag = self.type_labels[type_index], bool(rag_index)
+        if message_type == "emotional" and not should_use_rag:
+            return None  # Contradicts the labelling policy; let the LLM decide
+        return PreClassification(message_type, should_use_rag, "centroid")
+
+    def classify(self, message: str) -> Optional[PreClassification]:
+        """
+        Classify a message locally.
+
+        Args:
+            message: User message
+
+        Returns:
+            The decision if a rule or both centroid heads are confident, else None (use the LLM)
+        """
+        decision = None
+        try:
+            decision = self.rule_decision(message or "")
+            if decision is None and message and message.strip():
+                decision = self._apply_centroids(message)
+        except Exception as e:
+            logger.debug_optimization(f"Pre-classifier error, deferring to LLM: {e}")
+            decision = None
+
+        with self._lock:
+            self.stats[decision.source if decision else 'deferred'] += 1
+        return decision
+
+    def get_stats(self) -> Dict[str, float]:
+        """Decision counts and the share of LLM classifier calls skipped (percent)."""
+        with self._lock:
+            stats = dict(self.stats)
+        total = sum(stats.values())
+        stats['total'] = total
+        stats['skip_rate'] = ((stats['rule'] + stats['centroid']) / total * 100) if total else 0.0
+        return stats
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"PreClassifier(centroids={self.type_centroids is not None}, skip_rate={self.get_stats()['skip_rate']:.1f}%)"
+
+
+def measure_agreement(decisions: List[Optional[PreClassification]],
+                      reference: List[Tuple[str, bool]]) -> Dict[str, Any]:
+    """
+    Compare local decisions with reference (LLM classifier) decisions.
+
+    Args:
+        decisions: PreClassifier.classify() result per message (None = deferred)
+        reference: (message_type, should_use_rag) per message
+
+    Returns:
+        Coverage (share decided locally) and, over decided messages, the share
+        agreeing on message type, on RAG use and on both - overall and per
+        stage - plus the indexes of disagreeing messages
+    """
+    def summarize(pairs):
+        decided = len(pairs)
+        return {
+            'decided': decided,
+            'type_agreement': sum(d.message_type == r[0] for _, d, r in pairs) / decided if decided else None,
+            'rag_agreement': sum(d.should_use_rag == r[1] for _, d, r in pairs) / decided if decided else None,
+            'agreement': sum((d.message_type, d.should_use_rag) == tuple(r) for _, d, r in pairs) / decided
+            if decided else None
+        }
+
+    pairs = [(i, decision, ref) for i, (decision, ref) in enumerate(zip(decisions, reference)) if decision is not None]
+    report = summarize(pairs)
+    report['total'] = len(reference)
+    report['coverage'] = len(pairs) / len(reference) if reference else 0.0
+    report['by_source'] = {
+        source: summarize([pair for pair in pairs if pair[1].source == source]) for source in ('rule', 'centroid')
+    }
+    report['disagreements'] = [i for i, d, r in pairs if (d.message_type, d.should_use_rag) != tuple(r)]
+    return report
@@ -19,6 +19,7 @@ from src.utils.resilience import (
     graceful_degradation
 )
 from src.utils.logger import logger
+from .embedding_service import get_embedding_dimensions
 
 class ResilienceManager:
     """
@@ -42,8 +43,8 @@ class ResilienceManager:
             # Embedding fallback
             def embedding_fallback(*args, **kwargs):
                 logger.debug_resilience("Using cached embeddings fallback")
-                # Return a default embedding vector (1536 dimensions for text-embedding-3-small)
-                return [0.0] * 1536
+                # Return a zero vector matching the configured embedding dimensions
+                return [0.0] * get_embedding_dimensions()
             
             graceful_degradation.register_fallback("openai_embeddings", embedding_fallback)
             logger.debug_resilience("Registered fallback for openai_embeddings")
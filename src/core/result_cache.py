@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Retrieval Result Cache for Esoteric Vectors
+
+Query-level cache in front of RAG retrieval with:
+- Keys on normalized query text, sorted active domains and k
+- TTL and LRU bounds
+- Corpus-version invalidation (any ingestion change drops all entries)
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .embedding_service import normalize_text
+from src.utils.logger import logger
+
+
+CacheKey = Tuple[str, Tuple[str, ...], int]
+
+
+class RetrievalResultCache:
+    """
+    Thread-safe TTL + LRU cache for retrieval results.
+
+    Features:
+    - Near-identical questions (case/whitespace) share one entry
+    - Entries expire after a TTL and the oldest are evicted beyond the size bound
+    - Bound to a corpus version; a version change clears the cache
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600.0):
+        """Initialize an empty cache."""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.corpus_version: Optional[int] = None
+
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Performance tracking
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0
+        }
+
+    @staticmethod
+    def make_key(query_text: str, active_domains: Iterable[str], k: int) -> CacheKey:
+        """Build a cache key from normalized text, sorted domains and k."""
+        return normalize_text(query_text), tuple(sorted(active_domains or [])), k
+
+    def sync_version(self, corpus_version: int):
+        """Bind the cache to a corpus version, clearing it if the version changed."""
+        with self._lock:
+            if corpus_version == self.corpus_version:
+                return
+            if self._entries:
+                self.stats['invalidations'] += 1
+                logger.debug_optimization(
+                    f"Corpus version {self.corpus_version} -> {corpus_version}, "
+                    f"dropping {len(self._entries)} cached retrievals"
+                )
+            self._entries.clear()
+            self.corpus_version = corpus_version
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        """Return a copy of a fresh cached result, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key: CacheKey, result: Dict[str, Any]):
+        """Store a result, evicting least recently used entries beyond the bound."""
+        with self._lock:
+            self._entries[key] = (time.time(), copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get result cache statistics."""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'corpus_version': self.corpus_version,
+                'hit_rate': (self.stats['hits'] / lookups * 100) if lookups > 0 else 0,
+                **self.stats
+            }
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"RetrievalResultCache({len(self._entries)}/{self.max_entries} entries, version={self.corpus_version})"
@@ -50,6 +50,13 @@ class StatsCollector:
             'toggles': defaultdict(int)  # Track toggle operations
         }
         
+        # Context packing tracking
+        self.context_stats = {
+            'packs': 0,
+            'section_tokens': defaultdict(int),
+            'duplicates_dropped': 0
+        }
+        
         # System start time
         self.start_time = datetime.now()
         
@@ -64,6 +71,25 @@ class StatsCollector:
         
         logger.debug(f"Recorded {query_type} query: {response_time:.3f}s")
     
+    def record_context_pack(self, section_tokens: Dict[str, int], duplicates_dropped: int = 0):
+        """Record the tokens used per prompt section by the context packer."""
+        self.context_stats['packs'] += 1
+        for section, tokens in section_tokens.items():
+            self.context_stats['section_tokens'][section] += tokens
+        self.context_stats['duplicates_dropped'] += duplicates_dropped
+    
+    def get_context_stats(self) -> Dict[str, Any]:
+        """Get context packing statistics (average tokens per section)."""
+        packs = self.context_stats['packs']
+        return {
+            'packs': packs,
+            'duplicates_dropped': self.context_stats['duplicates_dropped'],
+            'avg_tokens': {
+                section: total / packs
+                for section, total in self.context_stats['section_tokens'].items()
+            } if packs else {}
+        }
+    
     def record_memory_summary_creation(self, creation_time: float, summary_length: int):
         """Record memory summary creation."""
         self.memory_stats['summaries_created'] += 1
@@ -313,6 +339,13 @@ class StatsCollector:
             else:
                 print("📈 Query Performance: No queries processed yet")
             
+            # Context packing statistics
+            context_stats = self.get_context_stats()
+            if context_stats['packs'] > 0:
+                avg_tokens = context_stats['avg_tokens']
+                print(f"🧩 Context Packing: {context_stats['packs']} prompts, {context_stats['duplicates_dropped']} duplicate chunks dropped")
+                print(f"   Avg tokens: " + ", ".join(f"{section} {tokens:.0f}" for section, tokens in avg_tokens.items()))
+            
             # Memory statistics
             memory_stats = self.get_memory_stats()
             print(f"🧠 Memory System:")
@@ -361,9 +394,22 @@ class StatsCollector:
                 try:
                     qa_stats = qa_cache.get_stats()
                     print(f"⚡ Q&A Cache: {qa_stats.get('total_qa_pairs', 0)} pairs, {qa_stats.get('hit_rate', 0):.1f}% hit rate")
+                    if qa_stats.get('generated_entries'):
+                        print(f"   ↳ {qa_stats['generated_entries']} written back, {qa_stats.get('generated_evicted', 0)} evicted")
                 except Exception as e:
                     logger.debug(f"Q&A cache stats error: {e}")
             
+            # Pre-classifier stats
+            pre_classifier = kwargs.get('pre_classifier')
+            if pre_classifier:
+                try:
+                    pre_stats = pre_classifier.get_stats()
+                    if pre_stats['total'] > 0:
+                        print(f"🧭 Pre-classifier: {pre_stats['skip_rate']:.1f}% of LLM classifier calls skipped "
+                              f"({pre_stats['rule']} rule, {pre_stats['centroid']} centroid, {pre_stats['deferred']} deferred)")
+                except Exception as e:
+                    logger.debug(f"Pre-classifier stats error: {e}")
+            
             # System health
             try:
                 from .resilience_manager import resilience_manager
@@ -106,12 +106,13 @@ class UnifiedSessionManager:
             print(f"❌ Session {thread_id[:8]}... not found")
             return False
     
-    def update_activity(self, domains_used: List[str] = None) -> bool:
-        """Update current session activity and metadata."""
-        if not self.current_thread_id:
+    def update_activity(self, domains_used: List[str] = None, thread_id: Optional[str] = None) -> bool:
+        """Update session activity and metadata (the current session unless thread_id is given)."""
+        thread_id = thread_id or self.current_thread_id
+        if not thread_id:
             return False
         
-        config = {"configurable": {"thread_id": self.current_thread_id}}
+        config = {"configurable": {"thread_id": thread_id}}
         
         try:
             # Get current state
@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Exact Vector Index for Esoteric Vectors
+
+In-process retrieval backend with:
+- Exact cosine search over a float32 matrix (perfect recall)
+- Compact int8 / binary codes with float16 rescoring
+- Fully in-memory variant with incremental upserts (small collections)
+- Memory-mapped .npy/.npz snapshots exported from ChromaDB, published atomically
+- Per-domain row masks instead of metadata pre-filtering
+- Fingerprint-based staleness detection
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.utils.logger import logger
+
+
+# Number of set bits for every byte value (binary code Hamming distance)
+POPCOUNT_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+
+def collection_fingerprint(collection, version: Optional[int] = None) -> str:
+    """
+    Fingerprint a collection by its size, ids and corpus version.
+
+    Ids change on adds and removes; upserts that keep an id (new text, vector
+    or metadata) only show through the corpus_version counter the writers
+    bump in the collection metadata, so pass it whenever it is maintained.
+    """
+    ids = collection.get(include=[]).get("ids", [])
+    digest = hashlib.sha1("\n".join(sorted(ids)).encode("utf-8")).hexdigest()
+    if version is None:
+        return f"{len(ids)}:{digest}"
+    return f"{len(ids)}:{digest}:v{version}"
+
+
+def atomic_write(path: str, write):
+    """
+    Write a file under a temporary name in its directory, then rename it into place.
+
+    Readers that memory-mapped the previous file keep their (unlinked) copy;
+    new readers see either the old or the new file, never a partial one.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+
+class IndexSnapshot(NamedTuple):
+    """Immutable index contents, published with a single reference assignment."""
+    embeddings: Optional[np.ndarray] = None
+    ids: List[str] = []
+    documents: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+    domain_masks: Dict[str, np.ndarray] = {}
+    codes: Optional[np.ndarray] = None
+    scales: Optional[np.ndarray] = None
+
+    @property
+    def size(self) -> int:
+        """Number of indexed rows."""
+        return 0 if self.embeddings is None else self.embeddings.shape[0]
+
+
+def build_snapshot(embeddings: Optional[np.ndarray], ids: List[str], documents: List[str],
+                   metadatas: List[Dict[str, Any]], **vectors) -> IndexSnapshot:
+    """Assemble a snapshot, precomputing one boolean row mask per domain."""
+    domains = np.array([metadata.get("domain", "unknown") for metadata in metadatas], dtype=str)
+    domain_masks = {domain: domains == domain for domain in np.unique(domains).tolist()}
+    return IndexSnapshot(embeddings, ids, documents, metadatas, domain_masks, **vectors)
+
+
+def normalize_rows(embeddings) -> np.ndarray:
+    """Convert vectors to a unit-length float32 matrix (empty input gives a 0x0 matrix)."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2 or embeddings.shape[0] == 0:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+class NumpyVectorIndex:
+    """
+    Exact cosine similarity index over a contiguous float32 matrix.
+
+    Features:
+    - One matrix-vector product plus argpartition per query
+    - Domain filtering through precomputed boolean row masks
+    - Snapshot persisted next to the knowledge base and memory-mapped on load
+    - Distances reported in the source collection's space (cosine or l2)
+    - Contents swapped as one immutable snapshot, so searches never mix old and new rows
+    """
+
+    EMBEDDINGS_FILE = "embeddings.npy"
+    PAYLOAD_FILE = "payload.npz"
+    CURRENT_FILE = "CURRENT"
+    SNAPSHOT_PREFIX = "snapshot-"
+
+    def __init__(self, index_path: str, space: str = "cosine"):
+        """Initialize an empty index bound to a snapshot directory."""
+        self.index_path = index_path
+        self.space = space
+        self.fingerprint: Optional[str] = None
+        self._snapshot = IndexSnapshot()
+
+    @property
+    def size(self) -> int:
+        """Number of indexed rows."""
+        return self._snapshot.size
+
+    @property
+    def embeddings(self) -> Optional[np.ndarray]:
+        """Normalized vectors (float16 rescoring vectors for quantized indexes)."""
+        return self._snapshot.embeddings
+
+    @property
+    def ids(self) -> List[str]:
+        """Row ids."""
+        return self._snapshot.ids
+
+    @property
+    def documents(self) -> List[str]:
+        """Row documents."""
+        return self._snapshot.documents
+
+    @property
+    def metadatas(self) -> List[Dict[str, Any]]:
+        """Row metadata."""
+        return self._snapshot.metadatas
+
+    @property
+    def domain_masks(self) -> Dict[str, np.ndarray]:
+        """Boolean row mask per domain."""
+        return self._snapshot.domain_masks
+
+    def _vector_files(self) -> List[str]:
+        """Snapshot files holding the vectors."""
+        return [self.EMBEDDINGS_FILE]
+
+    def _save_vectors(self, directory: str, embeddings: np.ndarray):
+        """Persist normalized vectors."""
+        np.save(os.path.join(directory, self.EMBEDDINGS_FILE), embeddings)
+
+    def _load_vectors(self, directory: str) -> Dict[str, np.ndarray]:
+        """Memory-map the persisted vectors."""
+        return {'embeddings': np.load(os.path.join(directory, self.EMBEDDINGS_FILE), mmap_mode="r")}
+
+    def _current_snapshot(self) -> Optional[str]:
+        """Directory of the published snapshot, if any."""
+        try:
+            with open(os.path.join(self.index_path, self.CURRENT_FILE), "r", encoding="utf-8") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return os.path.join(self.index_path, name) if name else None
+
+    def _prune_snapshots(self, current: str):
+        """Remove snapshots older than the previous one (open memory maps stay valid)."""
+        snapshots = sorted(name for name in os.listdir(self.index_path) if name.startswith(self.SNAPSHOT_PREFIX))
+        for name in snapshots[:-2]:
+            if name != current:
+                shutil.rmtree(os.path.join(self.index_path, name), ignore_errors=True)
+
+    def build_from_collection(self, collection, fingerprint: Optional[str] = None):
+        """Export a ChromaDB collection into a normalized snapshot and load it."""
+        results = collection.get(include=["embeddings", "documents", "metadatas"])
+
+        embeddings = normalize_rows(results.get("embeddings"))
+        metadatas = [metadata or {} for metadata in (results.get("metadatas") or [])]
+
+        # Files are never rewritten in place (they may be memory-mapped by other readers):
+        # the whole snapshot is staged in a fresh directory and published by swapping the pointer
+        os.makedirs(self.index_path, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.index_path, prefix=".staging-")
+        try:
+            self._save_vectors(staging, embeddings)
+            np.savez(
+                os.path.join(staging, self.PAYLOAD_FILE),
+                ids=np.array(results.get("ids") or [], dtype=str),
+                documents=np.array(results.get("documents") or [], dtype=str),
+                metadatas=np.array([json.dumps(metadata) for metadata in metadatas], dtype=str),
+                fingerprint=np.array(fingerprint or collection_fingerprint(collection))
+            )
+            name = f"{self.SNAPSHOT_PREFIX}{time.time_ns():020d}-{os.getpid()}"
+            os.rename(staging, os.path.join(self.index_path, name))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        atomic_write(os.path.join(self.index_path, self.CURRENT_FILE), lambda f: f.write(name.encode("utf-8")))
+        self._prune_snapshots(name)
+
+        logger.debug_optimization(f"Exported {embeddings.shape[0]} vectors to {self.index_path}/{name}")
+        return self.load()  # Remap the new snapshot
+
+    def load(self) -> bool:
+        """Load the published snapshot (vectors are memory-mapped). Returns False if missing."""
+        directory = self._current_snapshot()
+        files = self._vector_files() + [self.PAYLOAD_FILE]
+        if directory is None or not all(os.path.exists(os.path.join(directory, name)) for name in files):
+            return False
+
+        vectors = self._load_vectors(directory)
+        with np.load(os.path.join(directory, self.PAYLOAD_FILE)) as payload:
+            snapshot = build_snapshot(
+                ids=payload["ids"].tolist(),
+                documents=payload["documents"].tolist(),
+                metadatas=[json.loads(metadata) for metadata in payload["metadatas"].tolist()],
+                **vectors
+            )
+            fingerprint = str(payload["fingerprint"])
+
+        self._snapshot = snapshot
+        self.fingerprint = fingerprint
+        logger.debug_optimization(f"Loaded {self.__class__.__name__}: {self.size} vectors")
+        return True
+
+    def _row_mask(self, snapshot: IndexSnapshot, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Translate a Chroma-style domain filter into a row mask."""
+        if not where:
+            return None
+
+        condition = where.get("domain")
+        if isinstance(condition, dict):
+            domains = condition.get("$in", [])
+        else:
+            domains = [condition]
+
+        mask = np.zeros(snapshot.size, dtype=bool)
+        for domain in domains:
+            if domain in snapshot.domain_masks:
+                mask |= snapshot.domain_masks[domain]
+        return mask
+
+    def _top_rows(self, snapshot: IndexSnapshot, query: np.ndarray, k: int,
+                  mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the top-k rows and their cosine similarities."""
+        scores = snapshot.embeddings @ query
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top, scores[top]
+
+    def _to_distance(self, similarity: float) -> float:
+        """Convert cosine similarity to a distance in the collection's space."""
+        if self.space == "l2":
+            return float(2.0 - 2.0 * similarity)
+        return float(1.0 - similarity)
+
+    def search(self, query_embedding: List[float], k: int = 4,
+               where: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """
+        Top-k cosine search.
+
+        Args:
+            query_embedding: Query vector
+            k: Number of results
+            where: Optional Chroma-style filter, e.g. {"domain": {"$in": [...]}}
+
+        Returns:
+            List of (Document, distance) tuples ordered by ascending distance
+        """
+        snapshot = self._snapshot  # One consistent view for the whole search
+        if snapshot.size == 0:
+            return []
+
+        query = np.array(query_embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        mask = self._row_mask(snapshot, where)
+        candidates = snapshot.size if mask is None else int(mask.sum())
+        if candidates == 0:
+            return []
+
+        rows, similarities = self._top_rows(snapshot, query, min(k, candidates), mask)
+        order = np.argsort(-similarities)
+
+        return [
+            (Document(id=snapshot.ids[i], page_content=snapshot.documents[i], metadata=dict(snapshot.metadatas[i])),
+             self._to_distance(similarities[j]))
+            for i, j in zip(rows[order], order)
+        ]
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"{self.__class__.__name__}({self.size} vectors, domains={sorted(self.domain_masks)})"
+
+
+class QuantizedVectorIndex(NumpyVectorIndex):
+    """
+    Compact two-stage index: quantized first pass, float16 rescoring.
+
+    Features:
+    - int8 scalar codes (4x smaller) or binary sign codes (32x smaller) kept in memory
+    - Coarse top candidates rescored against memory-mapped float16 vectors
+    - Blocked first pass so temporary buffers stay small
+    """
+
+    CODES_FILE = "codes.npy"
+    SCALES_FILE = "scales.npy"
+    RESCORE_FILE = "rescore_f16.npy"
+
+    def __init__(self, index_path: str, space: str = "cosine", mode: str = "int8",
+                 rescore_factor: int = 10, block_size: int = 8192):
+        """
+        Initialize an empty quantized index.
+
+        Args:
+            mode: "int8" scalar quantization or "binary" sign codes
+            rescore_factor: Candidates rescored per requested result
+            block_size: Rows per block in the int8 first pass
+        """
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"Unknown quantization mode '{mode}'")
+        super().__init__(index_path, space)
+        self.mode = mode
+        self.rescore_factor = rescore_factor
+        self.block_size = block_size
+
+    @property
+    def codes(self) -> Optional[np.ndarray]:
+        """Compact first-pass codes."""
+        return self._snapshot.codes
+
+    @property
+    def scales(self) -> Optional[np.ndarray]:
+        """Per-dimension int8 scales."""
+        return self._snapshot.scales
+
+    def _vector_files(self) -> List[str]:
+        """Snapshot files holding the codes and rescoring vectors."""
+        files = [self.CODES_FILE, self.RESCORE_FILE]
+        return files + [self.SCALES_FILE] if self.mode == "int8" else files
+
+    def _save_vectors(self, directory: str, embeddings: np.ndarray):
+        """Persist compact codes plus float16 vectors for rescoring."""
+        if self.mode == "int8":
+            scales = np.abs(embeddings).max(axis=0) if embeddings.size else np.zeros(0, dtype=np.float32)
+            scales = np.maximum(scales, 1e-12).astype(np.float32)
+            codes = np.round(embeddings / scales * 127).astype(np.int8)
+            np.save(os.path.join(directory, self.SCALES_FILE), scales)
+        else:
+            codes = np.packbits(embeddings > 0, axis=1)
+
+        np.save(os.path.join(directory, self.CODES_FILE), codes)
+        np.save(os.path.join(directory, self.RESCORE_FILE), embeddings.astype(np.float16))
+
+    def _load_vectors(self, directory: str) -> Dict[str, np.ndarray]:
+        """Load the codes into memory and memory-map the rescoring vectors."""
+        vectors = {
+            'codes': np.load(os.path.join(directory, self.CODES_FILE)),
+            'embeddings': np.load(os.path.join(directory, self.RESCORE_FILE), mmap_mode="r")
+        }
+        if self.mode == "int8":
+            vectors['scales'] = np.load(os.path.join(directory, self.SCALES_FILE))
+        return vectors
+
+    def _coarse_scores(self, snapshot: IndexSnapshot, query: np.ndarray) -> np.ndarray:
+        """First-pass scores from the compact codes (higher is better)."""
+        codes = snapshot.codes
+        if self.mode == "binary":
+            query_code = np.packbits(query > 0)
+            hamming = POPCOUNT_TABLE[np.bitwise_xor(codes, query_code)].sum(axis=1)
+            return -hamming.astype(np.float32)
+
+        scaled_query = query * snapshot.scales / 127.0
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], self.block_size):
+            block = codes[start:start + self.block_size]
+            scores[start:start + block.shape[0]] = block.astype(np.float32) @ scaled_query
+        return scores
+
+    def _top_rows(self, snapshot: IndexSnapshot, query: np.ndarray, k: int,
+                  mask: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Select candidates on the codes, then rescore them at float16 precision."""
+        coarse = self._coarse_scores(snapshot, query)
+        if mask is not None:
+            coarse = np.where(mask, coarse, -np.inf)
+            available = int(mask.sum())
+        else:
+            available = snapshot.size
+
+        shortlist = min(available, k * self.rescore_factor)
+        candidates = np.argpartition(-coarse, shortlist - 1)[:shortlist]
+        candidates.sort()  # Sequential reads from the memory map
+
+        rescored = snapshot.embeddings[candidates].astype(np.float32) @ query
+        top = np.argpartition(-rescored, k - 1)[:k]
+        return candidates[top], rescored[top]
+
+    def __str__(self) -> str:
+        """String representation."""
+        return f"QuantizedVectorIndex({self.mode}, {self.size} vectors, domains={sorted(self.domain_masks)})"
+
+
+class InMemoryVectorIndex(NumpyVectorIndex):
+    """
+    Exact index held entirely in process memory, without a snapshot.
+
+    Features:
+    - Loaded from the collection at startup; the collection stays the durable store
+    - Incremental upserts (no rebuild when pairs are added)
+    - Suited to small collections such as the Q&A cache
+    """
+
+    def __init__(self, space: str = "cosine"):
+        """Initialize an empty in-memory index."""
+        super().__init__(index_path="", space=space)
+        self._write_lock = threading.Lock()  # Writers build on the latest snapshot one at a time
+
+    def load(self) -> bool:
+        """Nothing persisted; the index is filled by build_from_collection()."""
+        return False
+
+    def build_from_collection(self, collection, fingerprint: Optional[str] = None):
+        """Load every vector of a collection into a contiguous matrix."""
+        results = collection.get(include=["embeddings", "documents", "metadatas"])
+
+        with self._write_lock:
+            self._snapshot = self._merge(IndexSnapshot(), results.get("ids") or [], results.get("embeddings"),
+                                         results.get("documents") or [], results.get("metadatas") or [])
+            self.fingerprint = fingerprint or collection_fingerprint(collection)
+        logger.debug_optimization(f"Loaded {self}")
+        return True
+
+    def add(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Insert or replace rows by id."""
+        with self._write_lock:
+            self._snapshot = self._merge(self._snapshot, ids, embeddings, documents, metadatas)
+
+    def delete(self, ids: List[str]):
+        """Remove rows by id."""
+        with self._write_lock:
+            snapshot = self._snapshot
+            removed = set(ids)
+            keep = [i for i, row_id in enumerate(snapshot.ids) if row_id not in removed]
+            if len(keep) == len(snapshot.ids):
+                return
+
+            self._snapshot = build_snapshot(
+                np.ascontiguousarray(snapshot.embeddings[keep]),
+                [snapshot.ids[i] for i in keep],
+                [snapshot.documents[i] for i in keep],
+                [snapshot.metadatas[i] for i in keep]
+            )
+
+    @staticmethod
+    def _merge(snapshot: IndexSnapshot, ids: List[str], embeddings, documents: List[str],
+               metadatas: List[Dict[str, Any]]) -> IndexSnapshot:
+        """New snapshot with rows inserted or replaced by id (the given snapshot is not modified)."""
+        vectors = normalize_rows(embeddings)
+        if vectors.shape[0] == 0:
+            return snapshot
+
+        replaced = set(ids)
+        keep = [i for i, row_id in enumerate(snapshot.ids) if row_id not in replaced]
+        if snapshot.size:
+            vectors = np.vstack([snapshot.embeddings[keep], vectors])
+
+        return build_snapshot(
+            np.ascontiguousarray(vectors),
+            [snapshot.ids[i] for i in keep] + list(ids),
+            [snapshot.documents[i] for i in keep] + list(documents),
+            [snapshot.metadatas[i] for i in keep] + [metadata or {} for metadata in metadatas]
+        )
@@ -29,13 +29,18 @@ current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
 from core.contextual_rag import OptimizedContextualRAGSystem
+from core.context_packer import ContextPacker
 from core.domain_manager import DomainManager
+from core.pre_classifier import PreClassifier
 from cache.negative_intent_detector import NegativeIntentDetector
 from cache.qa_cache import QACache
+from cache.answer_writeback import AnswerWriteBack
+from cache.miss_log import MissLog
 from utils.logger import logger, set_debug_mode
 from memory import MemoryManager
 from core.unified_session_manager import UnifiedSessionManager
 from utils.command_handler import command_handler
+from utils.chat_stream import REPLY_TAG, split_mode_header
 from utils.lunar_calculator import get_current_lunar_phase
 
 load_dotenv()
@@ -49,6 +54,33 @@ domain_manager = DomainManager(initial_domains={'lunar'})
 negative_detector = NegativeIntentDetector()
 qa_cache = QACache()
 rag_system = OptimizedContextualRAGSystem(domain_manager=domain_manager)
+context_packer = ContextPacker(token_budget=int(os.getenv('ESOTERIC_CONTEXT_TOKEN_BUDGET', '3000')))
+
+# Opt-in write-back of generated answers into the Q&A cache
+answer_writeback = None
+if os.getenv('ESOTERIC_QA_WRITEBACK', 'false').lower() in ('true', '1', 'yes'):
+    answer_writeback = AnswerWriteBack(qa_cache, min_repeats=int(os.getenv('ESOTERIC_QA_WRITEBACK_MIN_REPEATS', '2')))
+
+# Opt-in log of Q&A cache misses (user messages in plain text) for offline mining (tools/mine_misses.py)
+miss_log = None
+if os.getenv('ESOTERIC_QA_MISS_LOG', 'false').lower() in ('true', '1', 'yes'):
+    miss_log = MissLog(
+        os.getenv('ESOTERIC_QA_MISS_LOG_DIR', 'data/qa_misses'),
+        retention_days=int(os.getenv('ESOTERIC_QA_MISS_LOG_RETENTION_DAYS', '30'))
+    )
+
+# Opt-in local pre-classifier that answers confident messages without the LLM classifier call.
+# Measure its agreement with the LLM classifier first (tools/evaluate_pre_classifier.py).
+pre_classifier = None
+if os.getenv('ESOTERIC_PRECLASSIFIER', 'false').lower() in ('true', '1', 'yes'):
+    pre_classifier = PreClassifier(
+        rag_system.embeddings, min_margin=float(os.getenv('ESOTERIC_PRECLASSIFIER_MARGIN', '0.06'))
+    )
+# Rules need no embeddings, so single-call mode applies them even with the pre-classifier off
+rule_classifier = pre_classifier if pre_classifier is not None else PreClassifier()
+
+# Single-call mode: no classifier LLM call; the agent call also picks the persona
+single_call_mode = os.getenv('ESOTERIC_SINGLE_CALL', 'false').lower() in ('true', '1', 'yes')
 
 # Initialize memory manager with stats collector
 memory_manager = MemoryManager(llm, rag_system.stats_collector)
@@ -69,6 +101,7 @@ class State(TypedDict):
     message_type: str | None
     should_use_rag: bool | None
     rag_context: str | None
+    speculative_rag: dict | None  # Retrieval run alongside the classifier (see speculative_retrieval)
     # Medium-term memory fields
     medium_term_summary: str | None
     context: dict[str, Any]  # For tracking summarization state
@@ -76,15 +109,7 @@ class State(TypedDict):
     memory_settings: dict[str, Any]  # Memory toggle states
     session_metadata: dict[str, Any]  # Session info (domains, counts, etc.)
 
-def classify_and_decide_rag(state: State):
-    """Combined message classification and RAG decision for optimal performance."""
-    last_message = state["messages"][-1]
-    combined_classifier = llm.with_structured_output(CombinedDecision)
-
-    result = combined_classifier.invoke([
-        {
-            "role": "system",
-            "content": """Classify message type and decide RAG usage:
+CLASSIFIER_PROMPT = """Classify message type and decide RAG usage:
             
 Message types: 
 - 'emotional': personal problems or feelings, relationship issues, request for psychological support, therapy or help
@@ -102,12 +127,26 @@ Do NOT use RAG for:
 - Non-esoteric and non-emotional topics (weather, cooking, geography)
 - Current date, time, or basic lunar information queries (current moon phase, illumination percentage)
 - Simple factual questions that can be answered with built-in knowledge"""
-        },
-        {
-            "role": "user",
-            "content": last_message.content
-        }
+
+def llm_classify(message: str) -> CombinedDecision:
+    """Message type and RAG decision from the LLM classifier."""
+    combined_classifier = llm.with_structured_output(CombinedDecision)
+    return combined_classifier.invoke([
+        {"role": "system", "content": CLASSIFIER_PROMPT},
+        {"role": "user", "content": message}
     ])
+
+def classify_and_decide_rag(state: State):
+    """Combined message classification and RAG decision for optimal performance."""
+    last_message = state["messages"][-1]
+    
+    # Confident local decisions (rules or example centroids) skip the LLM call
+    local = pre_classifier.classify(last_message.content) if pre_classifier is not None else None
+    if local is not None:
+        logger.debug_optimization(f"Pre-classifier ({local.source}): {local.message_type}, rag={local.should_use_rag}")
+        result = CombinedDecision(message_type=local.message_type, should_use_rag=local.should_use_rag)
+    else:
+        result = llm_classify(last_message.content)
     
     return {
         "message_type": result.message_type,
@@ -121,8 +160,14 @@ def router(state: State):
     message_type = state.get("message_type", "logical")
     return {"next": "therapist" if message_type == "emotional" else "logical"}
 
-def get_rag_context(user_message: str, should_use_rag: bool) -> dict:
-    """Get RAG context with Q&A cache optimization and clean logging."""
+def get_rag_context(user_message: str, should_use_rag: bool, speculative: bool = False) -> dict:
+    """
+    Get RAG context with Q&A cache optimization and clean logging.
+    
+    Speculative retrieval may be discarded, so its Q&A cache lookup, RAG
+    stats, result-cache write and negative-intent log are held back; the
+    result carries them for record_speculative_result() instead.
+    """
     try:
         if not should_use_rag:
             return {"type": "no_rag", "content": ""}
@@ -133,13 +178,27 @@ def get_rag_context(user_message: str, should_use_rag: bool) -> dict:
         # Get active domains for filtering
         active_domains = rag_system.get_domain_status().get("active_domains", [])
         
-        # Step 1: Q&A Cache Search (unless negative intent detected)
+        # Embed the message once for the whole turn (Q&A cache + RAG). Negative-intent
+        # turns skip the cache, so RAG may still answer them lexically without a vector.
+        query_embedding = None
+        best_similarity = []
+        qa_lookup = None
+        
+        # Step 1: Q&A Cache Search (unless negative intent detected). Known questions
+        # are answered from the exact-match tier before any embedding is computed.
         if not force_rag:
-            qa_result = qa_cache.search_qa(user_message, active_domains, k=3)
+            qa_result = qa_cache.lookup_exact(user_message, active_domains, record=not speculative)
+            if qa_result is None:
+                query_embedding = rag_system.embed_query(user_message)
+                qa_result = qa_cache.search_qa(user_message, active_domains, k=3, query_embedding=query_embedding,
+                                               on_miss=best_similarity.append, record=not speculative)
+            if speculative:
+                qa_lookup = {"hit": qa_result}
             if qa_result:
                 logger.qa_cache_hit(qa_result['similarity'], user_message[:50])
                 return {
                     "type": "qa_cache_hit",
+                    "qa_lookup": qa_lookup,
                     "content": qa_result['answer'],
                     "metadata": {
                         "question": qa_result['question'],
@@ -154,11 +213,24 @@ def get_rag_context(user_message: str, should_use_rag: bool) -> dict:
         # Step 2: Regular RAG Search (if Q&A cache missed or negative intent)
         return_type = "negative_intent_bypass" if force_rag else "rag_context"
         
-        if force_rag:
+        if force_rag and not speculative:
             logger.negative_intent(user_message[:50])
         
         # Use RAG system for retrieval with domain filtering
-        rag_result = rag_system.query(user_message, k=4)
+        rag_result = rag_system.query(user_message, k=4, query_embedding=query_embedding, record=not speculative)
+        deferred = {"qa_lookup": qa_lookup, "rag_record": rag_result.get("pending_record"),
+                    "negative_intent": force_rag and speculative}
+        
+        # The miss is logged by the agent once the result is used (retrieval may be speculative)
+        miss = None
+        if miss_log is not None and best_similarity:
+            chunks = (rag_result or {}).get("chunks") or []
+            miss = {
+                "embedding": query_embedding,
+                "best_similarity": best_similarity[0],
+                "domain": chunks[0].get("metadata", {}).get("domain") if chunks else None,
+                "active_domains": active_domains
+            }
         
         # Check if we got chunks
         if rag_result and rag_result.get("chunks"):
@@ -166,18 +238,49 @@ def get_rag_context(user_message: str, should_use_rag: bool) -> dict:
                 f"[Chunk {chunk['chunk_id']}]: {chunk['content']}"
                 for chunk in rag_result["chunks"]
             ])
-            return {"type": return_type, "content": chunks_text}
+            return {"type": return_type, "content": chunks_text, "chunks": rag_result["chunks"], "miss": miss,
+                    **deferred}
         
         # Check if domain was blocked
         query_type = rag_result.get("metadata", {}).get("query_type", "")
         if query_type == "domain_blocked":
-            return {"type": "domain_blocked", "content": rag_result.get("response", "")}
+            return {"type": "domain_blocked", "content": rag_result.get("response", ""), **deferred}
         
-        return {"type": "no_rag", "content": ""}
+        return {"type": "no_rag", "content": "", "miss": miss, **deferred}
     except Exception as e:
         logger.error(f"RAG Error: {e}")
         return {"type": "no_rag", "content": ""}
 
+def record_speculative_result(user_message: str, rag_result: dict):
+    """Apply a speculative retrieval's held-back side effects once its result is used."""
+    qa_lookup = rag_result.get("qa_lookup")
+    if qa_lookup is not None:
+        qa_cache.record_lookup(qa_lookup["hit"])
+    rag_system.record_query(rag_result.get("rag_record"))
+    if rag_result.get("negative_intent"):
+        logger.negative_intent(user_message[:50])
+
+def record_cache_miss(user_message: str, rag_result: dict):
+    """Log a Q&A cache miss for mining once its retrieval result is actually used."""
+    miss = rag_result.get("miss")
+    if miss_log is None or not miss:
+        return
+    
+    miss_log.record(
+        user_message, miss["embedding"], miss["best_similarity"],
+        domain=miss["domain"], active_domains=miss["active_domains"]
+    )
+
+def speculative_retrieval(state: State):
+    """Q&A cache + RAG retrieval in parallel with the classifier; discarded on no-RAG turns."""
+    user_message = state["messages"][-1].content
+    
+    # Rule-decided messages (greetings, lunar dates, commands) never use RAG - don't speculate
+    if pre_classifier is not None and pre_classifier.rule_decision(user_message) is not None:
+        return {"speculative_rag": None}
+    
+    return {"speculative_rag": get_rag_context(user_message, True, speculative=True)}
+
 def build_domain_guidance(active_domains: list, agent_type: str) -> str:
     """Build domain-specific guidance for agents."""
     if not active_domains:
@@ -218,7 +321,15 @@ def create_agent_response(state: State, agent_type: str) -> dict:
     """Unified agent response creation for both therapist and logical agents."""
     last_message = state["messages"][-1]
     should_use_rag = state.get("should_use_rag", False)
-    rag_result = get_rag_context(last_message.content, should_use_rag)
+    
+    # Use the speculative retrieval when the classifier confirmed RAG; otherwise it is discarded
+    speculative = state.get("speculative_rag")
+    if should_use_rag and speculative is not None:
+        rag_result = speculative
+        record_speculative_result(last_message.content, rag_result)
+    else:
+        rag_result = get_rag_context(last_message.content, should_use_rag)
+    record_cache_miss(last_message.content, rag_result)
     
     # System prompts for each agent type
     system_prompts = {
@@ -264,12 +375,26 @@ FORMATTING: Use proper Markdown structure with clear organization:
 - Use *italics* for definitions or important terms
 - End with a practical summary or next steps
 
-Be precise yet accessible. Structure your knowledge with clear headings that directly serve their current inquiry."""
+Be precise yet accessible. Structure your knowledge with clear headings that directly serve their current inquiry.""",
+
+        "unified": """You are a wise shaman offering both emotional healing and clear teaching of esoteric knowledge.
+
+First decide the mode of the user's latest message:
+- emotional: personal problems or feelings, relationship issues, requests for support or help
+- logical: non-personal facts, concepts and esoteric knowledge, explanations or analysis
+
+Begin your reply with exactly one header line, [mode: emotional] or [mode: logical], then answer in that mode:
+- emotional: warm, intuitive support that validates their feelings and gently guides self-discovery
+- logical: clear, structured explanation with practical steps
+
+FORMATTING: Use proper Markdown - a ## main heading with a fitting emoji, ### subsections when covering several topics, **bold** key insights, bullet points or numbered steps, line breaks between sections, and a brief closing thought or next steps.
+
+Be concise yet profound."""
     }
     
     system_content = system_prompts[agent_type]
     active_domains = rag_system.get_domain_status()["active_domains"]
-    system_content += build_domain_guidance(active_domains, agent_type)
+    system_content += build_domain_guidance(active_domains, "logical" if agent_type == "unified" else agent_type)
     
     # Check for domain activation suggestions EARLY in context
     if semantic_detector.is_available():
@@ -311,22 +436,34 @@ You naturally know this current lunar information. When asked about current date
     except Exception as e:
         logger.debug(f"Could not fetch lunar information: {e}")
     
-    # Add memory context to system prompt
+    # Build memory context (medium-term only; recent turns are sent as chat history)
     memory_context = memory_manager.build_memory_context(state)
-    if memory_context:
-        system_content += f"\n\n## Conversation Memory\n{memory_context}\n\nUse this memory context to provide continuity and personalized responses."
     
     rag_context = rag_result["content"]
     rag_type = rag_result["type"]
     
     # Handle different types of RAG responses
     if rag_type == "domain_blocked":
-        return {"messages": [AIMessage(content=rag_context)], "rag_context": "domain_blocked"}
+        return {"messages": [AIMessage(content=rag_context)], "rag_context": "domain_blocked", "speculative_rag": None}
     elif rag_type == "qa_cache_hit":
         # Direct Q&A cache hit - return the answer directly
-        return {"messages": [AIMessage(content=rag_context)], "rag_context": "qa_cache_hit"}
-    elif rag_context:
-        context_verb = "guidance" if agent_type == "emotional" else "teaching"
+        return {"messages": [AIMessage(content=rag_context)], "rag_context": "qa_cache_hit", "speculative_rag": None}
+    
+    # Pack memory and retrieved chunks into the prompt token budget
+    chunks = rag_result.get("chunks", [])
+    chunk_embeddings = rag_system.get_chunk_embeddings([chunk.get("id") for chunk in chunks]) if chunks else None
+    packed = context_packer.pack(chunks, memory_context, chunk_embeddings)
+    rag_system.stats_collector.record_context_pack(
+        {section: packed["tokens"][section] for section in ("knowledge", "memory", "total")},
+        packed["duplicates_dropped"]
+    )
+    
+    if packed["memory"]:
+        system_content += f"\n\n## Conversation Memory\n{packed['memory']}\n\nUse this memory context to provide continuity and personalized responses."
+    
+    if packed["knowledge"]:
+        rag_context = packed["knowledge"]
+        context_verb = {"emotional": "guidance", "logical": "teaching"}.get(agent_type, "guidance and teaching")
         system_content += f"\n\nUse this knowledge to inform your {context_verb}:{rag_context}. Never reference chunk numbers or sources, speak as if the wisdom flows directly from your own understanding. You should use it as inspiration, not as a direct quote."
     
     # Create conversation and get response
@@ -337,12 +474,31 @@ You naturally know this current lunar information. When asked about current date
     conversation_history = memory_manager.get_conversation_history(state, current_message)
     conversation_messages.extend(conversation_history)
     
-    reply = llm.invoke(conversation_messages)
+    # Tagged so streaming clients receive this call's tokens (not the classifier's or memory's)
+    reply = llm.invoke(conversation_messages, config={"tags": [REPLY_TAG]})
+    answer = reply.content
+    
+    # Unified persona: the reply opens with the mode it chose
+    message_type = agent_type
+    if agent_type == "unified":
+        message_type, answer = split_mode_header(answer)
+    
+    # Offer grounded answers to the Q&A cache (admission runs in the background)
+    if answer_writeback is not None and rag_type in ("rag_context", "negative_intent_bypass") and chunks:
+        answer_writeback.submit(
+            current_message, answer, message_type,
+            domain=chunks[0].get("metadata", {}).get("domain"),
+            negative_intent=rag_type == "negative_intent_bypass",
+            # The cache is shared: answers shaped by this user's memory or earlier turns stay private
+            personal_context=bool(packed["memory"]) or len(conversation_history) > 1
+        )
     
     # Update memory after response (your "response first, memory later" approach)
     memory_updates = memory_manager.update_medium_term_memory(state)
     
-    response_dict = {"messages": [AIMessage(content=reply.content)], "rag_context": rag_context}
+    response_dict = {"messages": [AIMessage(content=answer)], "rag_context": rag_context, "speculative_rag": None}
+    if agent_type == "unified":
+        response_dict["message_type"] = message_type
     response_dict.update(memory_updates)  # Add any memory updates to the state
     
     return response_dict
@@ -361,21 +517,67 @@ default_db_path = "data/sessions/graph_checkpoints.db"
 os.makedirs(os.path.dirname(default_db_path), exist_ok=True)
 checkpointer = SqliteSaver(sqlite3.connect(default_db_path, check_same_thread=False))
 
-# Build the agent graph
-graph_builder = StateGraph(State)
-graph_builder.add_node("classifier", classify_and_decide_rag)
-graph_builder.add_node("router", router)
-graph_builder.add_node("therapist", therapist_agent)
-graph_builder.add_node("logical", logical_agent)
-
-graph_builder.add_edge(START, "classifier")
-graph_builder.add_edge("classifier", "router")
-graph_builder.add_conditional_edges("router", lambda state: state.get("next"), {"therapist": "therapist", "logical": "logical"})
-graph_builder.add_edge("therapist", END)
-graph_builder.add_edge("logical", END)
+def single_call_agent(state: State):
+    """Single-call mode: retrieval decided by local signals, persona chosen within the agent call."""
+    user_message = state["messages"][-1].content
+    
+    # Rules (greetings, commands, lunar dates) always apply; example centroids need the pre-classifier
+    if pre_classifier is not None:
+        local = pre_classifier.classify(user_message)
+    else:
+        local = rule_classifier.rule_decision(user_message)
+    
+    # Questions about what to avoid or what can go wrong are always grounded in the knowledge base
+    if (local is not None and local.source != "rule" and not local.should_use_rag
+            and negative_detector.has_negative_intent(user_message)):
+        local = local._replace(should_use_rag=True)
+    
+    # Without a confident local decision, retrieve anyway: the Q&A cache may answer outright,
+    # and the unified prompt only draws on retrieved knowledge where it is relevant
+    should_use_rag = local.should_use_rag if local is not None else True
+    agent_type = local.message_type if local is not None else "unified"
+    
+    response = create_agent_response({**state, "should_use_rag": should_use_rag, "speculative_rag": None}, agent_type)
+    response["should_use_rag"] = should_use_rag
+    if agent_type != "unified":
+        response["message_type"] = agent_type
+    return response
+
+def build_graph(single_call: bool = False, checkpointer=None):
+    """
+    Build and compile the agent graph.
+    
+    Args:
+        single_call: One LLM call per turn (local retrieval decision, unified persona
+            prompt) instead of classifier + agent calls
+        checkpointer: Checkpointer for session persistence
+    """
+    graph_builder = StateGraph(State)
+    
+    if single_call:
+        graph_builder.add_node("agent", single_call_agent)
+        graph_builder.add_edge(START, "agent")
+        graph_builder.add_edge("agent", END)
+        return graph_builder.compile(checkpointer=checkpointer)
+    
+    graph_builder.add_node("classifier", classify_and_decide_rag)
+    graph_builder.add_node("retrieval", speculative_retrieval)
+    graph_builder.add_node("router", router)
+    graph_builder.add_node("therapist", therapist_agent)
+    graph_builder.add_node("logical", logical_agent)
+    
+    # Classification and speculative retrieval run as parallel branches joined at the router
+    graph_builder.add_edge(START, "classifier")
+    graph_builder.add_edge(START, "retrieval")
+    graph_builder.add_edge(["classifier", "retrieval"], "router")
+    graph_builder.add_conditional_edges("router", lambda state: state.get("next"), {"therapist": "therapist", "logical": "logical"})
+    graph_builder.add_edge("therapist", END)
+    graph_builder.add_edge("logical", END)
+    
+    return graph_builder.compile(checkpointer=checkpointer)
 
 # Compile with checkpointer for session persistence
-graph = graph_builder.compile(checkpointer=checkpointer)
+graph = build_graph(single_call_mode, checkpointer)
 
 # Initialize unified session manager with compiled graph and checkpointer
 session_manager = UnifiedSessionManager(checkpointer, graph)
@@ -388,7 +590,8 @@ def print_stats():
             vectorstore=rag_system.vectorstore,
             domain_manager=domain_manager,
             qa_cache=qa_cache,
-            memory_manager=memory_manager
+            memory_manager=memory_manager,
+            pre_classifier=pre_classifier
         )
             
     except Exception as e:
@@ -334,8 +334,13 @@ Keep concise - aim for 100-300 words maximum."""
         print(f"💭 Short-term Memory: {short_term_count} messages")
         print(f"📊 Total Messages: {len(messages)}")
 
-    def build_memory_context(self, state: Dict[str, Any]) -> str:
-        """Build memory context from short-term and medium-term memory."""
+    def build_memory_context(self, state: Dict[str, Any], include_short_term: bool = False) -> str:
+        """
+        Build memory context from medium-term (and optionally short-term) memory.
+        
+        The short-term transcript is excluded by default because
+        get_conversation_history already sends those messages as chat turns.
+        """
         context_parts = []
         has_medium_term = False
         has_short_term = False
@@ -349,8 +354,8 @@ Keep concise - aim for 100-300 words maximum."""
         else:
             logger.debug_memory_disabled("medium-term", "context building")
         
-        # Add short-term messages using centralized method
-        if self.short_term_enabled:
+        # Add short-term messages only when explicitly requested
+        if include_short_term and self.short_term_enabled:
             messages = state.get("messages", [])
             if messages:
                 short_term_messages = messages[-self.short_term_message_count:]  # Use centralized config
@@ -360,7 +365,7 @@ Keep concise - aim for 100-300 words maximum."""
                 ])
                 context_parts.append(f"## Short-Term Memory (Recent Messages)\n{short_term_text}")
                 has_short_term = True
-        else:
+        elif include_short_term:
             logger.debug_memory_disabled("short-term", "context building")
         
         final_context = "\n\n".join(context_parts) if context_parts else ""
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Chat Streaming for Esoteric Vectors
+
+Turns agent graph stream chunks into server-sent events:
+- Reply tokens from the tagged agent LLM call only (not classifier or memory calls)
+- Early metadata (message_type, rag_used, cache_hit) as soon as a node decides it
+- Q&A cache hits and other non-generated replies as one immediate answer event
+- Unified-mode [mode: ...] headers stripped from the token stream
+- Cancellation of abandoned turns once the client disconnects
+- Rollback of unfinished turns to the session's pre-turn checkpoint
+"""
+
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+# Tag on the agent's reply LLM call; only its tokens are streamed to the user
+REPLY_TAG = "agent_reply"
+
+MODE_HEADER = re.compile(r"^\s*\[mode:\s*(emotional|logical)\]\s*", re.IGNORECASE)
+MODE_PREFIX = "[mode:"
+
+
+def split_mode_header(reply_text: str) -> tuple:
+    """Split the unified prompt's [mode: ...] header from the answer (logical if missing)."""
+    match = MODE_HEADER.match(reply_text)
+    if not match:
+        return "logical", reply_text
+    return match.group(1).lower(), reply_text[match.end():]
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def turn_checkpoint(graph, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Config pinned to the session's latest checkpoint, taken before a turn runs."""
+    snapshot = graph.get_state(config)
+    return snapshot.config if snapshot is not None and snapshot.values else None
+
+
+def rollback_turn(graph, checkpoint_config: Optional[Dict[str, Any]]) -> bool:
+    """
+    Make the pre-turn checkpoint the session's latest again.
+
+    The graph checkpoints its input (the new user message) before any node
+    runs, so a cancelled or failed turn would otherwise leave an unanswered
+    message, and any partial node updates, in the session.
+    """
+    if checkpoint_config is None:
+        return False
+    graph.update_state(checkpoint_config, None, as_node="__copy__")
+    return True
+
+
+class ChatStreamTracker:
+    """
+    Tracks one streamed turn and maps graph chunks to events.
+
+    Consumes graph.stream(..., stream_mode=["updates", "messages"]) items and
+    returns (event, data) pairs: "metadata", "token" and "answer".
+    """
+
+    def __init__(self):
+        """Initialize an empty turn."""
+        self.metadata: Dict[str, Optional[Any]] = {'message_type': None, 'rag_used': None, 'cache_hit': None}
+        self.answered = False
+        self.streamed = False
+        self._pending_cache_answer: Optional[str] = None
+        self._header_buffer = ""
+        self._header_done = False
+
+    def handle(self, mode: str, chunk: Any) -> List[Tuple[str, Dict[str, Any]]]:
+        """Events for one stream item."""
+        if mode == "messages":
+            message, run_metadata = chunk
+            if REPLY_TAG not in (run_metadata.get("tags") or []):
+                return []
+            return self._handle_token(message.content if isinstance(message.content, str) else "")
+
+        if mode == "updates" and isinstance(chunk, dict):
+            events = []
+            for update in chunk.values():
+                if isinstance(update, dict):
+                    events += self._handle_update(update)
+            return events
+
+        return []
+
+    def finish(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Flush a reply too short to rule out a mode header."""
+        if self._header_done or not self._header_buffer:
+            return []
+        self._header_done = True
+        return [("token", {'text': self._header_buffer})]
+
+    def _set_metadata(self, **values) -> List[Tuple[str, Dict[str, Any]]]:
+        """Metadata event if any value changed."""
+        changed = {key: value for key, value in values.items() if value is not None and self.metadata.get(key) != value}
+        if not changed:
+            return []
+        self.metadata.update(changed)
+        return [("metadata", dict(self.metadata))]
+
+    def _handle_update(self, update: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Node state updates: decisions, speculative cache hits and final replies."""
+        events = self._set_metadata(message_type=update.get("message_type"), rag_used=update.get("should_use_rag"))
+
+        # Speculative retrieval answered from the Q&A cache - send once RAG is confirmed
+        speculative = update.get("speculative_rag")
+        if speculative and speculative.get("type") == "qa_cache_hit":
+            self._pending_cache_answer = speculative.get("content")
+
+        if "rag_context" in update:
+            rag_context = update["rag_context"]
+            events += self._set_metadata(
+                cache_hit=rag_context == "qa_cache_hit",
+                rag_used=bool(rag_context and rag_context != "no_rag")
+            )
+            # Replies that were not generated token by token arrive whole
+            if not self.answered and not self.streamed and update.get("messages"):
+                self.answered = True
+                events.append(("answer", {'text': update["messages"][-1].content}))
+
+        if self._pending_cache_answer is not None and self.metadata['rag_used'] and not self.answered:
+            self.answered = True
+            events += self._set_metadata(cache_hit=True)
+            events.append(("answer", {'text': self._pending_cache_answer}))
+
+        return events
+
+    def _handle_token(self, text: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Reply token, holding back a possible [mode: ...] header until it is complete."""
+        if not text:
+            return []
+        self.streamed = True
+        if self._header_done:
+            return [("token", {'text': text})]
+
+        self._header_buffer += text
+        head = self._header_buffer.lstrip().lower()
+        if len(head) < len(MODE_PREFIX) and MODE_PREFIX.startswith(head):
+            return []  # Could still become a header
+        if head.startswith(MODE_PREFIX) and "]" not in head and len(head) < 40:
+            return []
+
+        self._header_done = True
+        events = []
+        if MODE_HEADER.match(self._header_buffer):
+            message_type, text = split_mode_header(self._header_buffer)
+            events += self._set_metadata(message_type=message_type)
+        else:
+            text = self._header_buffer
+        if text:
+            events.append(("token", {'text': text}))
+        return events
+
+
+class StreamCancelled(Exception):
+    """Raised inside a streamed turn after its client has disconnected."""
+
+
+class CancelOnDisconnect(BaseCallbackHandler):
+    """
+    Callback that stops a streamed turn once cancel() is called.
+
+    Checked at every chain and node start and on every LLM token, so an
+    abandoned turn stops before its next step, or mid-reply, instead of
+    generating (and paying for) the rest of the answer.
+    """
+
+    raise_error = True
+
+    def __init__(self):
+        """Initialize an uncancelled turn."""
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop the turn at its next checkpoint."""
+        self.cancelled.set()
+
+    def _check(self):
+        """Raise if the turn was cancelled."""
+        if self.cancelled.is_set():
+            raise StreamCancelled("client disconnected")
+
+    def on_chain_start(self, serialized, inputs, **kwargs):
+        """Check before each chain or graph node."""
+        self._check()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        """Check before each chat model call."""
+        self._check()
+
+    def on_llm_new_token(self, token, **kwargs):
+        """Check on each streamed token."""
+        self._check()
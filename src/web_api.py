@@ -7,16 +7,18 @@ Provides REST endpoints for chat functionality while preserving all existing fea
 Enhanced with Auth0 authentication for production deployment.
 """
 
+import asyncio
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from langchain_core.messages import AIMessage, HumanMessage
 from pydantic import BaseModel
@@ -46,6 +48,9 @@ from src.core import (
     user_sync_service,
     auth0_management,
 )
+from src.utils.chat_stream import (
+    CancelOnDisconnect, ChatStreamTracker, rollback_turn, sse_event, turn_checkpoint
+)
 from src.utils.logger import logger
 
 # Configure logging for web API
@@ -87,6 +92,11 @@ app.add_middleware(
 if os.path.exists("web"):
     app.mount("/web", StaticFiles(directory="web", html=True), name="web")
 
+# Bounded pool for streamed turns: each holds a thread for the sync graph stream
+stream_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("ESOTERIC_STREAM_WORKERS", "8")), thread_name_prefix="chat_stream_"
+)
+
 # ==================== PYDANTIC MODELS ====================
 
 class ChatMessage(BaseModel):
@@ -350,12 +360,30 @@ def get_or_create_session(session_id: Optional[str] = None, user: Optional[Auth0
         "message_count": len(session_info["state"].get("messages", []))
     }
 
-def update_session_activity(session_id: str):
-    """Update session last activity timestamp using UnifiedSessionManager"""
+def resolve_session_id(session_id: Optional[str], user: Optional[Auth0User] = None) -> Optional[str]:
+    """Session ID for a request: authenticated users get a user-prefixed ID for isolation"""
+    if not user or not session_id:
+        return session_id
+    
+    # Check if session ID is already prefixed to prevent double-prefixing
+    user_prefix = f"user_{user.sub.replace('|', '_')}_"
+    if session_id.startswith(user_prefix):
+        return session_id
+    return f"{user_prefix}{session_id}"
+
+def finish_turn(session_id: str):
+    """Post-turn bookkeeping shared by /chat and /chat/stream: activity, message count and domains used"""
     _, session_manager = get_graph_and_session_manager()
-    session_manager.current_thread_id = session_id
     active_domains = rag_system.get_domain_status().get("active_domains", [])
-    session_manager.update_activity(active_domains)
+    session_manager.update_activity(active_domains, thread_id=session_id)
+
+def abandon_turn(graph, checkpoint_config: Optional[Dict[str, Any]], session_id: str):
+    """Roll a cancelled or failed turn back so its user message is not kept without a reply"""
+    try:
+        if rollback_turn(graph, checkpoint_config):
+            web_logger.info(f"Unfinished turn rolled back for session {session_id[:8]}")
+    except Exception as e:
+        web_logger.warning(f"Could not roll back unfinished turn for session {session_id[:8]}: {e}")
 
 @app.get("/")
 async def root():
@@ -416,6 +444,7 @@ async def chat_info():
     return {
         "message": "Chat endpoint requires POST method",
         "usage": "POST /chat with JSON body: {'message': 'your message', 'session_id': 'optional'}",
+        "streaming": "POST /chat/stream with the same body streams server-sent events (session, metadata, token, answer, done)",
         "example": "curl -X POST http://localhost:8000/chat -H 'Content-Type: application/json' -d '{\"message\": \"Hello!\"}'",
         "docs": "/docs"
     }
@@ -447,27 +476,8 @@ async def health_check():
 async def chat(request: ChatRequest, user: OptionalUser = None):
     """Main chat endpoint - POST only (supports optional authentication)"""
     try:
-        # Handle user-specific session management
-        if user:
-            # Authenticated user - use user-specific session path
-            base_session_id = request.session_id
-            if base_session_id:
-                # Check if session ID is already prefixed to prevent double-prefixing
-                user_prefix = f"user_{user.sub.replace('|', '_')}_"
-                if base_session_id.startswith(user_prefix):
-                    # Already prefixed, use as-is
-                    session_id = base_session_id
-                else:
-                    # Not prefixed, add prefix for isolation
-                    session_id = f"{user_prefix}{base_session_id}"
-            else:
-                session_id = None
-        else:
-            # Anonymous user - use regular session management
-            session_id = request.session_id
-        
-        # Get or create session (with user migration support)
-        session_id, session_data = get_or_create_session(session_id, user)
+        # Get or create session (user-specific for authenticated users, with migration support)
+        session_id, session_data = get_or_create_session(resolve_session_id(request.session_id, user), user)
         current_state = session_data["state"]
         current_config = session_data["config"]
         
@@ -477,21 +487,23 @@ async def chat(request: ChatRequest, user: OptionalUser = None):
         
         web_logger.debug(f"Processing message for session {session_id[:8]}...")
         
-        # Add user message to state
+        # Add user message to state (kept only if the turn completes)
+        graph, _ = get_graph_and_session_manager()
+        checkpoint_config = turn_checkpoint(graph, current_config)
         current_state["messages"].append(HumanMessage(content=request.message))
         
         # Process through agent graph
-        graph, _ = get_graph_and_session_manager()
-        result = graph.invoke(current_state, config=current_config)
+        try:
+            result = graph.invoke(current_state, config=current_config)
+        except Exception:
+            abandon_turn(graph, checkpoint_config, session_id)
+            raise
         
         # Update state with result
         current_state.update(result)
         
         # Update session activity
-        update_session_activity(session_id)
-        active_domains = rag_system.get_domain_status().get("active_domains", [])
-        _, session_manager = get_graph_and_session_manager()
-        session_manager.update_activity(active_domains)
+        finish_turn(session_id)
         
         # Extract response information
         if current_state.get("messages") and len(current_state["messages"]) > 0:
@@ -520,6 +532,94 @@ async def chat(request: ChatRequest, user: OptionalUser = None):
         web_logger.error(f"Chat processing error: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
+async def stream_chat_events(graph, state: Dict[str, Any], config: Dict[str, Any], session_id: str):
+    """Run the graph on the bounded stream executor and relay its stream as server-sent events"""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+    cancellation = CancelOnDisconnect()
+    stream_config = {**config, "callbacks": [*(config.get("callbacks") or []), cancellation]}
+    
+    def run_graph():
+        # Sync stream: the SqliteSaver checkpointer has no async API. A client that
+        # disconnects cancels the turn at its next node or reply token, and the
+        # turn is rolled back so its user message is only kept with a reply.
+        checkpoint_config = None
+        try:
+            if cancellation.cancelled.is_set():
+                return  # Client left while the turn was queued
+            checkpoint_config = turn_checkpoint(graph, config)
+            for item in graph.stream(state, config=stream_config, stream_mode=["updates", "messages"]):
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            abandon_turn(graph, checkpoint_config, session_id)
+            if cancellation.cancelled.is_set():
+                web_logger.info(f"Chat stream for session {session_id[:8]} cancelled after client disconnect")
+            else:
+                web_logger.error(f"Chat stream processing error: {e}")
+                loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+        else:
+            finish_turn(session_id)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+    
+    # First byte right away, before any model work
+    yield sse_event("session", {"session_id": session_id})
+    loop.run_in_executor(stream_executor, run_graph)
+    
+    try:
+        tracker = ChatStreamTracker()
+        while True:
+            item = await queue.get()
+            if item is finished:
+                break
+            mode, chunk = item
+            if mode == "error":
+                yield sse_event("error", {"detail": f"Error processing message: {chunk}"})
+                return
+            for event, data in tracker.handle(mode, chunk):
+                yield sse_event(event, data)
+        
+        for event, data in tracker.finish():
+            yield sse_event(event, data)
+        yield sse_event("done", {"session_id": session_id, **tracker.metadata, "timestamp": datetime.now()})
+    finally:
+        # Runs when the client disconnects (the response is cancelled) - stop spending tokens
+        cancellation.cancel()
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, user: OptionalUser = None):
+    """
+    Streaming chat endpoint - server-sent events (supports optional authentication)
+    
+    Events: session (immediately), metadata (message_type, rag_used, cache_hit as they
+    are decided), token (reply text), answer (whole replies such as Q&A cache hits),
+    done (final metadata) or error.
+    """
+    try:
+        session_id, session_data = get_or_create_session(resolve_session_id(request.session_id, user), user)
+        
+        # Sync user data if authenticated
+        if user:
+            await user_sync_service.sync_user(user)
+        
+        # The user message is kept only if the turn completes (see stream_chat_events)
+        current_state = session_data["state"]
+        current_state["messages"].append(HumanMessage(content=request.message))
+        graph, _ = get_graph_and_session_manager()
+    except HTTPException:
+        raise
+    except Exception as e:
+        web_logger.error(f"Chat stream setup error: {e}")
+        raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
+    
+    web_logger.debug(f"Streaming message for session {session_id[:8]}...")
+    return StreamingResponse(
+        stream_chat_events(graph, current_state, session_data["config"], session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/status", response_model=SystemStatus)
 async def get_system_status():
     """Get current system status"""
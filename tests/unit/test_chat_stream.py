@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Unit tests for chat streaming events.
+
+Tests the mapping of graph stream chunks to server-sent events including:
+- Only tagged agent reply tokens streamed
+- Early metadata from classifier and agent updates
+- Speculative Q&A cache hits sent once as a whole answer
+- Unified-mode [mode: ...] header stripped from the token stream
+- Abandoned turns cancelled mid-reply and before their next step
+- Unfinished turns rolled back to the pre-turn checkpoint (no unanswered user message)
+"""
+
+import json
+import unittest
+import sys
+from pathlib import Path
+from typing import Annotated, TypedDict
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessageChunk, AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from utils.chat_stream import (
+    REPLY_TAG, CancelOnDisconnect, ChatStreamTracker, StreamCancelled, rollback_turn, split_mode_header,
+    sse_event, turn_checkpoint
+)
+
+
+def token(text, tags=(REPLY_TAG,)):
+    """A messages-mode stream item."""
+    return "messages", (AIMessageChunk(content=text), {'tags': list(tags), 'langgraph_node': "logical"})
+
+
+def feed(tracker, items):
+    """All events for a sequence of stream items."""
+    events = []
+    for mode, chunk in items:
+        events += tracker.handle(mode, chunk)
+    return events + tracker.finish()
+
+
+class TestChatStreamTracker(unittest.TestCase):
+    """Test suite for ChatStreamTracker."""
+
+    def setUp(self):
+        """Set up a fresh turn."""
+        self.tracker = ChatStreamTracker()
+
+    def test_generated_reply(self):
+        """Metadata comes first, then only the agent's reply tokens."""
+        events = feed(self.tracker, [
+            ("updates", {'classifier': {'message_type': "logical", 'should_use_rag': True}}),
+            token('{"message_type"', tags=()),
+            token("## Moon"),
+            token(" water"),
+            ("updates", {'logical': {'messages': [AIMessage(content="## Moon water")], 'rag_context': "chunks"}}),
+        ])
+
+        self.assertEqual(events[0], ("metadata", {'message_type': "logical", 'rag_used': True, 'cache_hit': None}))
+        self.assertEqual([data['text'] for event, data in events if event == "token"], ["## Moon", " water"])
+        self.assertEqual(self.tracker.metadata['cache_hit'], False)
+        self.assertNotIn("answer", [event for event, _ in events])
+
+    def test_speculative_cache_hit_sent_once(self):
+        """A cache hit is sent whole as soon as RAG is confirmed, not again with the agent update."""
+        events = feed(self.tracker, [
+            ("updates", {'retrieval': {'speculative_rag': {'type': "qa_cache_hit", 'content': "Moonlight overnight."}}}),
+            ("updates", {'classifier': {'message_type': "logical", 'should_use_rag': True}}),
+            ("updates", {'logical': {'messages': [AIMessage(content="Moonlight overnight.")], 'rag_context': "qa_cache_hit"}}),
+        ])
+
+        answers = [data['text'] for event, data in events if event == "answer"]
+        self.assertEqual(answers, ["Moonlight overnight."])
+        self.assertTrue(self.tracker.metadata['cache_hit'])
+
+    def test_cache_hit_discarded_without_rag(self):
+        """Speculative hits are not sent when the classifier chose no RAG."""
+        events = feed(self.tracker, [
+            ("updates", {'retrieval': {'speculative_rag': {'type': "qa_cache_hit", 'content': "Cached."}}}),
+            ("updates", {'classifier': {'message_type': "logical", 'should_use_rag': False}}),
+            token("Hello!"),
+        ])
+
+        self.assertNotIn("answer", [event for event, _ in events])
+
+    def test_mode_header_stripped(self):
+        """Unified replies report the header's mode and stream only the answer."""
+        events = feed(self.tracker, [token("[mo"), token("de: emot"), token("ional]\n## Breathe"), token(" gently")])
+
+        self.assertIn(("metadata", {'message_type': "emotional", 'rag_used': None, 'cache_hit': None}), events)
+        self.assertEqual("".join(data['text'] for event, data in events if event == "token"), "## Breathe gently")
+
+    def test_short_reply_flushed(self):
+        """A reply shorter than the header prefix is still delivered."""
+        events = feed(self.tracker, [token("[o")])
+
+        self.assertEqual(events, [("token", {'text': "[o"})])
+
+
+class TestCancelOnDisconnect(unittest.TestCase):
+    """Test suite for cancelling abandoned turns."""
+    
+    def test_reply_stops_mid_stream(self):
+        """A cancelled turn should stop generating at the next token."""
+        cancellation = CancelOnDisconnect()
+        model = FakeListChatModel(responses=["The full moon invites release."])
+        tokens = []
+        
+        with self.assertRaises(StreamCancelled):
+            for chunk in model.stream("full moon?", config={'callbacks': [cancellation]}):
+                tokens.append(chunk.content)
+                cancellation.cancel()
+        
+        self.assertEqual(len(tokens), 1)
+    
+    def test_next_step_not_started(self):
+        """A cancelled turn should not start another chain or node."""
+        cancellation = CancelOnDisconnect()
+        calls = []
+        step = RunnableLambda(lambda text: calls.append(text) or text)
+        
+        step.invoke("first", config={'callbacks': [cancellation]})
+        cancellation.cancel()
+        with self.assertRaises(StreamCancelled):
+            step.invoke("second", config={'callbacks': [cancellation]})
+        
+        self.assertEqual(calls, ["first"])
+
+
+class TurnState(TypedDict):
+    """Minimal session state for rollback tests."""
+    messages: Annotated[list, add_messages]
+    rag_context: str
+
+
+class TestTurnRollback(unittest.TestCase):
+    """Test suite for rolling back unfinished turns."""
+    
+    def setUp(self):
+        """Set up a two-node graph with a session holding one finished exchange."""
+        self.cancellation = CancelOnDisconnect()
+        
+        def classifier(state):
+            self.cancellation.cancel()  # Client leaves while the turn is running
+            return {"rag_context": "chunks"}
+        
+        builder = StateGraph(TurnState)
+        builder.add_node("classifier", classifier)
+        builder.add_node("agent", lambda state: {"messages": [AIMessage(content="Reply")]})
+        builder.add_edge(START, "classifier")
+        builder.add_edge("classifier", "agent")
+        builder.add_edge("agent", END)
+        self.graph = builder.compile(checkpointer=MemorySaver())
+        self.config = {"configurable": {"thread_id": "session"}}
+        self.graph.update_state(self.config, {
+            "messages": [HumanMessage(content="Hi"), AIMessage(content="Hello")], "rag_context": "no_rag"
+        })
+    
+    def _turn_input(self, text):
+        state = dict(self.graph.get_state(self.config).values)
+        state["messages"] = [*state["messages"], HumanMessage(content=text)]
+        return state
+    
+    def test_cancelled_turn_leaves_no_user_message(self):
+        """A cancelled turn should leave the session exactly as it was before the turn."""
+        checkpoint_config = turn_checkpoint(self.graph, self.config)
+        config = {**self.config, "callbacks": [self.cancellation]}
+        
+        with self.assertRaises(StreamCancelled):
+            for _ in self.graph.stream(self._turn_input("Full moon?"), config=config):
+                pass
+        self.assertEqual(len(self.graph.get_state(self.config).values["messages"]), 3)
+        
+        self.assertTrue(rollback_turn(self.graph, checkpoint_config))
+        
+        values = self.graph.get_state(self.config).values
+        self.assertEqual([message.content for message in values["messages"]], ["Hi", "Hello"])
+        self.assertEqual(values["rag_context"], "no_rag")
+    
+    def test_next_turn_after_rollback(self):
+        """The session should continue normally from the restored checkpoint."""
+        rollback_turn(self.graph, turn_checkpoint(self.graph, self.config))
+        
+        self.graph.invoke(self._turn_input("New moon?"), config=self.config)
+        
+        messages = self.graph.get_state(self.config).values["messages"]
+        self.assertEqual([message.content for message in messages], ["Hi", "Hello", "New moon?", "Reply"])
+    
+    def test_no_checkpoint_nothing_to_roll_back(self):
+        """Without a pre-turn checkpoint there is nothing to restore."""
+        self.assertFalse(rollback_turn(self.graph, None))
+
+
+class TestStreamHelpers(unittest.TestCase):
+    """Test suite for the event and header helpers."""
+
+    def test_sse_event(self):
+        """Events are framed with a JSON data line and a blank line."""
+        frame = sse_event("token", {'text': "🌙"})
+
+        self.assertTrue(frame.startswith("event: token\ndata: "))
+        self.assertTrue(frame.endswith("\n\n"))
+        self.assertEqual(json.loads(frame.split("data: ", 1)[1]), {'text': "🌙"})
+
+    def test_split_mode_header(self):
+        """Headers are split off; replies without one default to logical."""
+        self.assertEqual(split_mode_header("[mode: Emotional]\n## Hi"), ("emotional", "## Hi"))
+        self.assertEqual(split_mode_header("## Hi"), ("logical", "## Hi"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Unit tests for ContextPacker.
+
+Tests the token-budgeted context packing including:
+- Near-duplicate chunks dropped by embedding similarity
+- Budget filled by relevance, trimming only the last chunk
+- Memory capped at its share of the budget
+- Per-section token accounting
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from core.context_packer import ContextPacker, count_tokens, trim_to_tokens
+
+
+def make_chunk(chunk_id: str, content: str, distance: float):
+    """Build a retrieved chunk dict."""
+    return {"id": chunk_id, "content": content, "distance": distance, "metadata": {}}
+
+
+class TestContextPacker(unittest.TestCase):
+    """Test suite for ContextPacker."""
+    
+    def test_trim_respects_token_limit(self):
+        """Trimmed text should fit the requested token count."""
+        text = "The full moon amplifies intentions. " * 50
+        
+        trimmed = trim_to_tokens(text, 20)
+        
+        self.assertLessEqual(count_tokens(trimmed), 20)
+        self.assertTrue(trimmed.endswith("…"))
+    
+    def test_near_duplicates_dropped(self):
+        """Chunks with near-identical embeddings should be packed once."""
+        packer = ContextPacker(token_budget=1000)
+        chunks = [
+            make_chunk("a", "Full moon rituals release what no longer serves.", 0.1),
+            make_chunk("b", "Full moon rituals help release what no longer serves.", 0.2),
+            make_chunk("c", "Amethyst supports calm intuition.", 0.3)
+        ]
+        embeddings = {"a": [1.0, 0.0, 0.0], "b": [0.99, 0.01, 0.0], "c": [0.0, 1.0, 0.0]}
+        
+        packed = packer.pack(chunks, embeddings=embeddings)
+        
+        self.assertEqual(packed["chunks_used"], 2)
+        self.assertEqual(packed["duplicates_dropped"], 1)
+        self.assertNotIn("help release", packed["knowledge"])
+    
+    def test_identical_text_dropped_without_embeddings(self):
+        """Exact duplicate texts should be dropped even without embeddings."""
+        packer = ContextPacker(token_budget=1000)
+        chunks = [make_chunk(None, "New moon intentions.", 0.1), make_chunk(None, "new moon  intentions.", 0.2)]
+        
+        packed = packer.pack(chunks)
+        
+        self.assertEqual(packed["chunks_used"], 1)
+    
+    def test_fills_budget_by_relevance(self):
+        """The most relevant chunks should be packed first within the budget."""
+        packer = ContextPacker(token_budget=120, min_chunk_tokens=200)
+        chunks = [
+            make_chunk("low", "Low relevance " * 30, 0.9),
+            make_chunk("high", "High relevance " * 30, 0.1)
+        ]
+        
+        packed = packer.pack(chunks)
+        
+        self.assertTrue(packed["knowledge"].startswith("[Chunk 1]: High relevance"))
+        self.assertNotIn("Low relevance", packed["knowledge"])
+        self.assertLessEqual(packed["tokens"]["total"], 120)
+    
+    def test_memory_capped_and_reported(self):
+        """Memory should stay within its share and tokens should be reported per section."""
+        packer = ContextPacker(token_budget=200, memory_share=0.25)
+        memory = "Earlier we discussed lunar cycles and journaling. " * 40
+        
+        packed = packer.pack([make_chunk("a", "Moon water is charged overnight.", 0.1)], memory)
+        
+        self.assertLessEqual(packed["tokens"]["memory"], 50)
+        self.assertGreater(packed["tokens"]["knowledge"], 0)
+        self.assertEqual(packed["tokens"]["total"], packed["tokens"]["memory"] + packed["tokens"]["knowledge"])
+        self.assertEqual(packed["tokens"]["budget"], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
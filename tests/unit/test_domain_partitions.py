@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests for DomainPartitionedIndex.
+
+Tests the per-domain partition collections:
+- Ingestion routing by domain metadata
+- Incremental sync from the shared collection
+- Fan-out across active domains with a merged top-k
+"""
+
+import unittest
+import sys
+import uuid
+from pathlib import Path
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+import chromadb
+
+from core.domain_partitions import DomainPartitionedIndex
+
+
+class TestDomainPartitionedIndex(unittest.TestCase):
+    """Test suite for DomainPartitionedIndex."""
+
+    def setUp(self):
+        """Set up a shared collection with chunks from three domains."""
+        self.client = chromadb.EphemeralClient()
+        self.base_name = f"test_{uuid.uuid4().hex[:8]}"
+        self.shared = self.client.create_collection(self.base_name, configuration={"hnsw": {"space": "cosine"}})
+        self.shared.add(
+            ids=["lunar-1", "lunar-2", "crystal-1", "numbers-1", "other-1"],
+            embeddings=[[1.0, 0.0], [0.9, 0.1], [0.8, 0.2], [0.0, 1.0], [1.0, 0.05]],
+            documents=["Full moon", "Waxing moon", "Moonstone", "Life path", "Untagged"],
+            metadatas=[{'domain': 'lunar'}, {'domain': 'lunar'}, {'domain': 'crystals'},
+                       {'domain': 'numerology'}, {'domain': 'tarot'}]
+        )
+        self.partitions = DomainPartitionedIndex(self.client, self.base_name, {"lunar", "crystals", "numerology"})
+
+    def test_sync_routes_by_domain(self):
+        """Syncing should copy each chunk into its domain partition only."""
+        self.partitions.build_from_collection(self.shared)
+
+        self.assertEqual(self.partitions.collections['lunar'].count(), 2)
+        self.assertEqual(self.partitions.collections['crystals'].count(), 1)
+        self.assertEqual(self.partitions.size, 4)
+        self.assertIsNotNone(self.partitions.fingerprint)
+
+    def test_sync_removes_deleted_chunks(self):
+        """Chunks deleted from the shared collection should leave their partition."""
+        self.partitions.build_from_collection(self.shared)
+        self.shared.delete(ids=["lunar-2"])
+
+        self.partitions.build_from_collection(self.shared)
+
+        self.assertEqual(self.partitions.collections['lunar'].get()['ids'], ["lunar-1"])
+
+    def test_query_searches_only_active_domains(self):
+        """A single-domain filter should only search that partition."""
+        self.partitions.build_from_collection(self.shared)
+
+        results = self.partitions.query([[1.0, 0.0]], k=3, where={"domain": {"$in": ["crystals"]}})
+
+        self.assertEqual([doc.page_content for doc, _ in results[0]], ["Moonstone"])
+
+    def test_query_merges_top_k_across_domains(self):
+        """Multi-domain fan-out should merge results by distance."""
+        self.partitions.build_from_collection(self.shared)
+
+        results = self.partitions.query([[1.0, 0.0], [0.0, 1.0]], k=2,
+                                        where={"domain": {"$in": ["lunar", "crystals", "numerology"]}})
+
+        self.assertEqual([doc.page_content for doc, _ in results[0]], ["Full moon", "Waxing moon"])
+        self.assertEqual(results[1][0][0].page_content, "Life path")
+        distances = [distance for _, distance in results[0]]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_add_skips_unknown_domains(self):
+        """Rows without an available domain are not routed."""
+        routed = self.partitions.add(
+            ["a", "b"], [[1.0, 0.0], [0.0, 1.0]], ["Moon", "Tarot"],
+            [{'domain': 'lunar'}, {'domain': 'tarot'}]
+        )
+
+        self.assertEqual(routed, 1)
+        self.assertEqual(self.partitions.size, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
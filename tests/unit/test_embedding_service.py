@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Unit tests for EmbeddingService.
+
+Tests the shared query embedding cache including:
+- Memory LRU hits keyed on normalized text
+- Persistence across service instances (restarts)
+- Size-bounded eviction
+- Degraded vectors are never cached
+- Async lookups share the same cache and keep SQLite off the event loop
+- Concurrent misses for one query coalesced into a single call
+- Reduced dimensions never share cache entries or collections with 1536-dim vectors
+"""
+
+import unittest
+import sys
+import tempfile
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from core.embedding_service import EmbeddingService, collection_name_for, normalize_text
+
+
+class TestEmbeddingService(unittest.TestCase):
+    """Test suite for EmbeddingService."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.temp_dir, "embeddings.sqlite")
+        self.client = Mock()
+        self.client.embed_query.side_effect = lambda text: [float(len(text)), 1.0, 0.5]
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _service(self, **kwargs):
+        return EmbeddingService(cache_path=self.cache_path, client=self.client, **kwargs)
+    
+    def test_normalize_text(self):
+        """Normalization should ignore case and whitespace differences."""
+        self.assertEqual(normalize_text("  What IS   the Moon? "), "what is the moon?")
+    
+    def test_repeated_query_hits_memory(self):
+        """Repeated (normalized) questions should skip the network."""
+        service = self._service()
+        
+        first = service.embed_query("What is the full moon?")
+        second = service.embed_query("what is the  FULL moon?")
+        
+        self.assertEqual(first, second)
+        self.client.embed_query.assert_called_once()
+        self.assertEqual(service.stats['memory_hits'], 1)
+    
+    def test_concurrent_misses_share_one_call(self):
+        """Concurrent requests for an uncached query should wait on a single embedding call."""
+        started, release = threading.Event(), threading.Event()
+        
+        def slow_embed(text):
+            started.set()
+            release.wait(5)
+            return [float(len(text)), 1.0, 0.5]
+        
+        self.client.embed_query.side_effect = slow_embed
+        service = self._service()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(service.embed_query("Moon water?")))
+                   for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while service.stats['coalesced'] < 2:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        self.client.embed_query.assert_called_once()
+        self.assertEqual(results, [[11.0, 1.0, 0.5]] * 3)
+        self.assertEqual(service.get_stats()['misses'], 1)
+    
+    def test_failed_miss_not_shared_with_later_calls(self):
+        """A failed embedding call should raise for its waiters but not poison the key."""
+        self.client.embed_query.side_effect = [RuntimeError("rate limited"), [1.0, 0.0, 0.0]]
+        service = self._service()
+        
+        with self.assertRaises(RuntimeError):
+            service.embed_query("Moon water?")
+        
+        self.assertEqual(service.embed_query("Moon water?"), [1.0, 0.0, 0.0])
+    
+    def test_persists_across_restarts(self):
+        """A new service instance should serve vectors from disk."""
+        self._service().embed_query("moon water")
+        
+        restarted = self._service()
+        vector = restarted.embed_query("moon water")
+        
+        self.assertEqual(self.client.embed_query.call_count, 1)
+        self.assertEqual(restarted.stats['disk_hits'], 1)
+        self.assertAlmostEqual(vector[2], 0.5)
+    
+    def test_memory_lru_eviction(self):
+        """Memory tier should stay within its bound."""
+        service = self._service(memory_cache_size=2)
+        
+        for text in ["one", "two", "three"]:
+            service.embed_query(text)
+        
+        self.assertEqual(len(service._memory_cache), 2)
+    
+    def test_disk_eviction(self):
+        """Disk tier should evict least recently used entries beyond its bound."""
+        service = self._service(max_disk_entries=5)
+        
+        for i in range(10):
+            service.embed_query(f"question {i}")
+        service._prune_disk_cache()
+        
+        self.assertEqual(service.get_stats()['disk_entries'], 5)
+    
+    def test_zero_vectors_not_cached(self):
+        """Degraded fallback vectors must not poison the cache."""
+        self.client.embed_query.side_effect = lambda text: [0.0, 0.0, 0.0]
+        service = self._service()
+        
+        service.embed_query("outage")
+        service.embed_query("outage")
+        
+        self.assertEqual(self.client.embed_query.call_count, 2)
+
+    def test_embed_queries_batches_misses(self):
+        """Batch embedding should serve cached queries and send misses in one request."""
+        self.client.embed_documents.side_effect = lambda texts: [[float(len(t)), 2.0, 0.5] for t in texts]
+        service = self._service()
+        cached = service.embed_query("full moon")
+        
+        vectors = service.embed_queries(["Full Moon", "amethyst", "amethyst "])
+        
+        self.client.embed_documents.assert_called_once_with(["amethyst"])
+        self.assertEqual(vectors[0], cached)
+        self.assertEqual(vectors[1], vectors[2])
+    
+    def test_dimensions_partition_disk_cache(self):
+        """Vectors cached at one dimensionality must not be served at another."""
+        self._service().embed_query("moon water")
+        
+        reduced = self._service(dimensions=512)
+        reduced.embed_query("moon water")
+        
+        self.assertEqual(self.client.embed_query.call_count, 2)
+        self.assertEqual(reduced.model_tag, "text-embedding-3-small@512")
+        self.assertEqual(reduced.get_stats()['dimensions'], 512)
+    
+    def test_collection_name_for_dimensions(self):
+        """Default dimensions keep the collection name; reduced ones get a suffix."""
+        self.assertEqual(collection_name_for("qa_cache_collection", 1536), "qa_cache_collection")
+        self.assertEqual(collection_name_for("qa_cache_collection", 256), "qa_cache_collection_256d")
+
+
+class TestAsyncEmbeddingService(unittest.IsolatedAsyncioTestCase):
+    """Test suite for the async EmbeddingService API."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.client = Mock()
+        self.client.aembed_query = AsyncMock(side_effect=lambda text: [float(len(text)), 1.0, 0.5])
+        self.service = EmbeddingService(cache_path=os.path.join(self.temp_dir, "embeddings.sqlite"), client=self.client)
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    async def test_async_query_is_cached(self):
+        """Repeated async queries should only reach the client once."""
+        first = await self.service.aembed_query("Full moon")
+        second = await self.service.aembed_query("full  moon")
+        
+        self.assertEqual(first, second)
+        self.client.aembed_query.assert_awaited_once()
+    
+    async def test_async_shares_cache_with_sync(self):
+        """A vector cached by the async path should serve sync lookups."""
+        await self.service.aembed_query("new moon")
+        
+        self.service.embed_query("new moon")
+        
+        self.client.embed_query.assert_not_called()
+        self.assertEqual(self.service.stats['memory_hits'], 1)
+    
+    async def test_async_disk_tier_runs_off_event_loop(self):
+        """SQLite reads and writes should run in worker threads, not on the event loop."""
+        await self.service.aembed_query("waning moon")
+        restarted = EmbeddingService(cache_path=self.service.cache_path, client=self.client)
+        threads = []
+        get_disk = restarted._get_disk
+        
+        def record_thread(key):
+            threads.append(threading.get_ident())
+            return get_disk(key)
+        
+        with patch.object(restarted, '_get_disk', side_effect=record_thread):
+            vector = await restarted.aembed_query("waning moon")
+        
+        self.assertEqual(vector, [11.0, 1.0, 0.5])
+        self.client.aembed_query.assert_awaited_once()
+        self.assertEqual(restarted.stats['disk_hits'], 1)
+        self.assertNotIn(threading.get_ident(), threads)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Unit tests for BM25Index and reciprocal-rank fusion.
+
+Tests the lexical retrieval layer including:
+- BM25 ranking of keyword queries
+- Domain filtering
+- Exact term-match detection for the fast path (IDF and score-margin thresholds)
+- RRF fusion of lexical and vector rankings
+- Rebuilds published as one snapshot while searches run
+"""
+
+import threading
+import unittest
+import sys
+from pathlib import Path
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from langchain_core.documents import Document
+
+from core.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+class TestBM25Index(unittest.TestCase):
+    """Test suite for BM25Index."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.index = BM25Index()
+        self.index.build(
+            documents=[
+                "Amethyst is a calming crystal for meditation.",
+                "The waning gibbous moon invites gratitude and release.",
+                "Life path 11 is a master number in numerology.",
+                "Rose quartz and amethyst pair well for heart work.",
+            ],
+            metadatas=[
+                {'domain': 'crystals'},
+                {'domain': 'lunar'},
+                {'domain': 'numerology'},
+                {'domain': 'crystals'},
+            ]
+        )
+    
+    def test_tokenize_drops_stopwords(self):
+        """Tokenizer should lowercase and drop stopwords."""
+        self.assertEqual(tokenize("What is the Waning Gibbous?"), ["waning", "gibbous"])
+    
+    def test_keyword_ranking(self):
+        """Keyword queries should rank documents containing the terms first."""
+        results = self.index.search("waning gibbous", k=2)
+        
+        self.assertEqual(len(results), 1)
+        self.assertIn("waning gibbous", results[0][0].page_content)
+    
+    def test_domain_filter(self):
+        """Domain filters should exclude other domains."""
+        results = self.index.search("amethyst", k=4, where={"domain": {"$in": ["lunar"]}})
+        self.assertEqual(results, [])
+    
+    def test_exact_match_detection(self):
+        """Short queries fully contained in every top result are exact matches."""
+        results = self.index.search("life path 11", k=1)
+        
+        self.assertTrue(self.index.is_exact_match("life path 11", results, k=1))
+        self.assertFalse(self.index.is_exact_match("amethyst healing", self.index.search("amethyst healing", k=1), k=1))
+    
+    def test_common_terms_not_exact(self):
+        """Terms spread across the corpus carry too little IDF to skip embeddings."""
+        results = self.index.search("amethyst", k=2)
+        
+        self.assertFalse(self.index.is_exact_match("amethyst", results, k=1))
+        self.assertTrue(self.index.is_exact_match("rose quartz amethyst", self.index.search("rose quartz amethyst", k=2), k=1))
+    
+    def test_close_runner_up_not_exact(self):
+        """The k-th result must clearly beat the best result outside the top-k."""
+        results = self.index.search("amethyst", k=2)
+        
+        self.assertTrue(self.index.is_exact_match("amethyst", results, k=1, min_idf=0.0, min_margin=0.1))
+        self.assertFalse(self.index.is_exact_match("amethyst", results, k=1, min_idf=0.0, min_margin=0.5))
+    
+    def test_rebuild_during_search(self):
+        """Searches racing rebuilds see either the old or the new corpus, never a mix."""
+        corpora = [
+            (["Amethyst calms."] * 3, [{'domain': 'crystals'}] * 3),
+            (["Amethyst calms the mind and the heart."], [{'domain': 'crystals'}]),
+        ]
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        errors = []
+
+        def rebuilds():
+            for i in range(300):
+                self.index.build(*corpora[i % 2], fingerprint=str(i))
+
+        def searches():
+            try:
+                for _ in range(300):
+                    results = self.index.search("amethyst", k=4)
+                    self.assertIn(len(results), (1, 3))
+            except Exception as e:
+                errors.append(e)
+
+        try:
+            threads = [threading.Thread(target=rebuilds)] + [threading.Thread(target=searches) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.index.fingerprint, "299")
+
+    def test_reciprocal_rank_fusion(self):
+        """Documents ranked well in both lists should come first."""
+        a, b, c = (Document(page_content=text) for text in ("a", "b", "c"))
+        
+        fused = reciprocal_rank_fusion([[(a, 0.1), (b, 0.2)], [(b, 9.0), (c, 5.0)]], k=3)
+        
+        self.assertEqual([doc.page_content for doc, _ in fused], ["b", "a", "c"])
+        self.assertEqual(fused[0][1], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Q&A cache miss log.
+
+Tests the append-only log and offline mining including:
+- Records and float16 embeddings read back aligned
+- Torn lines ignored without shifting later records
+- Separate logs per embedding size
+- Day files past the retention deleted
+- Spherical k-means grouping paraphrases into ranked candidates
+"""
+
+import os
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from cache.miss_log import MissLog, propose_candidates, spherical_kmeans
+
+
+class TestMissLog(unittest.TestCase):
+    """Test suite for MissLog."""
+
+    def setUp(self):
+        """Set up a log in a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log = MissLog(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_round_trip(self):
+        """Records and embeddings should read back aligned, per embedding size."""
+        self.log.record("What is a void moon?", [1.0, 0.0, 0.0], 0.61, "lunar", ["lunar"])
+        self.log.record("How do I cleanse quartz?", [0.0, 1.0, 0.0], None, None)
+        self.log.record("Short vector", [1.0, 0.0], 0.2, "lunar")
+
+        records, matrix = self.log.read(3)
+
+        self.assertEqual(self.log.dimensions(), [2, 3])
+        self.assertEqual([record['question'] for record in records], ["What is a void moon?", "How do I cleanse quartz?"])
+        self.assertEqual(records[0]['best_similarity'], 0.61)
+        np.testing.assert_allclose(matrix, [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+        self.assertNotIn('embedding', records[0])
+
+    def test_torn_write_ignored(self):
+        """A partially written line should not shift later records."""
+        self.log.record("What is a void moon?", [1.0, 0.0, 0.0], 0.61, "lunar")
+        path = os.path.join(self.temp_dir.name, os.listdir(self.temp_dir.name)[0])
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"ts": 1, "question": "torn')
+        self.log.record("How do I cleanse quartz?", [0.0, 1.0, 0.0], None, None)
+
+        records, matrix = self.log.read(3)
+
+        self.assertEqual([record['question'] for record in records], ["What is a void moon?", "How do I cleanse quartz?"])
+        np.testing.assert_allclose(matrix, [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+
+    def test_expired_days_pruned(self):
+        """Day files older than the retention should be deleted on the next write."""
+        old = os.path.join(self.temp_dir.name, "misses_3d_2000-01-01.jsonl")
+        with open(old, "w", encoding="utf-8") as f:
+            f.write("{}\n")
+
+        self.log.record("What is a void moon?", [1.0, 0.0, 0.0], 0.61, "lunar")
+
+        self.assertFalse(os.path.exists(old))
+        self.assertEqual(len(self.log.read(3)[0]), 1)
+
+    def test_clear(self):
+        """Clearing should remove the mined files."""
+        self.log.record("What is a void moon?", [1.0, 0.0, 0.0], 0.61, "lunar")
+
+        self.log.clear()
+
+        self.assertEqual(self.log.dimensions(), [])
+
+
+class TestMissMining(unittest.TestCase):
+    """Test suite for clustering misses into candidates."""
+
+    def setUp(self):
+        """Build misses around two topics plus one outlier."""
+        rng = np.random.default_rng(7)
+        centers = rng.normal(size=(2, 32))
+        self.records, vectors = [], []
+        for i in range(12):
+            topic = i % 2
+            vectors.append(centers[topic] + 0.1 * rng.normal(size=32))
+            self.records.append({
+                'question': ["What is a void moon?", "How do I cleanse quartz?"][topic] + f" ({i})",
+                'best_similarity': 0.5,
+                'domain': ["lunar", "crystals"][topic]
+            })
+        vectors.append(rng.normal(size=32))
+        self.records.append({'question': "Unrelated", 'best_similarity': None, 'domain': None})
+        self.matrix = np.array(vectors, dtype=np.float32)
+
+    def test_kmeans_separates_topics(self):
+        """Paraphrases of one topic should share a cluster."""
+        labels, centroids = spherical_kmeans(self.matrix[:12], 2)
+
+        self.assertEqual(len(set(labels[0:12:2])), 1)
+        self.assertEqual(len(set(labels[1:12:2])), 1)
+        self.assertNotEqual(labels[0], labels[1])
+        np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, rtol=1e-5)
+
+    def test_candidates_ranked_with_domain(self):
+        """Frequent clusters become candidates with a member question and majority domain."""
+        candidates = propose_candidates(self.records, self.matrix, k=3, min_count=3)
+
+        self.assertEqual(len(candidates), 2)
+        self.assertEqual({candidate['domain'] for candidate in candidates}, {"lunar", "crystals"})
+        self.assertGreaterEqual(candidates[0]['count'], candidates[1]['count'])
+        for candidate in candidates:
+            self.assertIn(candidate['question'], candidate['variants'])
+
+
+if __name__ == '__main__':
+    unittest.main()
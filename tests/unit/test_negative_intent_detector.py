@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Unit tests for NegativeIntentDetector.
+
+Tests the precompiled single-pass matcher including:
+- Phrase, critical, strong and contextual categories
+- Standalone "no" versus "no" inside other words
+- Batch API matching per-query results
+- Indicators reported once per category hit
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from cache.negative_intent_detector import NegativeIntentDetector
+
+
+class TestNegativeIntentDetector(unittest.TestCase):
+    """Test suite for NegativeIntentDetector."""
+
+    def setUp(self):
+        """Set up a detector with the default sensitivity."""
+        self.detector = NegativeIntentDetector()
+
+    def test_categories(self):
+        """Each category should flag its queries; positive questions should pass."""
+        self.assertTrue(self.detector.has_negative_intent("Why should I avoid moon water?"))
+        self.assertTrue(self.detector.has_negative_intent("Should I never do moon rituals?"))
+        self.assertTrue(self.detector.has_negative_intent("Is moon water dangerous?"))
+        self.assertTrue(self.detector.has_negative_intent("Any warning?"))
+        self.assertFalse(self.detector.has_negative_intent("How do I make moon water?"))
+        self.assertFalse(self.detector.has_negative_intent("   "))
+
+    def test_standalone_no(self):
+        """'no' counts only as a standalone word."""
+        self.assertTrue(self.detector.has_negative_intent("no moon water tonight"))
+        self.assertFalse(self.detector.has_negative_intent("What do you know about moon water"))
+
+    def test_batch_matches_single(self):
+        """has_negative_intent_many should return one flag per query, in order."""
+        queries = ["What is moon water?", "Is moon water dangerous?", "", "What not to do at full moon"]
+
+        self.assertEqual(
+            self.detector.has_negative_intent_many(queries),
+            [self.detector.has_negative_intent(query) for query in queries]
+        )
+        self.assertEqual(self.detector.has_negative_intent_many(queries), [False, True, False, True])
+
+    def test_indicators(self):
+        """Indicators should list each phrase and word hit with its category."""
+        indicators = self.detector.get_negative_indicators("Is it dangerous to never avoid problems with crystals?")
+
+        self.assertEqual(
+            set(indicators),
+            {"phrase: 'is it dangerous'", "phrase: 'problems with'", "critical: 'never'",
+             "strong: 'dangerous'", "strong: 'avoid'"}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
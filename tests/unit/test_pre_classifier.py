@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the local pre-classifier.
+
+Tests zero-LLM classification including:
+- Greeting, lunar-date and command rules (anchored, no accidental matches)
+- Nearest-centroid decisions only when both heads are confident
+- Deferral without embeddings or on embedding errors
+- Share of skipped LLM calls in stats
+- Coverage and agreement against LLM classifier decisions
+"""
+
+import unittest
+import sys
+from pathlib import Path
+from unittest.mock import Mock
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from core.pre_classifier import PreClassification, PreClassifier, measure_agreement
+
+
+EXAMPLES = [
+    ("I feel sad", "emotional", True),
+    ("I feel lost", "emotional", True),
+    ("What does the Tower card mean?", "logical", True),
+    ("Properties of amethyst", "logical", True),
+    ("Capital of France", "logical", False),
+    ("Boil an egg", "logical", False),
+]
+
+# Axes: emotional, esoteric knowledge, general knowledge
+VECTORS = {
+    "I feel sad": [1.0, 0.1, 0.0],
+    "I feel lost": [1.0, 0.0, 0.0],
+    "What does the Tower card mean?": [0.0, 1.0, 0.0],
+    "Properties of amethyst": [0.1, 1.0, 0.0],
+    "Capital of France": [0.0, 0.0, 1.0],
+    "Boil an egg": [0.0, 0.1, 1.0],
+}
+
+
+def fake_embeddings():
+    """Embeddings serving fixed vectors for examples and a per-test query vector."""
+    embeddings = Mock()
+    embeddings.embed_queries.side_effect = lambda texts: [VECTORS[text] for text in texts]
+    return embeddings
+
+
+class TestPreClassifierRules(unittest.TestCase):
+    """Test suite for the rule stage."""
+
+    def setUp(self):
+        """Set up a rules-only classifier."""
+        self.classifier = PreClassifier()
+
+    def test_rules_match_short_fixed_forms(self):
+        """Greetings, current lunar questions and commands need no RAG."""
+        for message in ["hi", "Thanks so much!", "What is the moon phase today?",
+                        "When is the next full moon?", "stats", "domains enable tarot"]:
+            decision = self.classifier.classify(message)
+            self.assertEqual((decision.message_type, decision.should_use_rag, decision.source),
+                             ("logical", False, "rule"), message)
+
+    def test_rules_do_not_match_longer_messages(self):
+        """Messages that only start like a rule should defer."""
+        for message in ["hi, I feel terrible today", "When is the best moon phase to manifest?", "moon water benefits",
+                        "hi struggling", "hey help", "hi there I'm struggling", "moon", "lunar", "/help me with my chart"]:
+            self.assertIsNone(self.classifier.classify(message), message)
+
+    def test_rule_decision_is_not_counted(self):
+        """Rule checks outside classification (speculative retrieval) should not change stats."""
+        self.assertIsNotNone(self.classifier.rule_decision("hello"))
+        self.assertEqual(self.classifier.get_stats()['total'], 0)
+
+
+class TestPreClassifierCentroids(unittest.TestCase):
+    """Test suite for the nearest-centroid stage."""
+
+    def setUp(self):
+        """Set up a classifier over three-dimensional example embeddings."""
+        self.embeddings = fake_embeddings()
+        self.classifier = PreClassifier(self.embeddings, examples=EXAMPLES, min_margin=0.1)
+
+    def classify(self, vector):
+        self.embeddings.embed_query.return_value = vector
+        return self.classifier.classify("a message no rule matches")
+
+    def test_confident_decisions(self):
+        """Messages near one example group get that group's labels."""
+        self.assertEqual(self.classify([1.0, 0.05, 0.0])[:2], ("emotional", True))
+        self.assertEqual(self.classify([0.0, 1.0, 0.05])[:2], ("logical", True))
+        self.assertEqual(self.classify([0.0, 0.05, 1.0])[:2], ("logical", False))
+        self.assertEqual(self.classify([0.0, 1.0, 0.0]).source, "centroid")
+
+    def test_uncertain_message_defers(self):
+        """Messages far from every group, or between groups, should go to the LLM."""
+        self.assertIsNone(self.classify([-1.0, 0.0, 0.0]))
+        self.assertIsNone(self.classify([1.0, 0.0, 1.0]))
+
+    def test_embedding_failure_defers(self):
+        """Embedding errors should defer rather than raise."""
+        self.embeddings.embed_query.side_effect = RuntimeError("offline")
+
+        self.assertIsNone(self.classifier.classify("a message no rule matches"))
+
+    def test_skip_rate(self):
+        """Stats should report the share of LLM classifier calls skipped."""
+        self.classifier.classify("hello")
+        self.classify([0.0, 0.0, 1.0])
+        self.classify([-1.0, 0.0, 0.0])
+        self.classify([1.0, 0.0, 1.0])
+
+        stats = self.classifier.get_stats()
+
+        self.assertEqual((stats['rule'], stats['centroid'], stats['deferred']), (1, 1, 2))
+        self.assertEqual(stats['skip_rate'], 50.0)
+
+
+class TestMeasureAgreement(unittest.TestCase):
+    """Test suite for measure_agreement."""
+
+    def test_coverage_and_agreement_per_stage(self):
+        """Agreement is measured over decided messages only, overall and per stage."""
+        decisions = [
+            PreClassification("logical", False, "rule"),
+            PreClassification("emotional", True, "centroid"),
+            PreClassification("logical", True, "centroid"),
+            None,
+        ]
+        reference = [("logical", False), ("emotional", True), ("logical", False), ("emotional", True)]
+
+        report = measure_agreement(decisions, reference)
+
+        self.assertEqual(report['coverage'], 0.75)
+        self.assertAlmostEqual(report['agreement'], 2 / 3)
+        self.assertEqual(report['type_agreement'], 1.0)
+        self.assertEqual(report['by_source']['rule']['agreement'], 1.0)
+        self.assertEqual(report['by_source']['centroid']['agreement'], 0.5)
+        self.assertEqual(report['disagreements'], [2])
+
+    def test_nothing_decided(self):
+        """A classifier that always defers has no agreement to report."""
+        report = measure_agreement([None, None], [("logical", False), ("emotional", True)])
+
+        self.assertEqual((report['coverage'], report['agreement']), (0.0, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+Unit tests for QACache.
+
+Tests the Q&A cache lookup tiers including:
+- Question normalization (case, punctuation, contractions)
+- Exact-match hits without embedding or vector search
+- Exact-match tier kept current on add and rebuilt when the collection changes elsewhere
+- Semantic fallback on exact-match misses
+- Async exact-match lookups run on the cache executor, off the event loop
+- Matches without a stored answer treated as misses
+- In-memory question matrix kept current on add
+- Answer write-back admission (question, prompt context and answer text) and generated-pair eviction
+- Speculative lookups counted only once their result is used
+- Answers kept in a separate store and fetched only for hits
+- Thread-safe, persisted statistics and per-domain counts (additive across workers)
+- Calibrated per-domain similarity thresholds
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+import sys
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from langchain_core.documents import Document
+
+from cache.answer_writeback import AnswerWriteBack
+from cache.qa_cache import QACache, normalize_question
+from cache.qa_stats import QACacheStats
+
+
+def build_qa_cache(questions=None, index_backend="chroma"):
+    """Create a Q&A cache with mocked embeddings and vectorstore."""
+    questions = questions or []
+    with patch.object(QACache, '_setup_embeddings'), \
+         patch.object(QACache, '_setup_chroma_client'), \
+         patch.object(QACache, '_setup_vectorstore'):
+        cache = QACache(domain_partitions=False, index_backend=index_backend,
+                        answer_store_path=":memory:", stats_path=":memory:")
+
+    cache.embeddings = Mock()
+    cache.embeddings.embed_query.return_value = [0.1, 0.2, 0.3]
+    cache.vectorstore = Mock()
+    cache.vectorstore._collection.get.return_value = {
+        'ids': [f"qa-{i}" for i in range(len(questions))],
+        'documents': [question for question, _, _ in questions],
+        'metadatas': [
+            {'domain': domain, 'source': 'test', 'qa_id': f"qa-{i}"}
+            for i, (_, _, domain) in enumerate(questions)
+        ]
+    }
+    cache.answer_store.put_many({f"qa-{i}": answer for i, (_, answer, _) in enumerate(questions)})
+    cache._refresh_indexes(force=True)
+    return cache
+
+
+class TestQuestionNormalization(unittest.TestCase):
+    """Test suite for normalize_question."""
+
+    def test_case_whitespace_and_punctuation(self):
+        """Case, spacing and punctuation should not matter."""
+        self.assertEqual(normalize_question("  What IS the Full-Moon?! "), "what is the full moon")
+
+    def test_contractions(self):
+        """Common contractions (straight or curly apostrophes) should be expanded."""
+        self.assertEqual(normalize_question("What's my life path?"), normalize_question("what is my life path"))
+        self.assertEqual(normalize_question("I don’t feel grounded"), "i do not feel grounded")
+
+
+class TestExactMatchTier(unittest.TestCase):
+    """Test suite for the exact-match tier."""
+
+    def setUp(self):
+        """Set up a cache with known questions."""
+        self.cache = build_qa_cache([
+            ("What is my life path number and its meaning?", "Add your birth date digits.", "numerology"),
+            ("Which crystals should I work with right now?", "Start with clear quartz.", "crystals"),
+        ])
+
+    def test_exact_hit_skips_embedding_and_search(self):
+        """A known question should be answered without an embedding or vector query."""
+        result = self.cache.search_qa("what's my life path number and its meaning", ["numerology"])
+
+        self.assertEqual(result['answer'], "Add your birth date digits.")
+        self.assertEqual(result['match'], "exact")
+        self.assertEqual(result['similarity'], 1.0)
+        self.cache.embeddings.embed_query.assert_not_called()
+        self.cache.vectorstore._collection.query.assert_not_called()
+        self.assertEqual(self.cache.get_stats()['exact_hits'], 1)
+
+    def test_exact_hit_respects_active_domains(self):
+        """Known questions from inactive domains should fall through to semantic search."""
+        self.cache.vectorstore._collection.query.return_value = {'ids': [[]], 'distances': [[]]}
+
+        result = self.cache.search_qa("Which crystals should I work with right now?", ["lunar"])
+
+        self.assertIsNone(result)
+        self.cache.vectorstore._collection.query.assert_called_once()
+
+    def test_pairs_removed_elsewhere_stop_matching(self):
+        """Pairs deleted by another process should leave the exact tier on the next staleness check."""
+        collection = self.cache.vectorstore._collection
+        collection.get.return_value = {
+            'ids': ["qa-1"],
+            'documents': ["Which crystals should I work with right now?"],
+            'metadatas': [{'domain': 'crystals', 'source': 'test', 'qa_id': "qa-1"}]
+        }
+
+        self.assertIsNotNone(self.cache.lookup_exact("What is my life path number and its meaning?"))
+
+        self.cache.index_refresh_interval = 0
+        self.assertIsNone(self.cache.lookup_exact("What is my life path number and its meaning?"))
+        self.assertEqual(self.cache.lookup_exact("Which crystals should I work with right now?")['qa_id'], "qa-1")
+        self.assertEqual(self.cache.get_domain_stats(), {'crystals': 1})
+
+    def test_missing_answer_is_a_miss(self):
+        """A known question whose answer is gone should fall through instead of returning an empty reply."""
+        self.cache.answer_store.delete(["qa-0"])
+        self.cache.vectorstore._collection.query.return_value = {'ids': [['qa-0']], 'distances': [[0.05]]}
+
+        result = self.cache.search_qa("What is my life path number and its meaning?", ["numerology"])
+
+        self.assertIsNone(result)
+        self.cache.vectorstore._collection.query.assert_called_once()
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['cache_hits'], stats['total_queries']), (0, 1))
+
+    def test_miss_uses_semantic_search(self):
+        """Unknown questions should use the semantic path."""
+        self.cache.vectorstore._collection.query.return_value = {'ids': [['qa-9']], 'distances': [[0.1]]}
+        self.cache.vectorstore._collection.get.return_value = {
+            'ids': ['qa-9'],
+            'documents': ["Which crystals help me sleep?"],
+            'metadatas': [{'domain': 'crystals', 'qa_id': 'qa-9'}]
+        }
+        self.cache.answer_store.put("qa-9", "Amethyst.")
+
+        result = self.cache.search_qa("crystals for better sleep", ["crystals"])
+
+        self.assertEqual(result['match'], "semantic")
+        self.assertEqual(result['answer'], "Amethyst.")
+        self.assertEqual(self.cache.get_stats()['exact_hits'], 0)
+
+    def test_on_miss_reports_best_similarity(self):
+        """Semantic misses should report the closest cached similarity for the miss log."""
+        self.cache.vectorstore._collection.query.return_value = {'ids': [['qa-1']], 'distances': [[0.4]]}
+        misses = []
+
+        result = self.cache.search_qa("tarot spreads", ["crystals"], query_embedding=[0.1, 0.2, 0.3],
+                                      on_miss=misses.append)
+
+        self.assertIsNone(result)
+        self.assertAlmostEqual(misses[0], 0.6)
+
+    def test_domain_threshold_applies_to_matched_pair(self):
+        """The matched pair's calibrated domain threshold should replace the default."""
+        self.cache.vectorstore._collection.query.return_value = {'ids': [['qa-1']], 'distances': [[0.25]]}
+        query = dict(query_embedding=[0.1, 0.2, 0.3])
+
+        self.assertIsNotNone(self.cache.search_qa("crystals for right now", ["crystals"], **query))
+
+        self.cache.domain_thresholds = {'crystals': 0.8}
+        self.assertIsNone(self.cache.search_qa("crystals for right now", ["crystals"], **query))
+        self.assertEqual(self.cache.threshold_for("numerology"), self.cache.similarity_threshold)
+
+    def test_domain_thresholds_loaded_from_collection_metadata(self):
+        """Thresholds stored by the calibration tool should be read at startup."""
+        self.cache.vectorstore._collection.metadata = {'domain_thresholds': '{"lunar": 0.72}'}
+
+        self.cache._load_domain_thresholds()
+
+        self.assertEqual(self.cache.domain_thresholds, {'lunar': 0.72})
+        self.assertEqual(self.cache.get_stats()['domain_thresholds'], {'lunar': 0.72})
+
+    def test_added_pair_is_exact_matchable(self):
+        """add_qa_pair should update the exact-match tier."""
+        self.cache.add_qa_pair("How do I cleanse my crystals?", "Moonlight overnight.", "crystals", qa_id="qa-new")
+
+        result = self.cache.lookup_exact("how do i cleanse my crystals", ["crystals"])
+
+        self.assertEqual(result['qa_id'], "qa-new")
+        self.assertIsNone(self.cache.lookup_exact("how do i charge my crystals", ["crystals"]))
+
+    def test_search_many_embeds_only_misses(self):
+        """Batched searches should only embed queries the exact tier cannot answer."""
+        self.cache.embeddings.embed_queries.return_value = [[0.1, 0.2, 0.3]]
+        self.cache.vectorstore._collection.query.return_value = {'ids': [[]], 'distances': [[]]}
+
+        results = self.cache.search_many(["Which crystals should I work with right now", "tell me about tarot"])
+
+        self.cache.embeddings.embed_queries.assert_called_once_with(["tell me about tarot"])
+        self.assertEqual(results[0]['match'], "exact")
+        self.assertIsNone(results[1])
+
+
+class TestAsyncExactMatch(unittest.IsolatedAsyncioTestCase):
+    """Test suite for the async exact-match tier."""
+
+    async def test_exact_lookup_runs_on_executor(self):
+        """asearch_qa should answer exact matches on a worker thread, without embedding."""
+        cache = build_qa_cache([
+            ("Which crystals should I work with right now?", "Start with clear quartz.", "crystals"),
+        ])
+        threads = []
+        lookup_exact = cache.lookup_exact
+
+        def record_thread(query, active_domains=None, record=True):
+            threads.append(threading.current_thread().name)
+            return lookup_exact(query, active_domains, record)
+
+        with patch.object(cache, 'lookup_exact', side_effect=record_thread):
+            result = await cache.asearch_qa("which crystals should i work with right now", ["crystals"])
+
+        self.assertEqual(result['answer'], "Start with clear quartz.")
+        self.assertTrue(threads[0].startswith("qa_cache_"))
+        cache.embeddings.embed_query.assert_not_called()
+
+
+class TestInMemoryQuestionMatrix(unittest.TestCase):
+    """Test suite for the in-memory Q&A question matrix."""
+
+    def setUp(self):
+        """Set up a cache backed by an in-memory matrix over a fake collection."""
+        rows = {
+            'ids': ["qa-1", "qa-2"],
+            'embeddings': [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+            'documents': ["How do I cleanse crystals?", "What is a life path number?"],
+            'metadatas': [
+                {'answer': "Moonlight.", 'domain': 'crystals', 'qa_id': 'qa-1'},
+                {'answer': "Sum your birth date.", 'domain': 'numerology', 'qa_id': 'qa-2'}
+            ]
+        }
+        self.cache = build_qa_cache()
+        self.cache.index_backend = "memory"
+        self.cache.vectorstore._collection.get.side_effect = lambda ids=None, include=None: {
+            key: [value[rows['ids'].index(i)] for i in ids] if ids else value
+            for key, value in rows.items()
+        }
+        self.cache.vectorstore._collection.configuration = {"hnsw": {"space": "l2"}}
+        self.cache._setup_vector_index()
+        self.rows = rows
+
+    def test_search_uses_matrix_not_chroma(self):
+        """Semantic lookups should be answered from the matrix with l2 similarity semantics."""
+        result = self.cache.search_qa("crystal cleansing", ["crystals"], query_embedding=[0.98, 0.2, 0.0])
+
+        self.assertEqual(result['qa_id'], "qa-1")
+        self.assertGreater(result['similarity'], 0.75)
+        self.cache.vectorstore.similarity_search_by_vector_with_relevance_scores.assert_not_called()
+        self.cache.vectorstore._collection.query.assert_not_called()
+
+    def test_domain_mask(self):
+        """Inactive domains should be masked out of the dot product."""
+        result = self.cache.search_qa("crystal cleansing", ["numerology"], query_embedding=[1.0, 0.0, 0.0])
+
+        self.assertIsNone(result)
+
+    def test_add_updates_matrix_in_place(self):
+        """add_qa_pair should append the stored vector without a rebuild."""
+        self.rows['ids'].append("qa-3")
+        self.rows['embeddings'].append([0.0, 0.0, 1.0])
+        self.rows['documents'].append("What does the new moon mean?")
+        self.rows['metadatas'].append({'answer': "Beginnings.", 'domain': 'lunar', 'qa_id': 'qa-3'})
+
+        with patch.object(self.cache.vector_index, 'build_from_collection') as rebuild:
+            self.cache.add_qa_pair("What does the new moon mean?", "Beginnings.", "lunar", qa_id="qa-3")
+
+        rebuild.assert_not_called()
+        self.assertEqual(self.cache.vector_index.size, 3)
+        result = self.cache.search_qa("new moon", ["lunar"], query_embedding=[0.0, 0.1, 1.0])
+        self.assertEqual(result['qa_id'], "qa-3")
+
+
+class TestAnswerWriteBack(unittest.TestCase):
+    """Test suite for generated-answer write-back and eviction."""
+
+    def setUp(self):
+        """Set up a cache with one curated pair and a write-back path."""
+        self.cache = build_qa_cache([
+            ("What is the meaning of a waning moon?", "Release and rest.", "lunar"),
+        ])
+        self.cache.max_generated_entries = 2
+        self.writeback = AnswerWriteBack(self.cache, min_repeats=2)
+
+    def test_rejection_reasons(self):
+        """Personal, emotional, time-sensitive, follow-up and non-logical turns are not cached."""
+        reason = self.writeback.rejection_reason
+        self.assertEqual(reason("What does my birth chart say?", "logical", False, "astrology"), "personal")
+        self.assertEqual(reason("Why do people feel anxious at full moon?", "logical", False, "lunar"), "emotional")
+        self.assertEqual(reason("What is the moon phase tonight?", "logical", False, "lunar"), "time_sensitive")
+        self.assertEqual(reason("And what about the tower card?", "logical", False, "tarot"), "follow_up")
+        self.assertEqual(reason("What does the tower card mean?", "emotional", False, "tarot"), "not_logical")
+        self.assertEqual(reason("What does the tower card mean?", "logical", True, "tarot"), "negative_intent")
+        self.assertIsNone(reason("What does the tower card mean?", "logical", False, "tarot"))
+        self.assertEqual(
+            reason("What does the tower card mean?", "logical", False, "tarot", personal_context=True),
+            "personal_context"
+        )
+
+    def test_answer_text_is_screened(self):
+        """Answers that address the asker or the current date are never shared, even for eligible questions."""
+        reason = self.writeback.answer_rejection_reason
+        self.assertEqual(reason("As you mentioned, your sign is Leo, so change suits you."), "personal_answer")
+        self.assertEqual(reason("Tonight the moon favors sudden change."), "time_sensitive_answer")
+        self.assertEqual(reason("  "), "empty_answer")
+        self.assertIsNone(reason("Sudden change and revelation."))
+
+    def test_personal_turns_never_written(self):
+        """Turns answered with memory or history, or with personal answers, never reach the shared cache."""
+        question = "What does the tower card mean?"
+        for _ in range(3):
+            self.assertFalse(self.writeback.consider(question, "Sudden change.", "logical", "tarot",
+                                                     personal_context=True))
+            self.assertFalse(self.writeback.consider(question, "Given your chart, sudden change.",
+                                                     "logical", "tarot"))
+
+        self.assertEqual(self.writeback.stats['written'], 0)
+        self.assertEqual(self.writeback.stats['rejected'], 6)
+        self.assertIsNone(self.cache.lookup_exact(question, ["tarot"]))
+
+    def test_written_after_min_repeats(self):
+        """An answer is stored only once the question has repeated and is then exact-matchable."""
+        question = "What does the tower card mean?"
+
+        self.assertFalse(self.writeback.consider(question, "Sudden change.", "logical", "tarot"))
+        self.assertTrue(self.writeback.consider(question + "!", "Sudden change.", "logical", "tarot"))
+
+        result = self.cache.lookup_exact(question, ["tarot"])
+        self.assertEqual(result['answer'], "Sudden change.")
+        metadata = self.cache.vectorstore.add_texts.call_args.kwargs['metadatas'][0]
+        self.assertFalse(metadata['pinned'])
+        self.assertEqual(self.cache.get_stats()['generated_entries'], 1)
+
+    def test_lfu_eviction_keeps_curated_pairs(self):
+        """Over the cap, the least used generated pair goes; curated pairs are never candidates."""
+        first = self.cache.add_generated_pair("What does the tower card mean?", "Change.", "tarot")
+        second = self.cache.add_generated_pair("What does the star card mean?", "Hope.", "tarot")
+        self.cache.lookup_exact("What does the tower card mean?", ["tarot"])
+
+        self.cache.add_generated_pair("What does the moon card mean?", "Illusion.", "tarot")
+
+        self.cache.vectorstore._collection.delete.assert_called_once_with(ids=[second])
+        self.assertIn(first, self.cache.generated_usage)
+        self.assertNotIn("qa-0", self.cache.generated_usage)
+        self.assertIsNotNone(self.cache.lookup_exact("What is the meaning of a waning moon?", ["lunar"]))
+        self.assertIsNone(self.cache.lookup_exact("What does the star card mean?", ["tarot"]))
+
+    def test_stale_pairs_expire_and_hits_are_flushed(self):
+        """Pairs unused past the max age are evicted; hit counters are persisted in batches."""
+        stale = self.cache.add_generated_pair("What does the tower card mean?", "Change.", "tarot")
+        fresh = self.cache.add_generated_pair("What does the star card mean?", "Hope.", "tarot")
+        self.cache.generated_usage[stale]['last_hit'] = time.time() - 31 * 86400
+        self.cache.lookup_exact("What does the star card mean?", ["tarot"])
+
+        self.assertEqual(self.cache.evict_generated(), 1)
+
+        self.cache.vectorstore._collection.update.assert_called_once()
+        update = self.cache.vectorstore._collection.update.call_args.kwargs
+        self.assertEqual(update['ids'], [fresh])
+        self.assertEqual(update['metadatas'][0]['hit_count'], 1)
+        self.cache.vectorstore._collection.delete.assert_called_once_with(ids=[stale])
+
+    def test_concurrent_hits_and_flushes(self):
+        """Hits recorded while usage is flushed should neither be lost nor break the flush."""
+        generated = self.cache.add_generated_pair("What does the tower card mean?", "Change.", "tarot")
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        errors = []
+
+        def hits():
+            for _ in range(500):
+                self.cache.lookup_exact("What does the tower card mean?", ["tarot"])
+
+        def flushes():
+            try:
+                for _ in range(200):
+                    self.cache.flush_usage()
+            except Exception as e:
+                errors.append(e)
+
+        try:
+            threads = [threading.Thread(target=hits) for _ in range(4)] + [threading.Thread(target=flushes)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.cache.generated_usage[generated]['hit_count'], 2000)
+        self.cache.flush_usage()
+        update = self.cache.vectorstore._collection.update.call_args.kwargs
+        self.assertEqual((update['ids'], update['metadatas'][0]['hit_count']), ([generated], 2000))
+
+    def test_deferred_lookup_recorded_only_when_used(self):
+        """Speculative lookups (record=False) should leave stats and usage alone until recorded."""
+        generated = self.cache.add_generated_pair("What does the tower card mean?", "Change.", "tarot")
+
+        hit = self.cache.search_qa("What does the tower card mean?", ["tarot"], record=False)
+
+        self.assertEqual(hit['answer'], "Change.")
+        self.assertEqual(self.cache.generated_usage[generated]['hit_count'], 0)
+        self.assertEqual(self.cache.get_stats()['cache_hits'], 0)
+
+        self.cache.record_lookup(hit)
+        self.cache.record_lookup(None)
+
+        self.assertEqual(self.cache.generated_usage[generated]['hit_count'], 1)
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['cache_hits'], stats['exact_hits'], stats['cache_misses']), (1, 1, 1))
+
+
+class TestAnswerStore(unittest.TestCase):
+    """Test suite for answers kept outside the vector metadata."""
+
+    def setUp(self):
+        """Set up a cache whose collection still holds answers in metadata."""
+        self.cache = build_qa_cache([("What does the star card mean?", "Hope.", "tarot")])
+        self.collection = self.cache.vectorstore._collection
+
+    def test_miss_loads_no_payload(self):
+        """Below-threshold matches should only fetch ids and distances."""
+        self.collection.query.return_value = {'ids': [['qa-0']], 'distances': [[0.6]]}
+        self.collection.get.reset_mock()
+
+        with patch.object(self.cache.answer_store, 'get') as fetch:
+            result = self.cache.search_qa("tarot for beginners", ["tarot"], query_embedding=[0.1, 0.2, 0.3])
+
+        self.assertIsNone(result)
+        self.assertEqual(self.collection.query.call_args.kwargs['include'], ["distances"])
+        self.collection.get.assert_not_called()
+        fetch.assert_not_called()
+
+    def test_legacy_answers_move_to_store(self):
+        """Answers found in metadata at startup should move to the store and out of metadata."""
+        self.collection.get.return_value = {
+            'ids': ["qa-7"],
+            'documents': ["What is a void of course moon?"],
+            'metadatas': [{'answer': "A pause.", 'domain': 'lunar', 'qa_id': 'qa-7'}]
+        }
+
+        self.cache._setup_answer_store()
+
+        self.assertEqual(self.cache.answer_store.get("qa-7"), "A pause.")
+        self.collection.update.assert_called_once_with(ids=["qa-7"], metadatas=[{'answer': None}])
+
+    def test_unchanged_answers_not_rewritten(self):
+        """The store should skip payloads whose content hash is unchanged."""
+        self.assertEqual(self.cache.answer_store.put_many({"qa-0": "Hope.", "qa-1": "New."}), 1)
+        self.assertEqual(self.cache.answer_store.count(), 2)
+
+
+class TestQACacheStats(unittest.TestCase):
+    """Test suite for incrementally maintained statistics."""
+
+    def setUp(self):
+        """Set up a cache with pairs in two domains."""
+        self.cache = build_qa_cache([
+            ("What does the star card mean?", "Hope.", "tarot"),
+            ("What does the moon card mean?", "Illusion.", "tarot"),
+            ("What is a life path number?", "Sum your birth date.", "numerology"),
+        ])
+        self.collection = self.cache.vectorstore._collection
+
+    def test_domain_counts_without_collection_scan(self):
+        """Domain counts follow adds, upserts and deletes without reading the collection."""
+        self.collection.get.reset_mock()
+        self.collection.get.return_value = {'ids': [], 'documents': [], 'metadatas': []}
+
+        self.cache.add_qa_pair("What is amethyst for?", "Calm.", "crystals", qa_id="qa-new")
+        self.cache.add_qa_pair("What is amethyst for?", "Calm and sleep.", "crystals", qa_id="qa-new")
+        self.cache.delete_pairs(["qa-0"])
+        self.collection.get.reset_mock()
+
+        self.assertEqual(self.cache.get_domain_stats(), {'tarot': 1, 'numerology': 1, 'crystals': 1})
+        self.collection.get.assert_not_called()
+
+    def test_concurrent_counters(self):
+        """Counters updated from many threads should not lose increments."""
+        def lookups():
+            for _ in range(200):
+                self.cache.lookup_exact("What does the star card mean?", ["tarot"])
+
+        threads = [threading.Thread(target=lookups) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['total_queries'], stats['exact_hits'], stats['cache_misses']), (1600, 1600, 0))
+
+    def test_persisted_next_to_collection(self):
+        """Counters and domain counts should survive a restart."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "qa_stats.sqlite")
+            stats = QACacheStats(path, "qa_cache_collection")
+            stats.increment('total_queries', 3)
+            stats.increment('cache_hits')
+            stats.adjust_domain('lunar', 2)
+            stats.flush()
+
+            reloaded = QACacheStats(path, "qa_cache_collection")
+
+            self.assertEqual(reloaded['total_queries'], 3)
+            self.assertEqual(reloaded.domain_counts(), {'lunar': 2})
+            self.assertEqual(QACacheStats(path, "other_collection")['total_queries'], 0)
+
+    def test_workers_flush_additive_deltas(self):
+        """Workers sharing a stats file should add their counts, not overwrite each other's."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "qa_stats.sqlite")
+            first = QACacheStats(path, "qa_cache_collection")
+            second = QACacheStats(path, "qa_cache_collection")
+            first.increment('total_queries', 3)
+            first.adjust_domain('lunar', 2)
+            second.increment('total_queries', 5)
+            second.adjust_domain('lunar', -1)
+            second.adjust_domain('tarot', 1)
+
+            first.flush()
+            second.flush()
+            first.flush()
+            second.flush()
+
+            self.assertEqual(second['total_queries'], 8)
+            self.assertEqual(second.domain_counts(), {'lunar': 1, 'tarot': 1})
+            reloaded = QACacheStats(path, "qa_cache_collection")
+            self.assertEqual(reloaded['total_queries'], 8)
+            self.assertEqual(reloaded.domain_counts(), {'lunar': 1, 'tarot': 1})
+
+    def test_recount_replaces_persisted_domains(self):
+        """A domain recount should replace stored domain counts while counters keep accumulating."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "qa_stats.sqlite")
+            stats = QACacheStats(path, "qa_cache_collection")
+            stats.increment('total_queries', 2)
+            stats.adjust_domain('lunar', 5)
+            stats.flush()
+
+            restarted = QACacheStats(path, "qa_cache_collection")
+            restarted.reset_domains()
+            restarted.adjust_domain('tarot', 1)
+            restarted.increment('total_queries')
+            restarted.flush()
+
+            reloaded = QACacheStats(path, "qa_cache_collection")
+            self.assertEqual(reloaded.domain_counts(), {'tarot': 1})
+            self.assertEqual(reloaded['total_queries'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
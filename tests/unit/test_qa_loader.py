@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the markdown Q&A loader.
+
+Tests the streaming parser and incremental sync including:
+- `## N. Question` sections parsed into pairs with stable ids
+- Unchanged corpus reloaded with zero embedding calls
+- Revised answers updated without re-embedding
+- New questions embedded in one batch
+- Pairs removed from the markdown deleted from the cache
+"""
+
+import tempfile
+import unittest
+import uuid
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+import chromadb
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+
+from cache.qa_cache import QACache
+from cache.qa_loader import QAMarkdownLoader, parse_qa_markdown
+
+
+LUNAR_QA = """# Lunar Knowledge Q&A
+
+This document contains curated questions and answers.
+
+## 1. What Are The Phases Of The Moon?
+
+New, waxing, full and waning.
+
+Each lasts about a week.
+
+---
+
+## 2. What Is Moon Water?
+
+Water charged under moonlight.
+
+---
+"""
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic embeddings that count every embedded text."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0]
+
+
+class TestParseQAMarkdown(unittest.TestCase):
+    """Test suite for parse_qa_markdown."""
+
+    def test_sections_become_pairs(self):
+        """Headings become questions; answers drop the section separator."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "lunar_qa.md"
+            path.write_text(LUNAR_QA)
+
+            pairs = list(parse_qa_markdown(path))
+
+        self.assertEqual([pair['question'] for pair in pairs],
+                         ["What Are The Phases Of The Moon?", "What Is Moon Water?"])
+        self.assertEqual(pairs[0]['answer'], "New, waxing, full and waning.\n\nEach lasts about a week.")
+        self.assertEqual(pairs[1]['domain'], "lunar")
+        self.assertTrue(pairs[0]['qa_id'].startswith("md-lunar-"))
+
+
+class TestQAMarkdownLoader(unittest.TestCase):
+    """Test suite for incremental markdown sync."""
+
+    def setUp(self):
+        """Set up a cache over an ephemeral collection and a markdown corpus."""
+        self.embeddings = CountingEmbeddings()
+        with patch.object(QACache, '_setup_embeddings'), \
+             patch.object(QACache, '_setup_chroma_client'), \
+             patch.object(QACache, '_setup_vectorstore'):
+            self.cache = QACache(domain_partitions=False, index_backend="memory", answer_store_path=":memory:",
+                                 stats_path=":memory:")
+        self.cache.vectorstore = Chroma(
+            client=chromadb.EphemeralClient(),
+            collection_name=f"qa_{uuid.uuid4().hex[:8]}",
+            embedding_function=self.embeddings
+        )
+        self.cache._setup_vector_index()
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "lunar_qa.md"
+        self.path.write_text(LUNAR_QA)
+        self.loader = QAMarkdownLoader(self.cache)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_unchanged_reload_embeds_nothing(self):
+        """A second sync of the same corpus should make no embedding calls."""
+        first = self.loader.sync_directory(self.temp_dir.name)
+        self.embeddings.embedded.clear()
+
+        second = self.loader.sync_directory(self.temp_dir.name)
+
+        self.assertEqual(first['embedded'], 2)
+        self.assertEqual(second['unchanged'], 2)
+        self.assertEqual(self.embeddings.embedded, [])
+
+    def test_revised_answer_updates_without_embedding(self):
+        """Editing an answer should update every lookup tier without re-embedding."""
+        self.loader.sync_directory(self.temp_dir.name)
+        self.embeddings.embedded.clear()
+        self.path.write_text(LUNAR_QA.replace("Water charged under moonlight.", "Water left out under a full moon."))
+
+        counts = self.loader.sync_directory(self.temp_dir.name)
+
+        self.assertEqual(counts['updated'], 1)
+        self.assertEqual(self.embeddings.embedded, [])
+        self.assertEqual(self.cache.lookup_exact("what is moon water", ["lunar"])['answer'],
+                         "Water left out under a full moon.")
+        result = self.cache.search_qa("moon water", ["lunar"],
+                                      query_embedding=self.embeddings.embed_query("What Is Moon Water?"))
+        self.assertEqual(result['answer'], "Water left out under a full moon.")
+
+    def test_new_and_removed_pairs(self):
+        """New questions are embedded; questions removed from the markdown are deleted."""
+        self.loader.sync_directory(self.temp_dir.name)
+        self.embeddings.embedded.clear()
+        self.path.write_text(LUNAR_QA.split("## 2.")[0] + "## 2. When Is The Next Eclipse Season?\n\nTwice a year.\n")
+
+        counts = self.loader.sync_directory(self.temp_dir.name)
+
+        self.assertEqual((counts['added'], counts['unchanged'], counts['deleted']), (1, 1, 1))
+        self.assertEqual(self.embeddings.embedded, ["When Is The Next Eclipse Season?"])
+        self.assertIsNone(self.cache.lookup_exact("what is moon water", ["lunar"]))
+        self.assertEqual(self.cache.vectorstore._collection.count(), 2)
+        self.assertEqual(self.cache.vector_index.size, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Unit tests for OptimizedContextualRAGSystem retrieval.
+
+Tests the single-pass retrieval path:
+- One embedding call and one collection query per RAG turn
+- Scored documents carry distances through to the chunks
+- LangChain fallback only when the direct query fails
+- Async queries await the embedding and offload ChromaDB work
+- Batched queries share one embedding request and one collection query, and the result cache
+- Repeated queries are served from the result cache until the corpus changes
+- Degraded retrievals (fallback zero vectors, LangChain fallback search) are never cached
+- Speculative queries count stats and fill the result cache only once recorded
+- The opt-in lexical fast path answers confident keyword matches without embedding
+"""
+
+import unittest
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from langchain_core.documents import Document
+
+from core.contextual_rag import OptimizedContextualRAGSystem
+from core.lexical_index import BM25Index
+
+
+KEYWORD_CORPUS = ["Amethyst calms the mind.", "Moon water ritual.", "The Tower card.", "Full moon release."]
+
+
+def build_rag_system(domain_manager=None):
+    """Create a RAG system with mocked embeddings and vectorstore."""
+    with patch.object(OptimizedContextualRAGSystem, '_setup_embeddings'), \
+         patch.object(OptimizedContextualRAGSystem, '_setup_chroma_client'), \
+         patch.object(OptimizedContextualRAGSystem, '_setup_vectorstore'):
+        rag = OptimizedContextualRAGSystem(domain_manager=domain_manager)
+    
+    rag.embeddings = Mock()
+    rag.embeddings.embed_query.return_value = [0.1, 0.2, 0.3]
+    rag.vectorstore = Mock()
+    rag.vectorstore._collection.query.return_value = {
+        'documents': [["Full moon text", "New moon text"]],
+        'metadatas': [[{'domain': 'lunar'}, {'domain': 'lunar'}]],
+        'distances': [[0.12, 0.34]]
+    }
+    return rag
+
+
+class TestSinglePassRetrieval(unittest.TestCase):
+    """Test suite for single-pass retrieval."""
+    
+    def test_query_embeds_and_searches_once(self):
+        """A query should cost exactly one embedding and one collection query."""
+        rag = build_rag_system()
+        
+        result = rag.query("full moon energy", k=2)
+        
+        rag.embeddings.embed_query.assert_called_once_with("full moon energy")
+        rag.vectorstore._collection.query.assert_called_once()
+        rag.vectorstore.similarity_search.assert_not_called()
+        rag.vectorstore.similarity_search_with_score.assert_not_called()
+        self.assertEqual(result['metadata']['total_chunks'], 2)
+    
+    def test_chunks_include_distances(self):
+        """Retrieved chunks should carry their distances."""
+        rag = build_rag_system()
+        
+        result = rag.query("full moon energy", k=2)
+        
+        distances = [chunk['distance'] for chunk in result['chunks']]
+        self.assertEqual(distances, [0.12, 0.34])
+    
+    def test_chunks_keep_full_content_and_ids(self):
+        """Chunks should not be truncated and should carry their collection ids."""
+        rag = build_rag_system()
+        long_text = "Full moon " * 100
+        rag.vectorstore._collection.query.return_value = {
+            'ids': [["chunk-1"]],
+            'documents': [[long_text]],
+            'metadatas': [[{'domain': 'lunar'}]],
+            'distances': [[0.12]]
+        }
+        
+        result = rag.query("full moon energy", k=1)
+        
+        self.assertEqual(result['chunks'][0]['content'], long_text)
+        self.assertEqual(result['chunks'][0]['id'], "chunk-1")
+    
+    def test_precomputed_embedding_skips_embedding_call(self):
+        """A turn-scoped vector should be reused instead of re-embedding."""
+        rag = build_rag_system()
+        
+        rag.query("full moon energy", k=2, query_embedding=[0.3, 0.2, 0.1])
+        
+        rag.embeddings.embed_query.assert_not_called()
+        call_kwargs = rag.vectorstore._collection.query.call_args.kwargs
+        self.assertEqual(call_kwargs['query_embeddings'], [[0.3, 0.2, 0.1]])
+    
+    def test_numpy_backend_bypasses_chroma(self):
+        """The exact index backend should answer without a Chroma query."""
+        rag = build_rag_system()
+        rag.vector_index = Mock()
+        rag.vector_index.search.return_value = [
+            (Document(page_content="Index text", metadata={'domain': 'lunar'}), 0.05)
+        ]
+        rag.index_refresh_interval = float('inf')
+        
+        result = rag.query("full moon energy", k=1)
+        
+        rag.vectorstore._collection.query.assert_not_called()
+        rag.vector_index.search.assert_called_once_with([0.1, 0.2, 0.3], 1, where=None)
+        self.assertEqual(result['chunks'][0]['distance'], 0.05)
+    
+    def test_lexical_fast_path_skips_embedding(self):
+        """Confident exact keyword matches should not embed the query."""
+        rag = build_rag_system()
+        rag.lexical_fast_path = True
+        rag.lexical_index = BM25Index()
+        rag.lexical_index.build(KEYWORD_CORPUS, [{'domain': 'crystals'}, {'domain': 'lunar'}, {'domain': 'tarot'}, {'domain': 'lunar'}])
+        rag.index_refresh_interval = float('inf')
+        
+        result = rag.query("amethyst", k=1)
+        
+        rag.embeddings.embed_query.assert_not_called()
+        self.assertEqual(result['chunks'][0]['content'], "Amethyst calms the mind.")
+        self.assertEqual(rag.retrieval_stats['lexical_fast_path'], 1)
+    
+    def test_lexical_fast_path_off_by_default(self):
+        """Without the opt-in flag, keyword matches still embed and fuse with vector results."""
+        rag = build_rag_system()
+        rag.lexical_index = BM25Index()
+        rag.lexical_index.build(KEYWORD_CORPUS, [{'domain': 'crystals'}, {'domain': 'lunar'}, {'domain': 'tarot'}, {'domain': 'lunar'}])
+        rag.index_refresh_interval = float('inf')
+        
+        rag.query("amethyst", k=1)
+        
+        self.assertFalse(rag.lexical_fast_path)
+        rag.embeddings.embed_query.assert_called_once_with("amethyst")
+        self.assertEqual(rag.retrieval_stats['lexical_fast_path'], 0)
+    
+    def test_hybrid_fuses_vector_and_lexical(self):
+        """Non-exact queries should fuse vector and BM25 rankings."""
+        rag = build_rag_system()
+        rag.lexical_index = BM25Index()
+        rag.lexical_index.build(["New moon text", "Unrelated crystal text"], [{'domain': 'lunar'}, {'domain': 'crystals'}])
+        rag.index_refresh_interval = float('inf')
+        
+        result = rag.query("how does the new moon affect my energy", k=2)
+        
+        rag.embeddings.embed_query.assert_called_once()
+        self.assertEqual(result['chunks'][0]['content'], "New moon text")
+        self.assertEqual(rag.retrieval_stats['hybrid_queries'], 1)
+    
+    def test_domain_partitions_replace_metadata_filter(self):
+        """Active domains should be searched through their partitions, not a $in filter."""
+        domain_manager = Mock()
+        domain_manager.get_status.return_value = {'active_domains': ['lunar']}
+        domain_manager.get_active_domains.return_value = ['lunar']
+        rag = build_rag_system(domain_manager)
+        rag.domain_partitions = Mock()
+        rag.domain_partitions.query.return_value = [[(Document(page_content="Moon", metadata={'domain': 'lunar'}), 0.1)]]
+        rag.index_refresh_interval = float('inf')
+        
+        result = rag.query("full moon energy", k=1)
+        
+        rag.vectorstore._collection.query.assert_not_called()
+        rag.domain_partitions.query.assert_called_once_with(
+            [[0.1, 0.2, 0.3]], 1, where={"domain": {"$in": ["lunar"]}}
+        )
+        self.assertEqual(result['chunks'][0]['content'], "Moon")
+    
+    def test_fallback_when_direct_query_fails(self):
+        """LangChain search should only run when the direct query fails."""
+        rag = build_rag_system()
+        rag.vectorstore._collection.query.side_effect = RuntimeError("chroma down")
+        rag.vectorstore.similarity_search_with_score.return_value = [
+            (Document(page_content="Fallback text", metadata={'domain': 'lunar'}), 0.5)
+        ]
+        
+        result = rag.query("full moon energy", k=1)
+        
+        rag.vectorstore.similarity_search_with_score.assert_called_once_with("full moon energy", k=1)
+        self.assertEqual(result['chunks'][0]['distance'], 0.5)
+
+
+class TestResultCache(unittest.TestCase):
+    """Test suite for the retrieval result cache."""
+    
+    def _rag(self):
+        rag = build_rag_system()
+        collection = rag.vectorstore._collection
+        collection.metadata = {'corpus_version': 0}
+        collection.modify.side_effect = lambda metadata: setattr(collection, 'metadata', metadata)
+        rag.index_refresh_interval = float('inf')
+        return rag
+    
+    def test_repeated_query_served_from_cache(self):
+        """Near-identical repeated questions should skip embedding and search."""
+        rag = self._rag()
+        
+        first = rag.query("Full moon energy", k=2)
+        second = rag.query("full moon  energy", k=2)
+        
+        rag.vectorstore._collection.query.assert_called_once()
+        rag.embeddings.embed_query.assert_called_once()
+        self.assertEqual(second['chunks'], first['chunks'])
+        self.assertTrue(second['metadata']['cached'])
+        by_type = rag.stats_collector.get_query_stats()['by_type']
+        self.assertEqual(by_type['rag']['count'], 1)
+        self.assertEqual(by_type['rag_cached']['count'], 1)
+    
+    def test_corpus_version_bump_invalidates(self):
+        """Bumping the corpus version should force a fresh retrieval."""
+        rag = self._rag()
+        rag.query("full moon energy", k=2)
+        
+        self.assertEqual(rag.bump_corpus_version(), 1)
+        rag.query("full moon energy", k=2)
+        
+        self.assertEqual(rag.vectorstore._collection.query.call_count, 2)
+        self.assertEqual(rag.vectorstore._collection.metadata['corpus_version'], 1)
+    
+    def test_k_is_part_of_the_key(self):
+        """Different k values should not share cached results."""
+        rag = self._rag()
+        
+        rag.query("full moon energy", k=2)
+        rag.query("full moon energy", k=1)
+        
+        self.assertEqual(rag.vectorstore._collection.query.call_count, 2)
+
+
+    def test_fallback_embedding_not_cached(self):
+        """Results from the zero-vector embedding fallback should not outlive the outage."""
+        rag = self._rag()
+        rag.embeddings.embed_query.return_value = [0.0, 0.0, 0.0]
+        
+        rag.query("full moon energy", k=2)
+        rag.embeddings.embed_query.return_value = [0.1, 0.2, 0.3]
+        second = rag.query("full moon energy", k=2)
+        rag.query("full moon energy", k=2)
+        
+        self.assertNotIn('cached', second['metadata'])
+        self.assertEqual(rag.embeddings.embed_query.call_count, 2)
+        self.assertEqual(rag.vectorstore._collection.query.call_count, 2)
+    
+    def test_precomputed_fallback_embedding_not_cached(self):
+        """A zero vector passed in by the caller counts as degraded too."""
+        rag = self._rag()
+        
+        rag.query("full moon energy", k=2, query_embedding=[0.0, 0.0, 0.0])
+        rag.query("full moon energy", k=2)
+        
+        self.assertEqual(rag.vectorstore._collection.query.call_count, 2)
+    
+    def test_langchain_fallback_not_cached(self):
+        """Results from the LangChain fallback search should not be cached."""
+        rag = self._rag()
+        rag.vectorstore._collection.query.side_effect = RuntimeError("chroma down")
+        rag.vectorstore.similarity_search_with_score.return_value = [
+            (Document(page_content="Fallback text", metadata={'domain': 'lunar'}), 0.5)
+        ]
+        
+        rag.query("full moon energy", k=1)
+        rag.query("full moon energy", k=1)
+        
+        self.assertEqual(rag.vectorstore.similarity_search_with_score.call_count, 2)
+
+
+class TestSpeculativeRetrieval(unittest.TestCase):
+    """Test suite for deferred recording of speculative queries."""
+    
+    def _rag(self):
+        rag = build_rag_system()
+        rag.vectorstore._collection.metadata = {'corpus_version': 0}
+        rag.index_refresh_interval = float('inf')
+        rag.lexical_index = BM25Index()
+        rag.lexical_index.build(KEYWORD_CORPUS, [{'domain': 'crystals'}, {'domain': 'lunar'}, {'domain': 'tarot'}, {'domain': 'lunar'}])
+        return rag
+    
+    def test_discarded_query_leaves_no_trace(self):
+        """An unrecorded query should not touch retrieval stats, query stats or the result cache."""
+        rag = self._rag()
+        
+        result = rag.query("full moon energy", k=2, record=False)
+        
+        self.assertEqual(result['metadata']['total_chunks'], 2)
+        self.assertEqual(rag.retrieval_stats['hybrid_queries'], 0)
+        self.assertEqual(rag.stats_collector.get_query_stats()['by_type'], {})
+        self.assertEqual(rag.result_cache.get_stats()['entries'], 0)
+    
+    def test_recorded_query_counts_once(self):
+        """record_query should apply the held-back stats and cache write exactly once."""
+        rag = self._rag()
+        
+        result = rag.query("full moon energy", k=2, record=False)
+        rag.record_query(result['pending_record'])
+        second = rag.query("full moon energy", k=2)
+        
+        self.assertEqual(rag.retrieval_stats['hybrid_queries'], 1)
+        self.assertTrue(second['metadata']['cached'])
+        self.assertNotIn('pending_record', second)
+        by_type = rag.stats_collector.get_query_stats()['by_type']
+        self.assertEqual(by_type['rag']['count'], 1)
+        self.assertEqual(by_type['rag_cached']['count'], 1)
+
+
+class TestBatchedRetrieval(unittest.TestCase):
+    """Test suite for batched multi-query retrieval."""
+    
+    def test_query_many_batches_embedding_and_search(self):
+        """Many queries should cost one embedding call and one collection query."""
+        rag = build_rag_system()
+        rag.embeddings.embed_queries.return_value = [[0.1, 0.2], [0.3, 0.4]]
+        rag.vectorstore._collection.query.return_value = {
+            'documents': [["Full moon text"], ["Amethyst text"]],
+            'metadatas': [[{'domain': 'lunar'}], [{'domain': 'crystals'}]],
+            'distances': [[0.1], [0.2]]
+        }
+        
+        results = rag.query_many(["full moon", "amethyst"], k=1)
+        
+        rag.embeddings.embed_queries.assert_called_once_with(["full moon", "amethyst"])
+        rag.embeddings.embed_query.assert_not_called()
+        rag.vectorstore._collection.query.assert_called_once()
+        self.assertEqual(rag.vectorstore._collection.query.call_args.kwargs['query_embeddings'], [[0.1, 0.2], [0.3, 0.4]])
+        self.assertEqual([r['chunks'][0]['content'] for r in results], ["Full moon text", "Amethyst text"])
+        self.assertEqual(results[1]['chunks'][0]['distance'], 0.2)
+    
+    def test_query_many_handles_empty_rows(self):
+        """Queries without matches should get the no-results response."""
+        rag = build_rag_system()
+        rag.embeddings.embed_queries.return_value = [[0.1, 0.2], [0.3, 0.4]]
+        rag.vectorstore._collection.query.return_value = {
+            'documents': [["Full moon text"], []],
+            'metadatas': [[{'domain': 'lunar'}], []],
+            'distances': [[0.1], []]
+        }
+        
+        results = rag.query_many(["full moon", "unknown"], k=1)
+        
+        self.assertEqual(results[0]['metadata']['total_chunks'], 1)
+        self.assertEqual(results[1]['metadata']['total_chunks'], 0)
+
+
+    def test_query_many_uses_result_cache(self):
+        """Batched queries should be served from and stored in the same result cache as query()."""
+        rag = build_rag_system()
+        rag.vectorstore._collection.metadata = {'corpus_version': 0}
+        rag.index_refresh_interval = float('inf')
+        rag.query("full moon", k=1)
+        rag.embeddings.embed_queries.return_value = [[0.3, 0.4]]
+        rag.vectorstore._collection.query.return_value = {
+            'documents': [["Amethyst text"]],
+            'metadatas': [[{'domain': 'crystals'}]],
+            'distances': [[0.2]]
+        }
+        
+        results = rag.query_many(["Full moon", "amethyst"], k=1)
+        repeated = rag.query("amethyst", k=1)
+        
+        rag.embeddings.embed_queries.assert_called_once_with(["amethyst"])
+        self.assertTrue(results[0]['metadata']['cached'])
+        self.assertEqual(results[1]['chunks'][0]['content'], "Amethyst text")
+        self.assertTrue(repeated['metadata']['cached'])
+        self.assertEqual(rag.vectorstore._collection.query.call_count, 2)
+    
+    def test_query_many_counts_hybrid_queries(self):
+        """Batched hybrid queries should update the same retrieval stats as query()."""
+        rag = build_rag_system()
+        rag.result_cache = None
+        rag.lexical_index = BM25Index()
+        rag.lexical_index.build(KEYWORD_CORPUS, [{'domain': 'crystals'}, {'domain': 'lunar'}, {'domain': 'tarot'}, {'domain': 'lunar'}])
+        rag.embeddings.embed_queries.return_value = [[0.1, 0.2], [0.3, 0.4]]
+        
+        rag.query_many(["full moon", "amethyst"], k=1)
+        
+        self.assertEqual(rag.get_stats()['retrieval']['hybrid_queries'], 2)
+
+
+class TestAsyncRetrieval(unittest.IsolatedAsyncioTestCase):
+    """Test suite for the async retrieval API."""
+    
+    async def test_aquery_awaits_embedding(self):
+        """aquery should use the async embedding client, not the sync one."""
+        rag = build_rag_system()
+        rag.embeddings.aembed_query = AsyncMock(return_value=[0.3, 0.2, 0.1])
+        
+        result = await rag.aquery("full moon energy", k=2)
+        
+        rag.embeddings.aembed_query.assert_awaited_once_with("full moon energy")
+        rag.embeddings.embed_query.assert_not_called()
+        call_kwargs = rag.vectorstore._collection.query.call_args.kwargs
+        self.assertEqual(call_kwargs['query_embeddings'], [[0.3, 0.2, 0.1]])
+        self.assertEqual(result['metadata']['total_chunks'], 2)
+    
+    async def test_aquery_falls_back_to_sync_embedding(self):
+        """An async embedding failure should fall back to the resilient sync path."""
+        rag = build_rag_system()
+        rag.embeddings.aembed_query = AsyncMock(side_effect=RuntimeError("timeout"))
+        
+        result = await rag.aquery("full moon energy", k=2)
+        
+        rag.embeddings.embed_query.assert_called_once_with("full moon energy")
+        self.assertEqual(result['metadata']['total_chunks'], 2)
+    
+    async def test_aquery_lexical_fast_path_skips_embedding(self):
+        """Exact keyword matches should not embed in the async path either."""
+        rag = build_rag_system()
+        rag.embeddings.aembed_query = AsyncMock(return_value=[0.3, 0.2, 0.1])
+        rag.lexical_fast_path = True
+        rag.lexical_index = BM25Index()
+        rag.lexical_index.build(KEYWORD_CORPUS, [{'domain': 'crystals'}, {'domain': 'lunar'}, {'domain': 'tarot'}, {'domain': 'lunar'}])
+        rag.index_refresh_interval = float('inf')
+        
+        result = await rag.aquery("amethyst", k=1)
+        
+        rag.embeddings.aembed_query.assert_not_awaited()
+        self.assertEqual(result['chunks'][0]['content'], "Amethyst calms the mind.")
+    
+    async def test_aquery_fast_path_check_runs_on_executor(self):
+        """BM25 scoring for the fast-path check should not run on the event loop."""
+        rag = build_rag_system()
+        rag.embeddings.aembed_query = AsyncMock(return_value=[0.3, 0.2, 0.1])
+        rag.lexical_fast_path = True
+        rag.lexical_index = BM25Index()
+        rag.lexical_index.build(KEYWORD_CORPUS, [{'domain': 'crystals'}, {'domain': 'lunar'}, {'domain': 'tarot'}, {'domain': 'lunar'}])
+        rag.index_refresh_interval = float('inf')
+        threads = []
+        needs_embedding = rag._needs_embedding
+        
+        def record_thread(query_text, k):
+            threads.append(threading.current_thread().name)
+            return needs_embedding(query_text, k)
+        
+        with patch.object(rag, '_needs_embedding', side_effect=record_thread):
+            await rag.aquery("full moon release ritual", k=1)
+        
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith("rag_"))
+        rag.embeddings.aembed_query.assert_awaited_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Unit tests for RetrievalResultCache.
+
+Tests the retrieval result cache including:
+- Keys on normalized text, sorted domains and k
+- TTL expiry and LRU eviction
+- Corpus-version invalidation
+"""
+
+import unittest
+import sys
+import time
+from pathlib import Path
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from core.result_cache import RetrievalResultCache
+
+
+def make_result(text: str):
+    """Build a minimal retrieval result."""
+    return {"response": text, "chunks": [], "metadata": {"total_chunks": 0, "query_type": "rag"}}
+
+
+class TestRetrievalResultCache(unittest.TestCase):
+    """Test suite for RetrievalResultCache."""
+    
+    def test_key_normalizes_text_and_domains(self):
+        """Case, whitespace and domain order should not change the key."""
+        first = RetrievalResultCache.make_key("Full  Moon", ["numerology", "lunar"], 4)
+        second = RetrievalResultCache.make_key("full moon", ["lunar", "numerology"], 4)
+        
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, RetrievalResultCache.make_key("full moon", ["lunar"], 4))
+        self.assertNotEqual(first, RetrievalResultCache.make_key("full moon", ["lunar", "numerology"], 2))
+    
+    def test_hit_returns_copy(self):
+        """Cached results should not be mutated through returned copies."""
+        cache = RetrievalResultCache()
+        key = cache.make_key("full moon", [], 4)
+        cache.put(key, make_result("a"))
+        
+        hit = cache.get(key)
+        hit["metadata"]["cached"] = True
+        
+        self.assertNotIn("cached", cache.get(key)["metadata"])
+        self.assertEqual(cache.stats['hits'], 2)
+    
+    def test_ttl_expiry(self):
+        """Expired entries should miss."""
+        cache = RetrievalResultCache(ttl_seconds=0.01)
+        key = cache.make_key("full moon", [], 4)
+        cache.put(key, make_result("a"))
+        
+        time.sleep(0.02)
+        
+        self.assertIsNone(cache.get(key))
+    
+    def test_lru_eviction(self):
+        """The least recently used entry should be evicted beyond the bound."""
+        cache = RetrievalResultCache(max_entries=2)
+        keys = [cache.make_key(text, [], 4) for text in ("one", "two", "three")]
+        cache.put(keys[0], make_result("1"))
+        cache.put(keys[1], make_result("2"))
+        cache.get(keys[0])
+        cache.put(keys[2], make_result("3"))
+        
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+    
+    def test_version_change_clears_entries(self):
+        """A new corpus version should drop every cached result."""
+        cache = RetrievalResultCache()
+        cache.sync_version(1)
+        key = cache.make_key("full moon", [], 4)
+        cache.put(key, make_result("a"))
+        
+        cache.sync_version(1)
+        self.assertIsNotNone(cache.get(key))
+        
+        cache.sync_version(2)
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.stats['invalidations'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Q&A cache threshold calibration.
+
+Tests per-domain calibration including:
+- Pair similarities matching the cache's l2 and cosine scoring
+- Lowest threshold reaching the target precision
+- Tied scores accepted or rejected together
+- Too few labeled pairs left on the global threshold
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from cache.threshold_calibration import calibrate_domains, calibrate_threshold, pair_similarities
+
+
+class TestPairSimilarities(unittest.TestCase):
+    """Test suite for pair_similarities."""
+
+    def test_l2_and_cosine_spaces(self):
+        """l2 similarity is 1 - squared distance of unit vectors; cosine is the cosine."""
+        queries = [[1.0, 0.0], [3.0, 4.0]]
+        questions = [[2.0, 0.0], [0.0, 1.0]]
+
+        np.testing.assert_allclose(pair_similarities(queries, questions, "cosine"), [1.0, 0.8], rtol=1e-6)
+        np.testing.assert_allclose(pair_similarities(queries, questions, "l2"), [1.0, 0.6], rtol=1e-6)
+
+
+class TestCalibrateThreshold(unittest.TestCase):
+    """Test suite for calibrate_threshold."""
+
+    def test_lowest_threshold_at_target_precision(self):
+        """The threshold should drop as far as precision allows."""
+        similarities = [0.95, 0.9, 0.85, 0.8, 0.75, 0.7, 0.65, 0.6, 0.55, 0.5]
+        labels = [True, True, True, True, False, True, False, False, True, False]
+
+        self.assertEqual(calibrate_threshold(similarities, labels, target_precision=1.0), 0.8)
+        self.assertEqual(calibrate_threshold(similarities, labels, target_precision=0.8), 0.7)
+
+    def test_ties_evaluated_together(self):
+        """A true and a false match with the same score cannot be separated."""
+        similarities = [0.9, 0.8, 0.8, 0.7]
+        labels = [True, True, False, True]
+
+        self.assertEqual(calibrate_threshold(similarities, labels, target_precision=1.0, min_pairs=4), 0.9)
+
+    def test_too_few_pairs(self):
+        """Domains without enough labeled pairs (or any true match) stay uncalibrated."""
+        self.assertIsNone(calibrate_threshold([0.9, 0.8], [True, False], min_pairs=10))
+        self.assertIsNone(calibrate_threshold([0.9] * 10, [False] * 10))
+
+
+class TestCalibrateDomains(unittest.TestCase):
+    """Test suite for calibrate_domains."""
+
+    def test_report_per_domain(self):
+        """Calibrated domains should gain recall at the target precision; others keep the global threshold."""
+        pairs = [{'domain': 'lunar', 'match': i < 8} for i in range(12)] + [{'domain': 'tarot', 'match': True}]
+        similarities = [0.9, 0.88, 0.86, 0.84, 0.8, 0.78, 0.76, 0.74, 0.6, 0.58, 0.56, 0.54, 0.99]
+
+        report = calibrate_domains(pairs, similarities, global_threshold=0.85, target_precision=0.95)
+
+        self.assertEqual(report['lunar']['threshold'], 0.74)
+        self.assertEqual(report['lunar']['before']['recall'], 3 / 8)
+        self.assertEqual(report['lunar']['after'], {'precision': 1.0, 'recall': 1.0})
+        self.assertIsNone(report['tarot']['threshold'])
+        self.assertEqual(report['tarot']['after'], report['tarot']['before'])
+
+
+if __name__ == '__main__':
+    unittest.main()
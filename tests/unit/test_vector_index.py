@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Unit tests for NumpyVectorIndex and QuantizedVectorIndex.
+
+Tests the in-process retrieval backends including:
+- Snapshot export from a collection and memory-mapped reload
+- Exact cosine ranking with distances
+- Per-domain row masks
+- Fingerprint-based staleness detection
+- int8 / binary first pass with float16 rescoring
+- In-memory upserts without a snapshot, consistent under concurrent searches
+"""
+
+import unittest
+import sys
+import tempfile
+import shutil
+import threading
+from pathlib import Path
+from unittest.mock import Mock
+
+import numpy as np
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_dir))
+
+from core.vector_index import InMemoryVectorIndex, NumpyVectorIndex, QuantizedVectorIndex, collection_fingerprint
+
+
+def make_collection(ids, embeddings, domains):
+    """Create a fake ChromaDB collection."""
+    collection = Mock()
+    
+    def get(include=None, **kwargs):
+        result = {'ids': list(ids)}
+        if include:
+            result.update({
+                'embeddings': np.array(embeddings, dtype=np.float32),
+                'documents': [f"doc {i}" for i in ids],
+                'metadatas': [{'domain': d} for d in domains]
+            })
+        return result
+    
+    collection.get.side_effect = get
+    return collection
+
+
+class TestNumpyVectorIndex(unittest.TestCase):
+    """Test suite for NumpyVectorIndex."""
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.collection = make_collection(
+            ids=["a", "b", "c"],
+            embeddings=[[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]],
+            domains=["lunar", "crystals", "lunar"]
+        )
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_exact_search_orders_by_distance(self):
+        """Results should be exact cosine matches in ascending distance."""
+        index = NumpyVectorIndex(self.temp_dir)
+        index.build_from_collection(self.collection)
+        
+        results = index.search([2.0, 0.0], k=3)
+        
+        self.assertEqual([doc.page_content for doc, _ in results], ["doc a", "doc b", "doc c"])
+        self.assertAlmostEqual(results[0][1], 0.0, places=5)
+        self.assertAlmostEqual(results[1][1], 0.4, places=5)
+    
+    def test_domain_mask(self):
+        """Domain filters should only return rows from active domains."""
+        index = NumpyVectorIndex(self.temp_dir)
+        index.build_from_collection(self.collection)
+        
+        results = index.search([1.0, 0.0], k=4, where={"domain": {"$in": ["crystals"]}})
+        
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][0].metadata['domain'], "crystals")
+        self.assertEqual(index.search([1.0, 0.0], where={"domain": {"$in": ["tarot"]}}), [])
+    
+    def test_snapshot_reload_is_memory_mapped(self):
+        """A fresh index should load the persisted snapshot via mmap."""
+        NumpyVectorIndex(self.temp_dir).build_from_collection(self.collection)
+        
+        index = NumpyVectorIndex(self.temp_dir)
+        self.assertTrue(index.load())
+        
+        self.assertIsInstance(index.embeddings, np.memmap)
+        self.assertEqual(index.size, 3)
+        self.assertEqual(index.fingerprint, collection_fingerprint(self.collection))
+    
+    def test_rebuild_keeps_mapped_snapshot_intact(self):
+        """A rebuild should replace the files, not rewrite the ones readers have mapped."""
+        NumpyVectorIndex(self.temp_dir).build_from_collection(self.collection)
+        reader = NumpyVectorIndex(self.temp_dir)
+        reader.load()
+        
+        NumpyVectorIndex(self.temp_dir).build_from_collection(make_collection(
+            ids=["a", "b", "c"],
+            embeddings=[[0.0, 1.0], [0.8, 0.6], [1.0, 0.0]],
+            domains=["lunar", "crystals", "lunar"]
+        ))
+        
+        np.testing.assert_allclose(reader.embeddings[0], [1.0, 0.0])
+        self.assertEqual(reader.search([1.0, 0.0], k=1)[0][0].id, "a")
+        self.assertTrue(reader.load())
+        self.assertEqual(reader.search([1.0, 0.0], k=1)[0][0].id, "c")
+    
+    def test_snapshots_published_whole_and_pruned(self):
+        """Each rebuild should publish a new snapshot directory and keep only the previous one."""
+        index = NumpyVectorIndex(self.temp_dir)
+        for _ in range(4):
+            index.build_from_collection(self.collection)
+        
+        snapshots = sorted(p.name for p in Path(self.temp_dir).iterdir() if p.is_dir())
+        current = (Path(self.temp_dir) / NumpyVectorIndex.CURRENT_FILE).read_text()
+        
+        self.assertEqual(len(snapshots), 2)
+        self.assertEqual(current, snapshots[-1])
+        self.assertEqual(sorted(p.name for p in (Path(self.temp_dir) / current).iterdir()),
+                         [NumpyVectorIndex.EMBEDDINGS_FILE, NumpyVectorIndex.PAYLOAD_FILE])
+    
+    def test_fingerprint_changes_with_collection(self):
+        """Adding or replacing documents should change the fingerprint."""
+        changed = make_collection(
+            ids=["a", "b", "d"],
+            embeddings=[[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]],
+            domains=["lunar", "crystals", "lunar"]
+        )
+        
+        self.assertNotEqual(collection_fingerprint(self.collection), collection_fingerprint(changed))
+    
+    def test_fingerprint_changes_with_corpus_version(self):
+        """Upserts that keep every id should still change the fingerprint through the corpus version."""
+        self.assertEqual(collection_fingerprint(self.collection, 3), collection_fingerprint(self.collection, 3))
+        self.assertNotEqual(collection_fingerprint(self.collection, 3), collection_fingerprint(self.collection, 4))
+
+    
+    def test_l2_space_distances(self):
+        """An l2 index should report squared L2 distances between unit vectors."""
+        index = NumpyVectorIndex(self.temp_dir, space="l2")
+        index.build_from_collection(self.collection)
+        
+        results = index.search([1.0, 0.0], k=2)
+        
+        self.assertAlmostEqual(results[1][1], 0.8, places=5)
+
+
+class TestQuantizedVectorIndex(unittest.TestCase):
+    """Test suite for QuantizedVectorIndex."""
+    
+    def setUp(self):
+        """Set up a random corpus large enough for the shortlist to matter."""
+        self.temp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(7)
+        self.vectors = rng.normal(size=(400, 64)).astype(np.float32)
+        self.queries = rng.normal(size=(20, 64)).astype(np.float32)
+        ids = [f"id{i}" for i in range(len(self.vectors))]
+        self.collection = make_collection(ids, self.vectors, ["lunar" if i % 2 else "tarot" for i in range(len(ids))])
+        
+        self.exact = NumpyVectorIndex(f"{self.temp_dir}/exact")
+        self.exact.build_from_collection(self.collection)
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _recall(self, index, k=10, where=None):
+        """Average recall@k against the exact index."""
+        hits = 0
+        for query in self.queries:
+            expected = {doc.id for doc, _ in self.exact.search(query, k, where=where)}
+            hits += len(expected & {doc.id for doc, _ in index.search(query, k, where=where)})
+        return hits / (k * len(self.queries))
+    
+    def test_int8_recall_and_distances(self):
+        """int8 codes with rescoring should match exact search almost perfectly."""
+        index = QuantizedVectorIndex(self.temp_dir, mode="int8", block_size=64)
+        index.build_from_collection(self.collection)
+        
+        self.assertGreaterEqual(self._recall(index), 0.95)
+        self.assertEqual(index.codes.dtype, np.int8)
+        
+        exact = self.exact.search(self.queries[0], k=1)[0]
+        approx = index.search(self.queries[0], k=1)[0]
+        self.assertAlmostEqual(exact[1], approx[1], places=2)
+    
+    def test_binary_recall(self):
+        """Binary codes with a rescored shortlist should keep recall high."""
+        index = QuantizedVectorIndex(self.temp_dir, mode="binary", rescore_factor=20)
+        index.build_from_collection(self.collection)
+        
+        self.assertGreaterEqual(self._recall(index), 0.8)
+        self.assertEqual(index.codes.shape, (400, 8))
+    
+    def test_domain_mask_applies_to_shortlist(self):
+        """Filtered searches should only return rows from active domains."""
+        index = QuantizedVectorIndex(self.temp_dir, mode="int8")
+        index.build_from_collection(self.collection)
+        
+        where = {"domain": {"$in": ["lunar"]}}
+        results = index.search(self.queries[0], k=5, where=where)
+        
+        self.assertTrue(all(doc.metadata['domain'] == "lunar" for doc, _ in results))
+        self.assertGreaterEqual(self._recall(index, where=where), 0.95)
+    
+    def test_reload_memory_maps_rescoring_vectors(self):
+        """A fresh index should load codes and memory-map float16 vectors."""
+        QuantizedVectorIndex(self.temp_dir, mode="binary").build_from_collection(self.collection)
+        
+        index = QuantizedVectorIndex(self.temp_dir, mode="binary")
+        self.assertTrue(index.load())
+        
+        self.assertIsInstance(index.embeddings, np.memmap)
+        self.assertEqual(index.embeddings.dtype, np.float16)
+        self.assertFalse(QuantizedVectorIndex(self.temp_dir, mode="int8").load())
+    
+    def test_rebuild_keeps_loaded_codes_consistent(self):
+        """A loaded index should keep matching codes, scales and rescoring vectors across a rebuild."""
+        QuantizedVectorIndex(self.temp_dir, mode="int8").build_from_collection(self.collection)
+        reader = QuantizedVectorIndex(self.temp_dir, mode="int8")
+        reader.load()
+        expected = reader.search(self.queries[0], k=5)
+        
+        rng = np.random.default_rng(7)
+        QuantizedVectorIndex(self.temp_dir, mode="int8").build_from_collection(make_collection(
+            ids=[f"new{i}" for i in range(50)],
+            embeddings=rng.normal(size=(50, 64)),
+            domains=["lunar"] * 50
+        ))
+        
+        self.assertEqual([doc.id for doc, _ in reader.search(self.queries[0], k=5)], [doc.id for doc, _ in expected])
+        self.assertTrue(reader.load())
+        self.assertTrue(reader.search(self.queries[0], k=1)[0][0].id.startswith("new"))
+    
+    def test_unknown_mode(self):
+        """Unknown quantization modes should be rejected."""
+        with self.assertRaises(ValueError):
+            QuantizedVectorIndex(self.temp_dir, mode="pq")
+
+
+class TestInMemoryVectorIndex(unittest.TestCase):
+    """Test suite for InMemoryVectorIndex."""
+    
+    def setUp(self):
+        """Set up an index loaded from a small collection."""
+        self.index = InMemoryVectorIndex(space="l2")
+        self.index.build_from_collection(make_collection(
+            ids=["a", "b"],
+            embeddings=[[1.0, 0.0], [0.0, 1.0]],
+            domains=["lunar", "crystals"]
+        ))
+    
+    def test_loaded_without_snapshot(self):
+        """Vectors should live in a contiguous in-memory matrix."""
+        self.assertEqual(self.index.size, 2)
+        self.assertNotIsInstance(self.index.embeddings, np.memmap)
+        self.assertTrue(self.index.embeddings.flags['C_CONTIGUOUS'])
+        self.assertFalse(self.index.load())
+    
+    def test_add_appends_and_masks(self):
+        """Added rows should be searchable and filterable immediately."""
+        self.index.add(["c"], [[0.6, 0.8]], ["doc c"], [{'domain': 'tarot'}])
+        
+        results = self.index.search([0.6, 0.8], k=1, where={"domain": {"$in": ["tarot"]}})
+        
+        self.assertEqual(results[0][0].id, "c")
+        self.assertAlmostEqual(results[0][1], 0.0, places=5)
+    
+    def test_add_replaces_existing_ids(self):
+        """Re-adding an id should replace its row instead of duplicating it."""
+        self.index.add(["a"], [[0.0, 2.0]], ["doc a v2"], [{'domain': 'lunar'}])
+        
+        self.assertEqual(self.index.size, 2)
+        self.assertEqual(self.index.search([0.0, 1.0], k=1, where={"domain": "lunar"})[0][0].page_content, "doc a v2")
+    
+    def test_delete_removes_rows_and_masks(self):
+        """Deleted rows should no longer be returned or counted in domain masks."""
+        self.index.delete(["b", "missing"])
+        
+        self.assertEqual(self.index.size, 1)
+        self.assertEqual(self.index.search([0.0, 1.0], k=1, where={"domain": "crystals"}), [])
+    
+    def test_search_consistent_during_writes(self):
+        """Searches racing adds and deletes should always pair a row's vector with its own id."""
+        stop = threading.Event()
+        
+        def write():
+            angle = 0.0
+            while not stop.is_set():
+                angle += 0.1
+                self.index.add(["c"], [[np.cos(angle), np.sin(angle)]], [f"doc c {angle}"], [{'domain': 'tarot'}])
+                self.index.delete(["c"])
+        
+        writer = threading.Thread(target=write)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Switch threads often enough to hit a partial swap
+        writer.start()
+        try:
+            for _ in range(2000):
+                for doc, distance in self.index.search([1.0, 0.0], k=3):
+                    if doc.id == "a":
+                        self.assertAlmostEqual(distance, 0.0, places=5)
+                    elif doc.id == "b":
+                        self.assertAlmostEqual(distance, 2.0, places=5)
+        finally:
+            stop.set()
+            writer.join()
+            sys.setswitchinterval(interval)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Agent Graph Mode Benchmark
+
+Runs the same messages through the default graph (classifier call + agent
+call, retrieval in parallel) and the single-call graph (local retrieval
+decision, persona chosen in the agent call), and compares turn latency, LLM
+calls per turn and persona agreement. With --judge, the LLM scores both
+answers to every message so latency can be weighed against answer quality.
+
+Each message runs in a fresh in-memory session (no history, nothing written
+to the session database). Query embeddings are warmed up front and the mode
+that runs first alternates per message, so neither mode benefits from the
+other's caches.
+
+Usage:
+    python tools/benchmark_modes.py
+    python tools/benchmark_modes.py --queries messages.txt --judge --output data/benchmarks/modes.json
+"""
+
+import argparse
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+
+# Add project root and src to path (main imports core.*, core modules import src.*)
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from pydantic import BaseModel, Field
+
+from src.main import build_graph, llm, rag_system
+
+
+MODES = {"two-call": False, "single-call": True}
+
+DEFAULT_QUERIES = [
+    "hi",
+    "What is the moon phase today?",
+    "I feel anxious and disconnected lately and I don't know why",
+    "My partner and I keep fighting and I feel lost",
+    "What rituals suit the waning moon?",
+    "How do I make moon water?",
+    "What does the full moon mean for manifestation?",
+    "Why do I feel so restless around the full moon?",
+    "What's a good way to start journaling?",
+    "Explain the difference between waxing and waning energy",
+]
+
+
+class JudgeScores(BaseModel):
+    """Quality scores for two answers to the same message."""
+    score_a: int = Field(description="Quality of answer A from 1 (poor) to 10 (excellent)")
+    score_b: int = Field(description="Quality of answer B from 1 (poor) to 10 (excellent)")
+    better: Literal["A", "B", "tie"] = Field(description="Which answer serves the user better")
+
+
+JUDGE_PROMPT = """You evaluate replies from a spiritual companion app that offers emotional support and esoteric teaching.
+Score each answer for helpfulness, accuracy, fitting tone (supportive for personal feelings, structured for knowledge questions) and clarity.
+
+Message: {message}
+
+Answer A:
+{answer_a}
+
+Answer B:
+{answer_b}"""
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Counts chat model calls made during a graph run."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.calls += 1
+
+
+def run_turn(graph, message: str) -> dict:
+    """Run one message in a fresh session and time it."""
+    counter = LLMCallCounter()
+    config = {"configurable": {"thread_id": f"bench-{uuid.uuid4()}"}, "callbacks": [counter]}
+    state = {
+        "messages": [HumanMessage(content=message)],
+        "memory_settings": {"short_term_enabled": True, "medium_term_enabled": True},
+        "session_metadata": {}
+    }
+
+    start = time.perf_counter()
+    result = graph.invoke(state, config=config)
+    latency = time.perf_counter() - start
+
+    rag_context = result.get("rag_context")
+    return {
+        "latency": latency,
+        "llm_calls": counter.calls,
+        "message_type": result.get("message_type"),
+        "rag": rag_context if rag_context in ("qa_cache_hit", "domain_blocked") else ("rag" if rag_context else None),
+        "answer": result["messages"][-1].content
+    }
+
+
+def judge(message: str, answers: dict) -> dict:
+    """Score both modes' answers, presenting them in both orders to cancel position bias."""
+    judge_llm = llm.with_structured_output(JudgeScores)
+    first, second = list(MODES)
+    scores = {mode: [] for mode in MODES}
+    for a, b in ((first, second), (second, first)):
+        result = judge_llm.invoke(JUDGE_PROMPT.format(message=message, answer_a=answers[a], answer_b=answers[b]))
+        scores[a].append(result.score_a)
+        scores[b].append(result.score_b)
+    return {mode: float(np.mean(values)) for mode, values in scores.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the two-call and single-call agent graphs")
+    parser.add_argument("--queries", help="Text file with one message per line (default: built-in mix)")
+    parser.add_argument("--judge", action="store_true", help="Score answer quality with the LLM")
+    parser.add_argument("--output", help="Write every answer, timing and score to this JSON file")
+    args = parser.parse_args()
+
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = DEFAULT_QUERIES
+
+    graphs = {mode: build_graph(single_call, MemorySaver()) for mode, single_call in MODES.items()}
+    rag_system.embed_queries(queries)
+
+    rows = []
+    for i, message in enumerate(queries):
+        order = list(MODES) if i % 2 == 0 else list(reversed(MODES))
+        row = {"message": message}
+        for mode in order:
+            row[mode] = run_turn(graphs[mode], message)
+        if args.judge:
+            scores = judge(message, {mode: row[mode]["answer"] for mode in MODES})
+            for mode, score in scores.items():
+                row[mode]["score"] = score
+        rows.append(row)
+        print(f"  {message[:50]:<50} " + "  ".join(
+            f"{mode} {row[mode]['latency']:.2f}s ({row[mode]['message_type'] or '-'}, {row[mode]['rag'] or 'no rag'})"
+            for mode in MODES
+        ))
+
+    print(f"\n🧪 {len(queries)} messages")
+    print(f"  {'mode':<12} {'mean':>7} {'p50':>7} {'p95':>7} {'LLM calls':>10}" + (f" {'quality':>8}" if args.judge else ""))
+    for mode in MODES:
+        latencies = [row[mode]["latency"] for row in rows]
+        line = (f"  {mode:<12} {np.mean(latencies):>6.2f}s {np.percentile(latencies, 50):>6.2f}s "
+                f"{np.percentile(latencies, 95):>6.2f}s {np.mean([row[mode]['llm_calls'] for row in rows]):>10.2f}")
+        if args.judge:
+            line += f" {np.mean([row[mode]['score'] for row in rows]):>8.2f}"
+        print(line)
+
+    agreement = np.mean([row["two-call"]["message_type"] == row["single-call"]["message_type"] for row in rows])
+    print(f"🎭 Persona agreement: {agreement:.0%}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+        print(f"📝 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Negative Intent Detector Benchmark
+
+Times the precompiled single-pass NegativeIntentDetector (per query and
+batched) against the previous multi-pass implementation on the queries from
+tests/unit/test_negative_intent_filtering.py, and checks both give the same
+verdict for every query.
+
+Usage:
+    python tools/benchmark_negative_intent.py
+    python tools/benchmark_negative_intent.py --repeat 20000
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add src to path (cache modules are imported as cache.*)
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from cache.negative_intent_detector import NegativeIntentDetector
+
+
+# Queries from tests/unit/test_negative_intent_filtering.py
+QUERIES = [
+    "What is moon water?",
+    "How do I make moon water?",
+    "Tell me about moon water",
+    "What crystals work with moon energy?",
+    "When should I manifest?",
+    "Why should I avoid moon water?",
+    "Is moon water dangerous?",
+    "Why is moon water harmful?",
+    "I don't want to use moon water",
+    "When should I stop manifesting?",
+    "Why does manifestation fail?",
+    "Which crystals are bad for moon work?",
+    "What's wrong with moon rituals?",
+    "Should I never do moon rituals?",
+    "How to dispose of moon water?",
+    "How to get rid of crystals?",
+    "Which crystals don't work?",
+    "What should I not do during full moon?",
+    "Can't I use any crystals?",
+    "Shouldn't I avoid moon water?",
+    "Is it bad if I don't manifest?",
+    "What crystals work (not fail) with moon?",
+]
+
+
+def multi_pass_baseline(detector: NegativeIntentDetector, query: str) -> bool:
+    """The previous implementation: a substring scan per phrase and a tokenization per word category."""
+    if not query or not query.strip():
+        return False
+    query_lower = query.lower().strip()
+
+    def clean_words():
+        return set(re.sub(r'[^\w\s]', ' ', query_lower).split())
+
+    if any(phrase in query_lower for phrase in detector.NEGATIVE_PHRASES):
+        return True
+
+    critical = clean_words().intersection(detector.CRITICAL_NEGATION_WORDS)
+    if critical:
+        if not ('no' in critical and len(critical) == 1):
+            return True
+        if 'no' in query_lower.split():
+            return True
+
+    words = clean_words()
+    strong = words.intersection(detector.STRONG_NEGATIVE_WORDS)
+    if strong and (len(words) <= 5 or len(strong) >= 2 or len(strong) / len(words) >= 1.0 - detector.sensitivity):
+        return True
+
+    words = clean_words()
+    contextual = words.intersection(detector.CONTEXTUAL_NEGATIVE_WORDS)
+    return bool(contextual) and (len(words) <= 3 or len(contextual) >= 2 or len(contextual) / len(words) >= 0.3)
+
+
+def time_per_query(fn, queries, repeat: int) -> float:
+    """Mean microseconds per query over repeated passes."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(queries)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark negative intent detection")
+    parser.add_argument("--repeat", type=int, default=5000, help="Passes over the query set")
+    args = parser.parse_args()
+
+    detector = NegativeIntentDetector()
+
+    baseline = [multi_pass_baseline(detector, query) for query in QUERIES]
+    compiled = detector.has_negative_intent_many(QUERIES)
+    mismatches = [query for query, old, new in zip(QUERIES, baseline, compiled) if old != new]
+
+    results = {
+        "multi-pass (previous)": time_per_query(
+            lambda queries: [multi_pass_baseline(detector, query) for query in queries], QUERIES, args.repeat),
+        "single-pass": time_per_query(
+            lambda queries: [detector.has_negative_intent(query) for query in queries], QUERIES, args.repeat),
+        "single-pass batch": time_per_query(detector.has_negative_intent_many, QUERIES, args.repeat),
+    }
+
+    print(f"🛡️ {len(QUERIES)} queries x {args.repeat} passes ({sum(compiled)} flagged negative)")
+    reference = results["multi-pass (previous)"]
+    for name, micros in results.items():
+        print(f"  {name:<24} {micros:6.2f} µs/query  ({reference / micros:.2f}x)")
+
+    if mismatches:
+        print(f"❌ Verdicts differ from the previous implementation: {mismatches}")
+        sys.exit(1)
+    print("✅ Identical verdicts on every query")
+
+
+if __name__ == "__main__":
+    main()
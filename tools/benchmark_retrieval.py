@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Retrieval Backend Benchmark
+
+Compares ChromaDB HNSW, the exact NumPy index and the quantized
+(int8 / binary) indexes on recall@k against exact search, query latency
+and resident vector memory.
+
+Queries are perturbed copies of stored vectors, so no embedding calls are made.
+
+Usage:
+    python tools/benchmark_retrieval.py --source kb
+    python tools/benchmark_retrieval.py --source qa --k 3
+    python tools/benchmark_retrieval.py --synthetic 50000 --dim 1536
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path for local imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import chromadb
+
+from src.core.vector_index import NumpyVectorIndex, QuantizedVectorIndex
+
+
+SOURCES = {
+    "kb": ("data/chroma_db", "contextual_rag_collection"),
+    "qa": ("data/chroma_db/qa_cache", "qa_cache_collection"),
+}
+
+
+def load_collection(source: str):
+    """Open a persisted collection from the knowledge base or the Q&A cache."""
+    path, name = SOURCES[source]
+    client = chromadb.PersistentClient(path=path)
+    return client.get_collection(name=name)
+
+
+def synthetic_collection(size: int, dim: int, seed: int):
+    """Build an in-memory collection of random unit vectors across a few domains."""
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    domains = ["lunar", "crystals", "numerology", "tarot"]
+
+    collection = chromadb.EphemeralClient().create_collection(
+        f"bench_{uuid.uuid4().hex[:8]}", configuration={"hnsw": {"space": "cosine"}}
+    )
+    for start in range(0, size, 5000):
+        stop = min(start + 5000, size)
+        collection.add(
+            ids=[f"doc-{i}" for i in range(start, stop)],
+            embeddings=vectors[start:stop],
+            documents=[f"synthetic chunk {i}" for i in range(start, stop)],
+            metadatas=[{"domain": domains[i % len(domains)]} for i in range(start, stop)]
+        )
+    return collection
+
+
+def make_queries(collection, count: int, noise: float, seed: int) -> np.ndarray:
+    """Sample stored vectors and perturb them into queries."""
+    rng = np.random.default_rng(seed)
+    ids = collection.get(include=[])["ids"]
+    sample = [ids[i] for i in rng.choice(len(ids), size=min(count, len(ids)), replace=False)]
+    vectors = np.asarray(collection.get(ids=sample, include=["embeddings"])["embeddings"], dtype=np.float32)
+    vectors += rng.normal(scale=noise, size=vectors.shape).astype(np.float32)
+    return vectors
+
+
+def vector_memory(index) -> int:
+    """Bytes of vector data resident in process memory (memory-mapped files excluded)."""
+    if isinstance(index, QuantizedVectorIndex):
+        scales = index.scales.nbytes if index.scales is not None else 0
+        return index.codes.nbytes + scales
+    return index.embeddings.nbytes
+
+
+def run_backend(search, queries: np.ndarray, truth, k: int):
+    """Time a search function and measure recall@k against exact results."""
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & set(found))
+
+    latencies = np.array(latencies)
+    return {
+        "recall": hits / max(sum(len(expected) for expected in truth), 1),
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval backends (recall@k and latency)")
+    parser.add_argument("--source", choices=sorted(SOURCES), default="kb", help="Persisted collection to benchmark")
+    parser.add_argument("--synthetic", type=int, help="Benchmark N random vectors instead of a persisted collection")
+    parser.add_argument("--dim", type=int, default=1536, help="Dimensions for synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=4, help="Results per query")
+    parser.add_argument("--noise", type=float, default=0.02, help="Query perturbation (std-dev)")
+    parser.add_argument("--domain", help="Restrict searches to one domain")
+    parser.add_argument("--rescore-factor", type=int, default=10, help="Quantized shortlist size per result")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        collection = synthetic_collection(args.synthetic, args.dim, args.seed)
+        label = f"synthetic ({args.synthetic} x {args.dim})"
+    else:
+        try:
+            collection = load_collection(args.source)
+        except Exception as e:
+            print(f"❌ Cannot open {args.source} collection: {e}")
+            sys.exit(1)
+        label = f"{args.source} ({collection.name})"
+
+    if collection.count() == 0:
+        print(f"❌ Collection is empty: {label}")
+        sys.exit(1)
+
+    space = (collection.configuration or {}).get("hnsw", {}).get("space", "l2")
+    where = {"domain": {"$in": [args.domain]}} if args.domain else None
+    queries = make_queries(collection, args.queries, args.noise, args.seed)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        exact = NumpyVectorIndex(os.path.join(temp_dir, "exact"), space=space)
+        exact.build_from_collection(collection)
+        indexes = {"numpy": exact}
+        for mode in ("int8", "binary"):
+            index = QuantizedVectorIndex(os.path.join(temp_dir, mode), space=space, mode=mode,
+                                         rescore_factor=args.rescore_factor)
+            index.build_from_collection(collection)
+            indexes[mode] = index
+
+        truth = [{doc.id for doc, _ in exact.search(query, args.k, where=where)} for query in queries]
+
+        def chroma_search(query):
+            results = collection.query(query_embeddings=[query], n_results=args.k, where=where, include=[])
+            return results["ids"][0]
+
+        results = {"chroma": run_backend(chroma_search, queries, truth, args.k)}
+        results["chroma"]["memory"] = None
+        for name, index in indexes.items():
+            results[name] = run_backend(
+                lambda query, index=index: [doc.id for doc, _ in index.search(query, args.k, where=where)],
+                queries, truth, args.k
+            )
+            results[name]["memory"] = vector_memory(index)
+
+    print(f"📊 Retrieval benchmark: {label}, {len(queries)} queries, k={args.k}, space={space}"
+          + (f", domain={args.domain}" if args.domain else ""))
+    print(f"  {'backend':<8} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'vectors in RAM':>15}")
+    for name, result in results.items():
+        memory = "n/a" if result["memory"] is None else f"{result['memory'] / 1024 / 1024:.1f} MB"
+        print(f"  {name:<8} {result['recall']:>9.3f} {result['p50']:>8.2f} {result['p95']:>8.2f} {memory:>15}")
+
+
+if __name__ == "__main__":
+    main()
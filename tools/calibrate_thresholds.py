@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Q&A Cache Threshold Calibration
+
+Computes a similarity threshold per domain from labeled query pairs: the
+lowest threshold at which accepted cache hits still reach the target
+precision. Thresholds are stored in the Q&A collection metadata, where
+QACache picks them up, and the expected hit-rate change is printed.
+
+Pairs file (JSON lines), one labeled (user query, cached question) pair per line:
+    {"query": "what's moon water", "question": "What Is Moon Water And How Do I Make It?", "domain": "lunar", "match": true}
+    {"query": "is moon water dangerous", "question": "What Is Moon Water And How Do I Make It?", "domain": "lunar", "match": false}
+
+Usage:
+    python tools/calibrate_thresholds.py pairs.jsonl
+    python tools/calibrate_thresholds.py pairs.jsonl --target-precision 0.98 --dry-run
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add project root and src to path (cache modules import core.*, core modules import src.*)
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from cache.qa_cache import QACache
+from cache.threshold_calibration import calibrate_domains, pair_similarities
+
+
+def load_pairs(path: str):
+    """Read labeled pairs, skipping blank lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        pairs = [json.loads(line) for line in f if line.strip()]
+    for pair in pairs:
+        if not {'query', 'question', 'match'} <= pair.keys():
+            raise ValueError(f"Pair needs query, question and match: {pair}")
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate per-domain Q&A cache similarity thresholds")
+    parser.add_argument("pairs", help="JSON lines of {query, question, domain, match}")
+    parser.add_argument("--target-precision", type=float, default=0.95, help="Required precision of cache hits")
+    parser.add_argument("--min-pairs", type=int, default=10, help="Fewest labeled pairs to calibrate a domain")
+    parser.add_argument("--dry-run", action="store_true", help="Report without storing thresholds")
+    args = parser.parse_args()
+
+    try:
+        pairs = load_pairs(args.pairs)
+    except Exception as e:
+        print(f"❌ Cannot read pairs: {e}")
+        sys.exit(1)
+
+    qa_cache = QACache()
+    if not qa_cache.vectorstore:
+        print("❌ Q&A cache is not available")
+        sys.exit(1)
+
+    # Score pairs in the collection's distance space, exactly as search_qa does
+    configuration = qa_cache.vectorstore._collection.configuration or {}
+    space = (configuration.get("hnsw") or {}).get("space") or "l2"
+    texts = sorted({pair['query'] for pair in pairs} | {pair['question'] for pair in pairs})
+    vectors = dict(zip(texts, qa_cache.embeddings.embed_queries(texts)))
+    similarities = pair_similarities(
+        [vectors[pair['query']] for pair in pairs], [vectors[pair['question']] for pair in pairs], space
+    )
+
+    report = calibrate_domains(pairs, similarities, qa_cache.similarity_threshold,
+                               args.target_precision, args.min_pairs)
+
+    print(f"📐 {len(pairs)} labeled pairs, target precision {args.target_precision:.2f}, "
+          f"global threshold {qa_cache.similarity_threshold:.2f} ({space} space)")
+    print(f"  {'domain':<12} {'pairs':>5} {'threshold':>9} {'precision':>15} {'hit rate':>15}")
+    for domain, result in report.items():
+        threshold = "global" if result['threshold'] is None else f"{result['threshold']:.3f}"
+        before, after = result['before'], result['after']
+        print(f"  {domain:<12} {result['pairs']:>5} {threshold:>9} "
+              f"{before['precision']:>6.2f} -> {after['precision']:<5.2f} {before['recall']:>6.2f} -> {after['recall']:<5.2f}")
+
+    # Expected hit rate over all true matches (each domain weighted by its labeled positives)
+    positives = sum(result['positives'] for result in report.values())
+    if positives:
+        before = sum(result['before']['recall'] * result['positives'] for result in report.values()) / positives
+        after = sum(result['after']['recall'] * result['positives'] for result in report.values()) / positives
+        print(f"📈 Expected hit rate on answerable queries: {before:.1%} -> {after:.1%} ({after - before:+.1%})")
+
+    thresholds = {domain: round(result['threshold'], 4) for domain, result in report.items()
+                  if result['threshold'] is not None}
+    if args.dry_run or not thresholds:
+        print("ℹ️ Thresholds not stored" + ("" if thresholds else " (no domain had enough labeled pairs)"))
+        return
+
+    if not qa_cache.set_domain_thresholds(thresholds):
+        print("❌ Failed to store thresholds")
+        sys.exit(1)
+    print(f"✅ Stored thresholds in {qa_cache.collection_name} metadata: {thresholds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ from typing import Dict, List, Optional, Tuple, Any
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
+import chromadb
+
 from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
@@ -27,6 +29,13 @@ sys.path.insert(0, str(src_dir))
 
 # Import from relative path for consistency with cleaned architecture
 from src.core.contextual_rag import OptimizedContextualRAGSystem
+from src.core.embedding_service import EmbeddingService, collection_name_for
+
+# Collections re-embedded by the 'migrate' command: (chroma path, base collection name)
+MIGRATION_TARGETS = [
+    ("data/chroma_db", "contextual_rag_collection"),
+    ("data/chroma_db/qa_cache", "qa_cache_collection"),
+]
 
 @dataclass
 class DocumentRecord:
@@ -129,19 +138,31 @@ class SimpleDocumentManager:
             
             # Use the new batch operation method
             if hasattr(self.rag_system, 'add_documents_batch'):
-                return self.rag_system.add_documents_batch(documents, self.config.chunk_batch_size)
+                success = self.rag_system.add_documents_batch(documents, self.config.chunk_batch_size)
             else:
                 # Fallback to original method
                 batch_size = self.config.chunk_batch_size
                 for i in range(0, len(documents), batch_size):
                     batch = documents[i:i + batch_size]
                     self.rag_system.vectorstore.add_documents(batch)
-                return True
+                success = True
+            
+            if success:
+                self._bump_corpus_version()
+            return success
                 
         except Exception as e:
             print(f"❌ Error adding documents to vectorstore: {e}")
             return False
     
+    def _bump_corpus_version(self):
+        """Invalidate cached retrieval results and in-process indexes after the corpus changed"""
+        try:
+            self.rag_system.bump_corpus_version()
+        except Exception as e:
+            print(f"⚠️  Could not bump corpus version: {e}")
+            self.rag_system.invalidate_indexes()
+    
     def _load_and_chunk_document(self, filepath: str, doc_type: str = "standard") -> List[Document]:
         """Load and chunk a single document with type-specific processing"""
         loader = TextLoader(filepath, encoding='utf-8')
@@ -447,6 +468,7 @@ Context: [Your 2-3 sentence summary]
             
             if result['ids']:
                 collection.delete(ids=result['ids'])
+                self._bump_corpus_version()
                 print(f"🗑️  Removed {len(result['ids'])} chunks for {filepath}")
             
             return True
@@ -641,11 +663,113 @@ Context: [Your 2-3 sentence summary]
             print(f"❌ Error fixing inconsistencies: {e}")
             return False
 
+    def migrate_embeddings(self, dimensions: int) -> bool:
+        """Re-embed the knowledge base and Q&A cache into new collections of the given dimensions"""
+        print(f"🔁 Migrating collections to {dimensions}-dimensional embeddings...")
+        
+        try:
+            embeddings = EmbeddingService(dimensions=dimensions, cache_path=None)
+        except Exception as e:
+            print(f"❌ Error initializing embeddings: {e}")
+            return False
+        
+        success = True
+        for chroma_path, base_name in MIGRATION_TARGETS:
+            success = self._migrate_collection(chroma_path, base_name, embeddings) and success
+        
+        if success:
+            print(f"✅ Migration complete - activate with: export ESOTERIC_EMBEDDING_DIMENSIONS={dimensions}")
+        return success
+    
+    def _migrate_collection(self, chroma_path: str, base_name: str, embeddings: EmbeddingService) -> bool:
+        """
+        Copy one collection into a re-embedded collection (ids, documents and metadata are preserved).
+        
+        The copy is built under a staging name and verified before it takes the
+        target name; an existing target is renamed to a timestamped backup, never
+        deleted, so a failed migration leaves every live collection untouched.
+        """
+        source_name = collection_name_for(base_name)
+        target_name = collection_name_for(base_name, embeddings.dimensions)
+        if source_name == target_name:
+            print(f"❌ {source_name} already uses {embeddings.dimensions} dims - refusing to migrate a collection onto itself")
+            return False
+        
+        staging_name = f"{target_name}_migrating"
+        try:
+            client = chromadb.PersistentClient(path=chroma_path)
+            try:
+                source = client.get_collection(name=source_name)
+            except Exception:
+                print(f"⏭️  {source_name} not found in {chroma_path}")
+                return True
+            
+            # Re-runnable: a leftover staging collection is only ever a failed earlier attempt
+            try:
+                client.delete_collection(name=staging_name)
+            except Exception:
+                pass  # Staging collection might not exist
+            
+            from datetime import datetime
+            metadata = dict(source.metadata or {})
+            metadata.update({
+                "embedding_model": embeddings.model,
+                "embedding_dimensions": embeddings.dimensions,
+                "migrated_from": source_name,
+                "last_updated": datetime.now().isoformat()
+            })
+            hnsw = (source.configuration or {}).get("hnsw") or {"space": "l2"}
+            staging = client.create_collection(name=staging_name, metadata=metadata, configuration={"hnsw": hnsw})
+            
+            total = source.count()
+            batch_size = self.config.chunk_batch_size
+            with tqdm(total=total, desc=f"Re-embedding {source_name}") as progress:
+                for offset in range(0, total, batch_size):
+                    rows = source.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+                    if not rows["ids"]:
+                        break
+                    
+                    # No resilience fallback here: a zero vector would silently corrupt the new index
+                    vectors = embeddings.embed_documents(rows["documents"])
+                    staging.add(
+                        ids=rows["ids"],
+                        embeddings=vectors,
+                        documents=rows["documents"],
+                        metadatas=rows["metadatas"]
+                    )
+                    progress.update(len(rows["ids"]))
+            
+            sample = staging.get(limit=1, include=["embeddings"])["embeddings"]
+            if staging.count() != total or (total and len(sample[0]) != embeddings.dimensions):
+                print(f"❌ {source_name}: staged copy has {staging.count()}/{total} entries - "
+                      f"left as {staging_name}, {target_name} unchanged")
+                return False
+            
+            # Verified: move any existing target aside, then publish the staged copy under its name
+            backup_name = None
+            if target_name in {collection.name for collection in client.list_collections()}:
+                backup_name = f"{target_name}_backup_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                client.get_collection(name=target_name).modify(name=backup_name)
+            try:
+                staging.modify(name=target_name)
+            except Exception:
+                if backup_name:
+                    client.get_collection(name=backup_name).modify(name=target_name)
+                raise
+            
+            backup_note = f" (previous {target_name} kept as {backup_name})" if backup_name else ""
+            print(f"✅ {source_name} -> {target_name}: {total}/{total} entries{backup_note}")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error migrating {source_name}: {e}")
+            return False
+
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Document Manager for Vector Database")
-    parser.add_argument("command", choices=["add", "update", "remove", "list", "validate", "info", "fix", "batch"])
+    parser.add_argument("command", choices=["add", "update", "remove", "list", "validate", "info", "fix", "batch", "migrate"])
     parser.add_argument("filepath", nargs="?", help="Path to document file or batch file")
     parser.add_argument("--domain", help="Document domain")
     parser.add_argument("--doc-type", choices=["standard", "qa"], default="standard", help="Document type (standard or qa) - affects chunking and contextualization strategy")
@@ -653,6 +777,7 @@ if __name__ == "__main__":
     parser.add_argument("--workers", type=int, help="Number of parallel workers (default: auto-configure)")
     parser.add_argument("--batch-size", type=int, default=100, help="Batch size for vectorstore operations")
     parser.add_argument("--timeout", type=float, default=30.0, help="Timeout for contextualization requests")
+    parser.add_argument("--dimensions", type=int, help="Target embedding dimensions for 'migrate' (e.g. 512 or 256)")
     
     args = parser.parse_args()
     
@@ -734,6 +859,14 @@ if __name__ == "__main__":
         else:
             print("✅ All documents validated successfully")
             
+    elif args.command == "migrate":
+        if not args.dimensions:
+            print("❌ Error: 'migrate' command requires --dimensions")
+            sys.exit(1)
+        
+        success = manager.migrate_embeddings(args.dimensions)
+        sys.exit(0 if success else 1)
+        
     elif args.command == "fix":
         success = manager.fix_vectorstore_inconsistencies(args.domain)
         sys.exit(0 if success else 1)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Pre-Classifier Agreement Evaluation
+
+Labels messages with the LLM classifier once, then runs the local
+pre-classifier at several centroid margins and reports how many LLM
+classifier calls each margin would skip (coverage) and how often those
+local decisions agree with the LLM (message type, RAG use, both), per
+stage. Recommends the margin with the highest coverage that still meets
+the target agreement - or advises leaving ESOTERIC_PRECLASSIFIER off.
+
+Messages identical to the pre-classifier's labelled examples are skipped
+(they would be trivially agreed on).
+
+Usage:
+    python tools/evaluate_pre_classifier.py
+    python tools/evaluate_pre_classifier.py --queries messages.txt --target-agreement 0.97 --output data/benchmarks/pre_classifier.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add project root and src to path (main imports core.*, core modules import src.*)
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from src.core.pre_classifier import LABELLED_EXAMPLES, PreClassifier, measure_agreement
+from src.main import llm_classify, rag_system
+
+
+DEFAULT_QUERIES = [
+    "hi",
+    "hello there!",
+    "thanks so much",
+    "good night",
+    "What is the moon phase today?",
+    "When is the next full moon?",
+    "How bright is the moon tonight?",
+    "I feel anxious and disconnected lately and I don't know why",
+    "My partner and I keep fighting and I feel lost",
+    "I can't stop overthinking everything at night",
+    "I'm grieving my grandmother and it comes in waves",
+    "Why do I feel so restless around the full moon?",
+    "What rituals suit the waning moon?",
+    "How do I make moon water?",
+    "What does the full moon mean for manifestation?",
+    "What does the Empress card mean reversed?",
+    "Which crystals help with sleep?",
+    "What is my life path number if I was born on 12 March 1990?",
+    "What is a protector part in IFS?",
+    "Explain the difference between waxing and waning energy",
+    "What does Mercury retrograde affect?",
+    "What's a good way to start journaling?",
+    "How many ounces are in a cup?",
+    "What's the tallest mountain in Europe?",
+    "Can you suggest a quick vegetarian dinner?",
+    "How do I say thank you in Japanese?",
+    "What time zone is Lisbon in?",
+    "moon",
+    "hi, I feel terrible today",
+    "Part of me wants to quit my job and part of me is scared",
+]
+
+
+def share(value) -> str:
+    """Format a share, or a dash when nothing was decided."""
+    return "-" if value is None else f"{value:.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure pre-classifier agreement with the LLM classifier")
+    parser.add_argument("--queries", help="Text file with one message per line (default: built-in mix)")
+    parser.add_argument("--margins", type=float, nargs="+", default=[0.04, 0.06, 0.08, 0.1, 0.12, 0.15],
+                        help="Centroid margins to evaluate")
+    parser.add_argument("--min-similarity", type=float, default=0.3, help="Minimum centroid similarity")
+    parser.add_argument("--target-agreement", type=float, default=0.95,
+                        help="Required share of local decisions matching the LLM on both type and RAG use")
+    parser.add_argument("--output", help="Write labels, decisions and reports to this JSON file")
+    args = parser.parse_args()
+
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = DEFAULT_QUERIES
+
+    examples = {text.casefold() for text, _, _ in LABELLED_EXAMPLES}
+    held_out = [query for query in queries if query.casefold() not in examples]
+    if len(held_out) < len(queries):
+        print(f"⏭️ Skipped {len(queries) - len(held_out)} messages that are labelled examples")
+    queries = held_out
+
+    print(f"🏷️ Labelling {len(queries)} messages with the LLM classifier...")
+    reference = []
+    for query in queries:
+        decision = llm_classify(query)
+        reference.append((decision.message_type, decision.should_use_rag))
+    rag_system.embed_queries(queries)
+
+    reports = {}
+    print(f"\n  {'margin':>6} {'coverage':>9} {'agree':>7} {'type':>7} {'rag':>7} {'rule':>12} {'centroid':>12}")
+    for margin in args.margins:
+        classifier = PreClassifier(rag_system.embeddings, min_margin=margin, min_similarity=args.min_similarity)
+        decisions = [classifier.classify(query) for query in queries]
+        report = measure_agreement(decisions, reference)
+        report['decisions'] = [decision._asdict() if decision else None for decision in decisions]
+        reports[margin] = report
+
+        stages = "".join(
+            f" {str(stage['decided']) + ' / ' + share(stage['agreement']):>12}" for stage in report['by_source'].values()
+        )
+        print(f"  {margin:>6.2f} {report['coverage']:>9.0%} {share(report['agreement']):>7} "
+              f"{share(report['type_agreement']):>7} {share(report['rag_agreement']):>7}{stages}")
+
+    eligible = [margin for margin, report in reports.items()
+                if report['decided'] and report['agreement'] >= args.target_agreement]
+    if eligible:
+        best = max(eligible, key=lambda margin: (reports[margin]['coverage'], margin))
+        print(f"\n✅ Margin {best:.2f} skips {reports[best]['coverage']:.0%} of LLM classifier calls "
+              f"at {reports[best]['agreement']:.0%} agreement")
+        print(f"   export ESOTERIC_PRECLASSIFIER=true ESOTERIC_PRECLASSIFIER_MARGIN={best:.2f}")
+    else:
+        best = max(reports, key=lambda margin: reports[margin]['agreement'] or 0.0)
+        print(f"\n❌ No margin reaches {args.target_agreement:.0%} agreement - keep ESOTERIC_PRECLASSIFIER off "
+              f"(or add labelled examples)")
+
+    disagreements = reports[best]['disagreements']
+    if disagreements:
+        print(f"\n🔍 Disagreements at margin {best:.2f} (local vs LLM):")
+        for i in disagreements:
+            local = reports[best]['decisions'][i]
+            print(f"  {queries[i][:60]:<60} {local['message_type']}/{local['should_use_rag']} ({local['source']})"
+                  f" vs {reference[i][0]}/{reference[i][1]}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                'queries': queries,
+                'reference': reference,
+                'reports': {str(margin): report for margin, report in reports.items()}
+            }, f, indent=2, ensure_ascii=False)
+        print(f"📝 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Markdown Q&A Loader
+
+Syncs the curated `data/qa/*.md` corpus into the Q&A cache. Only new or
+re-worded questions are embedded; revised answers are metadata updates and
+pairs removed from the markdown are deleted. Re-running on an unchanged
+corpus makes no embedding calls.
+
+Usage:
+    python tools/load_qa.py
+    python tools/load_qa.py data/qa/lunar_qa.md
+    python tools/load_qa.py --dry-run
+    python tools/load_qa.py --source qa_candidates data/qa/candidates/lunar_qa.md
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root and src to path (cache modules import core.*, core modules import src.*)
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from cache.qa_cache import QACache
+from cache.qa_loader import CANDIDATE_SOURCE, MARKDOWN_SOURCE, QAMarkdownLoader, parse_qa_markdown
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync markdown Q&A files into the Q&A cache")
+    parser.add_argument("files", nargs="*", help="Markdown files to load (default: the whole corpus)")
+    parser.add_argument("--directory", default="data/qa", help="Corpus directory")
+    parser.add_argument("--batch-size", type=int, default=256, help="Questions embedded per request")
+    parser.add_argument("--source", choices=[MARKDOWN_SOURCE, CANDIDATE_SOURCE], default=MARKDOWN_SOURCE,
+                        help="Source tag; corpus syncs never touch mined candidates and vice versa")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and count pairs without touching the cache")
+    args = parser.parse_args()
+
+    files = args.files or sorted(str(path) for path in Path(args.directory).glob("*.md"))
+    if not files:
+        print(f"❌ No markdown files found in {args.directory}")
+        sys.exit(1)
+
+    if args.dry_run:
+        for path in files:
+            print(f"  {path}: {sum(1 for _ in parse_qa_markdown(path))} pairs")
+        return
+
+    qa_cache = QACache()
+    if not qa_cache.vectorstore:
+        print("❌ Q&A cache is not available")
+        sys.exit(1)
+
+    # Only a full-corpus sync may delete pairs whose file is not being loaded
+    loader = QAMarkdownLoader(qa_cache, batch_size=args.batch_size, source=args.source)
+    counts = loader.sync(files, delete_missing=not args.files)
+    print(f"📚 Q&A sync: {counts['added']} added, {counts['updated']} updated, {counts['unchanged']} unchanged, "
+          f"{counts['deleted']} deleted, {counts['embedded']} embedded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Q&A Cache Miss Mining
+
+Clusters the questions that missed the Q&A cache (logged by the agent to
+data/qa_misses when ESOTERIC_QA_MISS_LOG is enabled), ranks clusters by frequency and writes one canonical
+question per frequent cluster as Q&A candidates in the data/qa markdown
+format. Answers can be drafted from the knowledge base with --draft-answers;
+reviewed candidates load straight into the cache:
+
+    python tools/load_qa.py --source qa_candidates data/qa/candidates/lunar_qa.md
+
+Usage:
+    python tools/mine_misses.py
+    python tools/mine_misses.py --min-count 5 --top 20
+    python tools/mine_misses.py --draft-answers
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+# Add project root and src to path (cache modules import core.*, core modules import src.*)
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from cache.miss_log import MissLog, propose_candidates
+
+
+DRAFT_PROMPT = """Answer the question below for a curated esoteric knowledge Q&A collection.
+Use only the context. Write 2-4 short, timeless paragraphs that do not address a specific person.
+
+Context:
+{context}
+
+Question: {question}"""
+
+
+def draft_answers(candidates):
+    """Draft an answer for each candidate from retrieved knowledge base chunks."""
+    from langchain.chat_models import init_chat_model
+    from core.contextual_rag import OptimizedContextualRAGSystem
+    from core.domain_manager import DomainManager
+
+    llm = init_chat_model("gemini-2.0-flash-001", model_provider="google_genai")
+    rag_system = OptimizedContextualRAGSystem(domain_manager=DomainManager(initial_domains=set(DomainManager.AVAILABLE_DOMAINS)))
+
+    for candidate in candidates:
+        chunks = rag_system.query(candidate['question'], k=4).get("chunks") or []
+        if not chunks:
+            continue
+        context = "\n\n".join(chunk['content'] for chunk in chunks)
+        reply = llm.invoke(DRAFT_PROMPT.format(context=context, question=candidate['question']))
+        candidate['answer'] = reply.content.strip()
+
+
+def write_candidates(candidates, output_dir: Path):
+    """Write candidates as <domain>_qa.md files (data/qa format) plus a JSON report."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    by_domain = defaultdict(list)
+    for candidate in candidates:
+        by_domain[candidate['domain'] or "unassigned"].append(candidate)
+
+    for domain, items in by_domain.items():
+        lines = [f"# {domain.title()} Q&A Candidates", "",
+                 "Canonical questions mined from Q&A cache misses. Review, answer and load.", ""]
+        for i, candidate in enumerate(items, 1):
+            # Sections left without an answer are skipped by the loader
+            lines += [f"## {i}. {candidate['question']}", "", candidate.get('answer', ""), "", "---", ""]
+        (output_dir / f"{domain}_qa.md").write_text("\n".join(lines), encoding="utf-8")
+
+    with open(output_dir / "candidates.json", "w", encoding="utf-8") as f:
+        json.dump(candidates, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mine Q&A cache misses into curation candidates")
+    parser.add_argument("--log-dir", default="data/qa_misses", help="Miss log directory")
+    parser.add_argument("--dimensions", type=int, help="Embedding size to mine (default: the largest log)")
+    parser.add_argument("--clusters", type=int, help="Number of k-means clusters (default: sqrt(n / 2))")
+    parser.add_argument("--min-count", type=int, default=3, help="Smallest cluster worth curating")
+    parser.add_argument("--top", type=int, default=25, help="Candidates to keep")
+    parser.add_argument("--output", default="data/qa/candidates", help="Candidate output directory")
+    parser.add_argument("--draft-answers", action="store_true", help="Draft answers from the knowledge base with the LLM")
+    parser.add_argument("--reset", action="store_true", help="Delete the mined log afterwards")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    miss_log = MissLog(args.log_dir)
+    sizes = miss_log.dimensions()
+    if not sizes:
+        print(f"📭 No misses logged in {args.log_dir}")
+        return
+
+    dimensions = args.dimensions or max(sizes, key=lambda dims: len(miss_log.read(dims)[0]))
+    records, matrix = miss_log.read(dimensions)
+    candidates = propose_candidates(records, matrix, k=args.clusters, min_count=args.min_count, seed=args.seed)[:args.top]
+
+    print(f"📊 {len(records)} misses ({dimensions} dims) -> {len(candidates)} candidate clusters (min {args.min_count})")
+    for candidate in candidates:
+        best = candidate['mean_best_similarity']
+        print(f"  {candidate['count']:>5}x  [{candidate['domain'] or '-'}]  {candidate['question'][:70]}"
+              f"  (cohesion {candidate['cohesion']:.2f}, best cached {best if best is None else f'{best:.2f}'})")
+
+    if not candidates:
+        return
+
+    if args.draft_answers:
+        draft_answers(candidates)
+
+    write_candidates(candidates, Path(args.output))
+    print(f"📝 Candidates written to {args.output}")
+
+    if args.reset:
+        miss_log.clear(dimensions)
+        print("🧹 Mined miss log cleared")
+
+
+if __name__ == "__main__":
+    main()